@@ -1 +1,139 @@
 # Arquivo de inicialização do pacote app
+
+"""
+Fábrica da aplicação Flask Primo'sFinCntrl
+
+`create_app()` monta a aplicação (banco, rotas e handlers de erro) sem fazer
+I/O: o schema e o seed ficam em app/models/migracoes.py. É usada
+pelo servidor de desenvolvimento (app.py) e pelos servidores WSGI de
+produção (wsgi.py / gunicorn.conf.py).
+"""
+
+import os
+import time
+from flask import Flask, jsonify, render_template
+from flask_cors import CORS
+from sqlalchemy import exc as sa_exc, text
+
+# Raiz do projeto, onde ficam templates/ e static/
+RAIZ_PROJETO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def create_app():
+    """
+    Cria e configura a aplicação Flask
+    
+    Returns:
+        Flask: Aplicação pronta para ser servida
+    """
+    from app.routes import despesas_routes, categorias_routes, estatisticas_routes, dashboard_routes
+    from app.models.database import db, init_db, estado_do_pool
+    from app.cache import cache
+    from app.metricas import metricas
+    from app.diagnostico import diagnostico
+    from app.serializacao import configurar_json
+    from app.compressao import compressao
+    from app.estaticos import estaticos
+    from app.replica import replica, replica_configurada, BIND_REPLICA
+    
+    # Inicialização da aplicação Flask (templates e estáticos ficam na raiz do projeto)
+    app = Flask(__name__, root_path=RAIZ_PROJETO)
+    CORS(app, expose_headers=['ETag'])  # Habilita CORS para todas as rotas (expondo o ETag)
+    
+    # Serialização JSON das respostas (orjson quando disponível, ver JSON_PROVIDER)
+    configurar_json(app)
+    
+    # Configura o SQLAlchemy; nenhuma conexão é aberta aqui. Tabelas e
+    # categorias padrão são criadas pelo init_db.py, uma vez por deploy
+    init_db(app)
+    
+    # Leituras das rotas de consulta na réplica (DB_REPLICA_URL), com leitura
+    # das próprias escritas no primário durante DB_REPLICA_JANELA
+    replica.init_app(app)
+    
+    # Registra as rotas da aplicação
+    app.register_blueprint(despesas_routes.bp, url_prefix='/api/despesas')
+    app.register_blueprint(categorias_routes.bp, url_prefix='/api/categorias')
+    app.register_blueprint(estatisticas_routes.bp, url_prefix='/api/estatisticas')
+    app.register_blueprint(dashboard_routes.bp, url_prefix='/api/dashboard')
+    
+    # Server-Timing, contadores de SQL por requisição e /metrics
+    metricas.init_app(app)
+    
+    # Log de consultas lentas (SQL_LENTO_MS) e orçamentos de consultas por rota
+    diagnostico.init_app(app)
+    
+    # Compressão gzip/brotli das respostas da API (roda antes do Server-Timing,
+    # que assim inclui o tempo de compressão)
+    compressao.init_app(app)
+    
+    # URLs de static/ versionadas pelo conteúdo (manifesto de construir_estaticos.py)
+    estaticos.init_app(app)
+    
+    # Rota principal que serve o template HTML
+    @app.route('/')
+    def index():
+        """Endpoint principal que serve a página HTML"""
+        return render_template('index.html')
+    
+    # Rota de verificação de saúde da API
+    @app.route('/ping', methods=['GET'])
+    def ping():
+        """Endpoint para verificar se a API está funcionando"""
+        return jsonify({"message": "pong"})
+    
+    # Rota de prontidão: banco acessível e conexões disponíveis no pool
+    @app.route('/ready', methods=['GET'])
+    def ready():
+        """Endpoint de readiness: testa o banco e mostra a utilização do pool"""
+        banco = testar_banco(db.engine)
+        corpo = {'banco': banco, 'pool': estado_do_pool()}
+        if replica_configurada():
+            corpo['replica'] = testar_banco(db.engines[BIND_REPLICA])
+        
+        pronto = all('erro' not in corpo[nome] for nome in ('banco', 'replica') if nome in corpo)
+        corpo['status'] = 'pronto' if pronto else 'indisponivel'
+        return jsonify(corpo), 200 if pronto else 503
+    
+    def testar_banco(engine):
+        """Executa SELECT 1 no engine e mede a latência, sem esperar por um pool esgotado"""
+        banco = {'driver': engine.url.drivername}
+        pool = estado_do_pool(engine)
+        
+        # Com o pool esgotado, o teste esperaria DB_POOL_TIMEOUT por uma conexão
+        if pool.get('capacidade') is not None and pool['em_uso'] >= pool['capacidade']:
+            banco['erro'] = "Pool de conexões esgotado"
+            return banco
+        
+        inicio = time.perf_counter()
+        try:
+            with engine.connect() as conexao:
+                conexao.execute(text("SELECT 1"))
+            banco['latencia_ms'] = round((time.perf_counter() - inicio) * 1000, 1)
+        except sa_exc.SQLAlchemyError as e:
+            app.logger.warning("Readiness: banco %s indisponível: %s", engine.url.render_as_string(), e)
+            banco['erro'] = type(e).__name__
+        return banco
+    
+    # Rota com os contadores do cache de leitura
+    @app.route('/cache', methods=['GET'])
+    def cache_estatisticas():
+        """Endpoint que mostra acertos, falhas e taxa de acerto do cache"""
+        return jsonify(cache.estatisticas())
+    
+    # Tratamento de erros
+    @app.errorhandler(404)
+    def not_found(error):
+        return jsonify({"error": "Recurso não encontrado"}), 404
+    
+    @app.errorhandler(500)
+    def internal_error(error):
+        return jsonify({"error": "Erro interno do servidor"}), 500
+    
+    # Nenhuma conexão livre no pool dentro de DB_POOL_TIMEOUT
+    @app.errorhandler(sa_exc.TimeoutError)
+    def pool_esgotado(error):
+        metricas.pool_esgotado.incrementar(())
+        app.logger.warning("Pool de conexões esgotado: %s", estado_do_pool())
+        return jsonify({"error": "Servidor sobrecarregado, tente novamente"}), 503, {'Retry-After': '1'}
+    
+    return app
@@ -0,0 +1,257 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Cache em memória das respostas de leitura (estatísticas e categorias)
+
+As entradas ficam em um LRU limitado por tamanho e são marcadas com a
+"geração de escrita" vigente quando foram calculadas. Toda escrita em
+despesas incrementa a geração, o que invalida o cache inteiro de uma vez.
+
+Dentro de uma requisição em que a versão dos dados já foi lida do banco
+(contador despesas_versao, lido pelo ETag), ela também faz parte da
+geração: escritas feitas por outros processos ou servidores que não
+compartilham a geração invalidam as entradas mesmo assim.
+
+Com réplica de leitura (app/replica.py), valores lidos da réplica enquanto
+a geração é mais nova que DB_REPLICA_JANELA não são guardados: a réplica
+pode ainda não ter recebido a escrita que iniciou a geração.
+
+A geração fica por padrão em um arquivo SQLite compartilhado (backend
+"sqlite"), para que vários workers vejam as invalidações uns dos outros. O
+backend "local" guarda a geração só no processo e serve apenas a um
+processo único: com vários workers, cada um manteria totais antigos depois
+de escritas feitas nos outros.
+
+Configuração (variáveis de ambiente):
+    CACHE_TAMANHO: quantidade máxima de entradas (padrão 256; 0 desliga o cache)
+    CACHE_BACKEND: sqlite ou local (padrão sqlite)
+    CACHE_ARQUIVO: arquivo SQLite do backend compartilhado
+"""
+
+import functools
+import logging
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from flask import g, has_request_context
+from app.models.periodo import data_atual
+from app.replica import janela, lendo_da_replica
+
+logger = logging.getLogger(__name__)
+
+class GeracaoLocal:
+    """
+    Contador de gerações de escrita válido apenas dentro do processo
+    """
+    
+    def __init__(self):
+        self._pid = None
+        self._valor = 0
+        self._lock = threading.Lock()
+    
+    def atual(self):
+        # Token do processo: gerações de processos diferentes nunca coincidem,
+        # inclusive em workers criados por fork depois de importar este módulo
+        if self._pid != os.getpid():
+            self._pid = os.getpid()
+            self._token = uuid.uuid4().hex[:8]
+        return f"{self._token}.{self._valor}"
+    
+    def incrementar(self):
+        with self._lock:
+            self._valor += 1
+
+class GeracaoSQLite:
+    """
+    Contador de gerações de escrita compartilhado entre processos via SQLite
+    """
+    
+    def __init__(self, caminho):
+        self._caminho = caminho
+        self._local = threading.local()
+    
+    def _conexao(self):
+        conexao = getattr(self._local, 'conexao', None)
+        # Conexões SQLite não podem ser reaproveitadas depois de um fork
+        if conexao is None or self._local.pid != os.getpid():
+            self._local.pid = os.getpid()
+            conexao = sqlite3.connect(self._caminho, timeout=5, isolation_level=None)
+            conexao.execute("CREATE TABLE IF NOT EXISTS geracao (id INTEGER PRIMARY KEY, valor INTEGER NOT NULL)")
+            conexao.execute("INSERT OR IGNORE INTO geracao (id, valor) VALUES (1, 0)")
+            self._local.conexao = conexao
+        return conexao
+    
+    def atual(self):
+        valor = self._conexao().execute("SELECT valor FROM geracao WHERE id = 1").fetchone()[0]
+        return f"sqlite.{valor}"
+    
+    def incrementar(self):
+        self._conexao().execute("UPDATE geracao SET valor = valor + 1 WHERE id = 1")
+
+class Cache:
+    """
+    Cache LRU de resultados invalidado pela geração de escrita
+    """
+    
+    def __init__(self, tamanho_maximo=256, geracao=None):
+        self.tamanho_maximo = tamanho_maximo
+        self.geracao = geracao or GeracaoLocal()
+        self._entradas = OrderedDict()
+        self._lock = threading.Lock()
+        # Geração mais recente vista pelo processo e quando foi vista
+        self._geracao_vista = (None, 0.0)
+        self.acertos = 0
+        self.falhas = 0
+        self.remocoes = 0
+    
+    @staticmethod
+    def de_ambiente():
+        """
+        Cria o cache a partir das variáveis de ambiente
+        
+        Returns:
+            Cache: Instância configurada
+        """
+        tamanho = int(os.getenv('CACHE_TAMANHO', '256'))
+        
+        if os.getenv('CACHE_BACKEND', 'sqlite') == 'local':
+            if int(os.getenv('WEB_CONCURRENCY', '1')) > 1:
+                logger.error("CACHE_BACKEND=local com WEB_CONCURRENCY=%s: cada worker terá a própria "
+                             "geração e servirá dados antigos depois de escritas nos outros; "
+                             "use CACHE_BACKEND=sqlite", os.getenv('WEB_CONCURRENCY'))
+            return Cache(tamanho)
+        
+        caminho = os.getenv('CACHE_ARQUIVO', os.path.join(tempfile.gettempdir(), 'primosfincntrl-cache.db'))
+        return Cache(tamanho, GeracaoSQLite(caminho))
+    
+    def obter(self, chave, calcular):
+        """
+        Retorna o valor em cache para a chave ou o calcula e armazena
+        
+        O valor retornado é compartilhado entre requisições e não deve ser alterado.
+        
+        Args:
+            chave (tuple): Chave da entrada (endpoint e parâmetros)
+            calcular (callable): Função que calcula o valor em caso de falha
+        
+        Returns:
+            Valor em cache ou recém-calculado
+        """
+        if self.tamanho_maximo <= 0:
+            return calcular()
+        
+        geracao = self.geracao_da_requisicao()
+        
+        with self._lock:
+            entrada = self._entradas.get(chave)
+            if entrada is not None and entrada[0] == geracao:
+                self._entradas.move_to_end(chave)
+                self.acertos += 1
+                return entrada[1]
+            self.falhas += 1
+        
+        valor = calcular()
+        if self.pode_estar_atrasado(geracao):
+            return valor
+        
+        with self._lock:
+            self._entradas[chave] = (geracao, valor)
+            self._entradas.move_to_end(chave)
+            while len(self._entradas) > self.tamanho_maximo:
+                self._entradas.popitem(last=False)
+                self.remocoes += 1
+        
+        return valor
+    
+    def geracao_da_requisicao(self):
+        """
+        Geração de escrita combinada com a versão dos dados lida na requisição
+        
+        Returns:
+            str: Geração atual, com o sufixo da versão quando ela já foi lida
+        """
+        geracao = self.geracao.atual()
+        versao = g.get('versao_despesas') if has_request_context() else None
+        return geracao if versao is None else f"{geracao}.v{versao}"
+    
+    def idade_da_geracao(self, geracao):
+        """
+        Segundos desde que o processo viu a geração pela primeira vez
+        
+        Args:
+            geracao (str): Geração retornada por `geracao_da_requisicao()`
+        
+        Returns:
+            float: Idade da geração (0 para uma geração ainda não vista)
+        """
+        agora = time.monotonic()
+        with self._lock:
+            if self._geracao_vista[0] != geracao:
+                self._geracao_vista = (geracao, agora)
+            return agora - self._geracao_vista[1]
+    
+    def pode_estar_atrasado(self, geracao):
+        """
+        Indica se a requisição lê da réplica e a geração é recente demais
+        para que a réplica já tenha todas as escritas dela
+        
+        Args:
+            geracao (str): Geração usada pelo valor ou pelo ETag
+        
+        Returns:
+            bool: True se o resultado não deve ser guardado nem validado por ETag
+        """
+        return lendo_da_replica() and self.idade_da_geracao(geracao) < janela()
+    
+    def invalidar(self):
+        """
+        Inicia uma nova geração de escrita, invalidando todas as entradas
+        """
+        self.geracao.incrementar()
+        with self._lock:
+            self._entradas.clear()
+    
+    def memorizar(self, nome, por_dia=False):
+        """
+        Decorador que guarda em cache o resultado da função por argumentos
+        
+        Args:
+            nome (str): Nome do endpoint, usado como prefixo da chave
+            por_dia (bool): Inclui a data atual na chave, para resultados que
+                dependem de períodos relativos a hoje
+        """
+        def decorador(funcao):
+            @functools.wraps(funcao)
+            def envoltorio(*args, **kwargs):
+                chave = (nome, args, tuple(sorted(kwargs.items())))
+                if por_dia:
+                    chave += (data_atual(),)
+                return self.obter(chave, lambda: funcao(*args, **kwargs))
+            return envoltorio
+        return decorador
+    
+    def estatisticas(self):
+        """
+        Retorna os contadores de uso do cache
+        
+        Returns:
+            dict: Acertos, falhas, remoções, tamanho e taxa de acerto
+        """
+        with self._lock:
+            consultas = self.acertos + self.falhas
+            return {
+                'acertos': self.acertos,
+                'falhas': self.falhas,
+                'remocoes': self.remocoes,
+                'tamanho': len(self._entradas),
+                'tamanho_maximo': self.tamanho_maximo,
+                'taxa_acerto': round(self.acertos / consultas, 4) if consultas else 0.0
+            }
+
+# Instância única usada pelos modelos
+cache = Cache.de_ambiente()
@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Compressão negociada (gzip e brotli) das respostas da API
+
+Respostas JSON, NDJSON e CSV a partir de COMPRESSAO_MINIMO bytes são
+comprimidas com a codificação preferida pelo cliente em `Accept-Encoding`
+(brotli, se o pacote `brotli` estiver instalado, ou gzip). As exportações
+em streaming são comprimidas parte a parte, sem juntar o arquivo na memória.
+
+A representação comprimida é outra: recebe `Vary: Accept-Encoding` e o ETag
+ganha o sufixo da codificação (`"<etag>-gzip"`), que `app/etag.py` também
+aceita em `If-None-Match`.
+
+Configuração (variáveis de ambiente):
+    COMPRESSAO: 0 desliga a compressão das respostas (padrão 1)
+    COMPRESSAO_MINIMO: tamanho mínimo, em bytes, para comprimir (padrão 1024)
+"""
+
+import gzip
+import os
+import zlib
+from flask import request
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Codificações suportadas, da preferida para a menos preferida
+CODIFICACOES = ('br', 'gzip') if brotli is not None else ('gzip',)
+
+# Tipos de conteúdo comprimidos (as rotas da API)
+TIPOS_COMPRIMIVEIS = ('application/json', 'application/x-ndjson', 'text/csv')
+
+# Nível do gzip e qualidade do brotli nas respostas geradas a cada requisição
+# (os estáticos pré-comprimidos usam o nível máximo, ver construir_estaticos.py)
+NIVEL_GZIP = 6
+QUALIDADE_BROTLI = 5
+
+def negociar(aceitas, disponiveis=CODIFICACOES):
+    """
+    Escolhe a codificação para o `Accept-Encoding` do cliente
+    
+    Args:
+        aceitas: `request.accept_encodings` (qualidades do cliente, com `*`)
+        disponiveis (tuple): Codificações possíveis, da preferida para a menos preferida
+    
+    Returns:
+        str: Codificação escolhida, ou None para enviar sem compressão
+    """
+    escolhida, melhor = None, 0
+    for codificacao in disponiveis:
+        qualidade = aceitas.quality(codificacao)
+        # Em caso de empate vale a ordem de preferência do servidor
+        if qualidade > melhor:
+            escolhida, melhor = codificacao, qualidade
+    return escolhida
+
+def comprimir(dados, codificacao):
+    """
+    Comprime um corpo inteiro na codificação informada
+    """
+    if codificacao == 'br':
+        return brotli.compress(dados, quality=QUALIDADE_BROTLI)
+    # mtime fixo: o mesmo corpo gera sempre os mesmos bytes
+    return gzip.compress(dados, compresslevel=NIVEL_GZIP, mtime=0)
+
+def _comprimir_partes(partes, codificacao, charset):
+    """
+    Comprime um corpo em streaming, enviando cada parte assim que é gerada
+    """
+    if codificacao == 'br':
+        compressor = brotli.Compressor(quality=QUALIDADE_BROTLI)
+        comprimir_parte, finalizar = compressor.process, compressor.finish
+        descarregar = compressor.flush
+    else:
+        compressor = zlib.compressobj(NIVEL_GZIP, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+        comprimir_parte, finalizar = compressor.compress, compressor.flush
+        descarregar = lambda: compressor.flush(zlib.Z_SYNC_FLUSH)
+    
+    for parte in partes:
+        if isinstance(parte, str):
+            parte = parte.encode(charset)
+        comprimido = comprimir_parte(parte) + descarregar()
+        if comprimido:
+            yield comprimido
+    yield finalizar()
+
+class Compressao:
+    """
+    Comprime as respostas da API conforme o `Accept-Encoding` do cliente
+    """
+    
+    def __init__(self):
+        self.ativa = True
+        self.minimo = 1024
+    
+    def init_app(self, app):
+        """
+        Registra a compressão das respostas na aplicação
+        
+        Args:
+            app (Flask): Aplicação a configurar
+        """
+        self.ativa = os.getenv('COMPRESSAO', '1') != '0'
+        self.minimo = int(os.getenv('COMPRESSAO_MINIMO', '1024'))
+        app.after_request(self._comprimir_resposta)
+    
+    def _comprimir_resposta(self, resposta):
+        if not self.ativa or resposta.mimetype not in TIPOS_COMPRIMIVEIS:
+            return resposta
+        
+        # O corpo enviado depende do Accept-Encoding, mesmo quando não é comprimido
+        resposta.vary.add('Accept-Encoding')
+        
+        if (resposta.status_code != 200 or resposta.direct_passthrough
+                or 'Content-Encoding' in resposta.headers
+                or 'no-transform' in resposta.headers.get('Cache-Control', '')):
+            return resposta
+        
+        codificacao = negociar(request.accept_encodings)
+        if codificacao is None:
+            return resposta
+        
+        if resposta.is_streamed:
+            # Tamanho desconhecido: as exportações são comprimidas sempre
+            resposta.response = _comprimir_partes(resposta.response, codificacao, resposta.charset)
+            resposta.headers.pop('Content-Length', None)
+        else:
+            dados = resposta.get_data()
+            if len(dados) < self.minimo:
+                return resposta
+            resposta.set_data(comprimir(dados, codificacao))
+        
+        resposta.headers['Content-Encoding'] = codificacao
+        etag, fraco = resposta.get_etag()
+        if etag:
+            resposta.set_etag(f"{etag}-{codificacao}", weak=fraco)
+        return resposta
+
+# Instância única usada pela aplicação
+compressao = Compressao()
@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Diagnóstico de consultas SQL: log de consultas lentas e orçamento por rota
+
+Consultas que passam de SQL_LENTO_MS milissegundos são registradas no log
+(logger `app.sql_lento`) com o comando, os parâmetros, a rota que o emitiu
+e o plano de execução (`EXPLAIN` no MySQL, `EXPLAIN QUERY PLAN` no SQLite).
+
+O decorador `orcamento_consultas` declara quantos comandos SQL uma rota pode
+executar. Em modo de teste (TESTING ou ORCAMENTO_CONSULTAS=1) a rota falha
+com `OrcamentoExcedido` quando passa do orçamento ou quando o plano de
+alguma consulta faz varredura completa de uma tabela.
+
+Configuração (variáveis de ambiente):
+    SQL_LENTO_MS: limite, em ms, para registrar a consulta (padrão 200; 0 desliga)
+    ORCAMENTO_CONSULTAS: 1 ativa a verificação dos orçamentos fora dos testes
+"""
+
+import functools
+import logging
+import os
+import re
+import time
+from flask import current_app, g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger('app.sql_lento')
+
+# Tamanho máximo dos parâmetros reproduzidos no log
+TAMANHO_PARAMETROS_LOG = 500
+
+# Tabelas pequenas e de tamanho fixo, em que a varredura completa é aceitável
+VARREDURAS_PERMITIDAS = ('categorias',)
+
+class OrcamentoExcedido(AssertionError):
+    """
+    Rota executou mais comandos SQL que o declarado ou fez varredura completa
+    """
+
+def plano_de_execucao(conexao, comando, parametros):
+    """
+    Obtém o plano de execução de uma consulta
+    
+    Usa um cursor DBAPI direto, para que o EXPLAIN não passe pelos eventos
+    de engine (não é contado nem registrado de novo).
+    
+    Args:
+        conexao: Conexão SQLAlchemy em que a consulta foi executada
+        comando (str): SQL da consulta, como enviado ao driver
+        parametros: Parâmetros da consulta, no formato do driver
+    
+    Returns:
+        list: Linhas do plano como dicionários (coluna: valor)
+    """
+    prefixo = 'EXPLAIN QUERY PLAN ' if conexao.dialect.name == 'sqlite' else 'EXPLAIN '
+    cursor = conexao.connection.cursor()
+    try:
+        cursor.execute(prefixo + comando, parametros)
+        colunas = [descricao[0] for descricao in cursor.description]
+        return [dict(zip(colunas, linha)) for linha in cursor.fetchall()]
+    finally:
+        cursor.close()
+
+def formatar_plano(plano):
+    """
+    Representa o plano de execução em texto, uma linha por passo
+    """
+    linhas = []
+    for passo in plano:
+        if 'detail' in passo:
+            linhas.append(str(passo['detail']))
+        else:
+            linhas.append(', '.join(f"{coluna}={valor}" for coluna, valor in passo.items() if valor is not None))
+    return ' | '.join(linhas)
+
+def tabelas_varridas(plano):
+    """
+    Tabelas lidas por inteiro, sem índice, segundo o plano de execução
+    
+    Returns:
+        list: Nomes (ou aliases) das tabelas varridas
+    """
+    tabelas = []
+    for passo in plano:
+        if 'detail' in passo:
+            # SQLite: "SCAN despesas" (sem "USING ... INDEX") é varredura completa
+            encontrado = re.match(r'^SCAN (\w+)$', str(passo['detail']))
+            if encontrado and encontrado.group(1) != 'CONSTANT':
+                tabelas.append(encontrado.group(1))
+        elif str(passo.get('type', '')).upper() == 'ALL':
+            # MySQL: type=ALL é full table scan
+            tabelas.append(str(passo.get('table')))
+    return tabelas
+
+def _consulta(comando):
+    return comando.lstrip().split(None, 1)[0].upper() in ('SELECT', 'WITH')
+
+def _rota_atual():
+    if not has_request_context():
+        return '-'
+    regra = request.url_rule.rule if request.url_rule is not None else request.path
+    return f"{request.method} {regra}"
+
+class DiagnosticoSQL:
+    """
+    Log de consultas lentas e coleta de comandos para os orçamentos por rota
+    """
+    
+    def __init__(self):
+        self.limite_lento_ms = float(os.getenv('SQL_LENTO_MS', '200'))
+    
+    def init_app(self, app):
+        """
+        Registra os eventos de engine e a configuração do orçamento de consultas
+        
+        Args:
+            app (Flask): Aplicação a instrumentar
+        """
+        app.config.setdefault('ORCAMENTO_CONSULTAS', os.getenv('ORCAMENTO_CONSULTAS') == '1')
+        if not event.contains(Engine, 'before_cursor_execute', _antes_do_comando):
+            event.listen(Engine, 'before_cursor_execute', _antes_do_comando)
+            event.listen(Engine, 'after_cursor_execute', _depois_do_comando)
+    
+    def registrar_lenta(self, conexao, comando, parametros, contexto, executemany, duracao):
+        """
+        Escreve no log uma consulta que passou do limite, com o plano de execução
+        """
+        plano = '-'
+        # EXPLAIN só para SELECT simples; com cursor de servidor (stream_results)
+        # a conexão ainda está lendo o resultado da consulta original
+        streaming = contexto is not None and contexto.execution_options.get('stream_results')
+        if not executemany and not streaming and _consulta(comando):
+            try:
+                plano = formatar_plano(plano_de_execucao(conexao, comando, parametros))
+            except Exception as e:
+                plano = f"indisponível ({e})"
+        
+        parametros_log = repr(parametros)
+        if len(parametros_log) > TAMANHO_PARAMETROS_LOG:
+            parametros_log = parametros_log[:TAMANHO_PARAMETROS_LOG] + '...'
+        
+        logger.warning(
+            "Consulta lenta (%.1f ms) em %s: %s | parâmetros: %s | plano: %s",
+            duracao * 1000, _rota_atual(), ' '.join(comando.split()), parametros_log, plano
+        )
+
+def orcamento_consultas(maximo, varreduras_permitidas=VARREDURAS_PERMITIDAS):
+    """
+    Decorador que declara o orçamento de comandos SQL de uma rota
+    
+    Só tem efeito com TESTING ou ORCAMENTO_CONSULTAS ativos; em produção a
+    rota é chamada sem nenhum custo extra além de uma verificação de config.
+    Comandos executados depois do retorno da rota (respostas em streaming)
+    não entram na conta.
+    
+    Args:
+        maximo (int ou callable): Máximo de comandos; uma função sem argumentos
+            pode calculá-lo a partir da requisição (ex.: tamanho do lote)
+        varreduras_permitidas (tuple ou callable): Tabelas em que a varredura
+            completa é aceita; também pode ser calculado a partir da requisição
+    """
+    def decorador(funcao):
+        @functools.wraps(funcao)
+        def envoltorio(*args, **kwargs):
+            config = current_app.config
+            if not (config.get('TESTING') or config.get('ORCAMENTO_CONSULTAS')):
+                return funcao(*args, **kwargs)
+            
+            g.orcamento_comandos = comandos = []
+            try:
+                resposta = funcao(*args, **kwargs)
+            finally:
+                del g.orcamento_comandos
+            
+            limite = maximo() if callable(maximo) else maximo
+            rota = _rota_atual()
+            if len(comandos) > limite:
+                lista = '\n'.join(f"  - {' '.join(comando.split())}" for comando, _, _ in comandos)
+                raise OrcamentoExcedido(
+                    f"{rota} executou {len(comandos)} comandos SQL (orçamento: {limite}):\n{lista}"
+                )
+            
+            permitidas = varreduras_permitidas() if callable(varreduras_permitidas) else varreduras_permitidas
+            _verificar_varreduras(rota, comandos, permitidas)
+            return resposta
+        return envoltorio
+    return decorador
+
+def _verificar_varreduras(rota, comandos, permitidas):
+    from app.models.database import db
+    
+    conexao = db.session.connection()
+    for comando, parametros, executemany in comandos:
+        if executemany or not _consulta(comando):
+            continue
+        plano = plano_de_execucao(conexao, comando, parametros)
+        varridas = [tabela for tabela in tabelas_varridas(plano) if tabela not in permitidas]
+        if varridas:
+            raise OrcamentoExcedido(
+                f"{rota} fez varredura completa em {', '.join(varridas)}: {' '.join(comando.split())} "
+                f"| plano: {formatar_plano(plano)}"
+            )
+
+def _antes_do_comando(conexao, cursor, comando, parametros, contexto, executemany):
+    if contexto is not None:
+        contexto.diagnostico_inicio = time.perf_counter()
+
+def _depois_do_comando(conexao, cursor, comando, parametros, contexto, executemany):
+    inicio = getattr(contexto, 'diagnostico_inicio', None)
+    if inicio is None:
+        return
+    
+    duracao = time.perf_counter() - inicio
+    if 0 < diagnostico.limite_lento_ms <= duracao * 1000:
+        diagnostico.registrar_lenta(conexao, comando, parametros, contexto, executemany, duracao)
+    
+    if has_request_context() and 'orcamento_comandos' in g:
+        g.orcamento_comandos.append((comando, parametros, executemany))
+
+# Instância única usada pela aplicação
+diagnostico = DiagnosticoSQL()
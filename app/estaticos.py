@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Arquivos estáticos versionados pelo conteúdo e com cache imutável
+
+O `construir_estaticos.py` copia os arquivos de static/css e static/js para
+static/dist com o hash do conteúdo no nome (`css/style.css` vira
+`dist/css/style.<hash>.css`), grava ao lado as versões pré-comprimidas
+(`.gz` e, com o pacote `brotli`, `.br`) e o manifesto
+`static/dist/manifest.json`, que liga cada nome original ao versionado.
+
+Com o manifesto presente, `url_for('static', filename='css/style.css')`
+passa a gerar a URL versionada, e esses arquivos são servidos com
+`Cache-Control: public, max-age=31536000, immutable` e na codificação
+pré-comprimida aceita pelo cliente. Como o nome muda junto com o conteúdo,
+o navegador nunca precisa revalidá-los. Sem o manifesto (ex.: em
+desenvolvimento) as URLs e os arquivos originais são usados.
+"""
+
+import json
+import logging
+import mimetypes
+import os
+from flask import current_app, request, send_from_directory
+from app.compressao import negociar
+
+logger = logging.getLogger(__name__)
+
+# Pasta (dentro de static/) e manifesto dos arquivos versionados
+PASTA_DIST = 'dist'
+MANIFESTO = 'manifest.json'
+
+# Extensão de cada versão pré-comprimida, da preferida para a menos preferida
+EXTENSOES = {'br': '.br', 'gzip': '.gz'}
+
+CACHE_IMUTAVEL = 'public, max-age=31536000, immutable'
+
+class Estaticos:
+    """
+    Reescreve as URLs de static/ para os arquivos versionados e os serve
+    """
+    
+    def __init__(self):
+        self.manifesto = {}
+        self.variantes = {}
+    
+    def init_app(self, app):
+        """
+        Carrega o manifesto e substitui a rota `static` da aplicação
+        
+        Args:
+            app (Flask): Aplicação a configurar
+        """
+        self.manifesto = self._carregar_manifesto(app.static_folder)
+        
+        # Codificações pré-comprimidas disponíveis para cada arquivo versionado
+        self.variantes = {}
+        for versionado in self.manifesto.values():
+            caminho = os.path.join(app.static_folder, versionado)
+            self.variantes[versionado] = tuple(
+                codificacao for codificacao, extensao in EXTENSOES.items()
+                if os.path.isfile(caminho + extensao)
+            )
+        
+        app.url_defaults(self._reescrever_url)
+        app.view_functions['static'] = self._servir
+    
+    @staticmethod
+    def _carregar_manifesto(pasta_static):
+        caminho = os.path.join(pasta_static, PASTA_DIST, MANIFESTO)
+        if not os.path.isfile(caminho):
+            return {}
+        with open(caminho, encoding='utf-8') as arquivo:
+            manifesto = json.load(arquivo)
+        logger.info("Manifesto de estáticos carregado: %d arquivos versionados", len(manifesto))
+        return manifesto
+    
+    def _reescrever_url(self, endpoint, valores):
+        if endpoint == 'static' and valores.get('filename') in self.manifesto:
+            valores['filename'] = self.manifesto[valores['filename']]
+    
+    def _servir(self, filename):
+        """
+        Serve um arquivo de static/, usando a versão pré-comprimida e o cache
+        imutável para os arquivos versionados
+        """
+        if filename not in self.variantes:
+            return current_app.send_static_file(filename)
+        
+        codificacao = negociar(request.accept_encodings, self.variantes[filename])
+        if codificacao is None:
+            resposta = send_from_directory(current_app.static_folder, filename)
+        else:
+            # O tipo é o do arquivo original, não o do .gz/.br
+            resposta = send_from_directory(
+                current_app.static_folder, filename + EXTENSOES[codificacao],
+                mimetype=mimetypes.guess_type(filename)[0]
+            )
+            resposta.headers['Content-Encoding'] = codificacao
+        
+        resposta.vary.add('Accept-Encoding')
+        resposta.headers['Cache-Control'] = CACHE_IMUTAVEL
+        return resposta
+
+# Instância única usada pela aplicação
+estaticos = Estaticos()
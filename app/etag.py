@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Suporte a GET condicional (ETag / If-None-Match) nas rotas da API
+
+O ETag é derivado da versão dos dados no banco (contador despesas_versao,
+app/models/mudancas.py), que muda a cada escrita em despesas feita por
+qualquer processo, e da geração de escrita do cache (app/cache.py), e não
+do corpo serializado da resposta. Assim um If-None-Match válido é
+respondido com 304 com uma única leitura por chave primária, sem executar
+a rota.
+Respostas comprimidas levam o ETag com o sufixo da codificação
+(app/compressao.py), aceito aqui da mesma forma. Respostas lidas da réplica
+logo depois de uma escrita (app/replica.py) saem sem ETag, para que o
+cliente não valide uma versão ainda atrasada.
+"""
+
+import functools
+import zlib
+from flask import request, make_response
+from app.cache import cache
+from app.compressao import CODIFICACOES
+from app.models.mudancas import Mudancas
+from app.models.periodo import data_atual
+
+def gerar_etag(geracao=None):
+    """
+    Gera o ETag da requisição atual a partir da versão dos dados
+    
+    Combina a geração de escrita com a versão dos dados, a URL com os
+    parâmetros e a data atual (os filtros de período são relativos a hoje).
+    
+    Args:
+        geracao (str, optional): Geração da requisição (padrão: a atual)
+    
+    Returns:
+        str: Valor do ETag, sem aspas
+    """
+    recurso = f"{request.full_path}|{data_atual()}".encode('utf-8')
+    if geracao is None:
+        Mudancas.versao_da_requisicao()
+        geracao = cache.geracao_da_requisicao()
+    return f"{geracao}-{zlib.crc32(recurso):08x}"
+
+def etag_conhecida(etag):
+    """
+    Procura em If-None-Match o ETag atual, sem ou com sufixo de codificação
+    
+    Args:
+        etag (str): ETag atual, retornado por `gerar_etag`
+    
+    Returns:
+        str: ETag enviado pelo cliente que corresponde à versão atual, ou None
+    """
+    for candidato in (etag,) + tuple(f"{etag}-{codificacao}" for codificacao in CODIFICACOES):
+        if request.if_none_match.contains(candidato):
+            return candidato
+    return None
+
+def condicional(funcao):
+    """
+    Decorador que adiciona ETag forte à resposta e responde 304 quando o
+    cliente já possui a versão atual
+    """
+    @functools.wraps(funcao)
+    def envoltorio(*args, **kwargs):
+        # A versão é lida antes dos dados: uma escrita concluída no meio da
+        # requisição deixa o ETag mais antigo que o corpo, nunca o contrário
+        Mudancas.versao_da_requisicao()
+        geracao = cache.geracao_da_requisicao()
+        etag = gerar_etag(geracao)
+        
+        # Cliente já tem a versão atual (em qualquer codificação): não executa a rota
+        conhecida = etag_conhecida(etag)
+        if conhecida:
+            resposta = make_response('', 304)
+            resposta.vary.add('Accept-Encoding')
+            etag = conhecida
+        else:
+            resposta = make_response(funcao(*args, **kwargs))
+            if resposta.status_code != 200:
+                return resposta
+            if cache.pode_estar_atrasado(geracao):
+                resposta.headers['Cache-Control'] = 'no-cache'
+                return resposta
+        
+        resposta.set_etag(etag)
+        # Permite guardar a resposta, mas exige revalidação a cada uso
+        resposta.headers['Cache-Control'] = 'no-cache'
+        return resposta
+    return envoltorio
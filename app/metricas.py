@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Instrumentação de desempenho por requisição
+
+Para cada requisição são medidos o tempo total, a quantidade de comandos SQL
+e o tempo gasto no banco (eventos de engine do SQLAlchemy). Esses valores
+voltam ao cliente no cabeçalho `Server-Timing` e são agregados em
+histogramas por endpoint, expostos no formato texto do Prometheus em
+`/metrics`, junto com o estado do pool de conexões e do cache de leitura.
+
+As métricas ficam na memória de cada processo: com vários workers do
+gunicorn, cada coleta em `/metrics` mostra os números do worker que atendeu.
+"""
+
+import threading
+import time
+from flask import g, has_request_context, request, Response
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# Limites dos buckets (segundos para tempos, unidades para contagens)
+BUCKETS_DURACAO = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+BUCKETS_CONSULTAS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+PREFIXO = 'primosfincntrl'
+
+def _rotulos(nomes, valores):
+    pares = []
+    for nome, valor in zip(nomes, valores):
+        valor = str(valor).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+        pares.append(f'{nome}="{valor}"')
+    return '{' + ','.join(pares) + '}' if pares else ''
+
+class Histograma:
+    """
+    Histograma com rótulos no modelo do Prometheus (buckets cumulativos, soma e contagem)
+    """
+    
+    def __init__(self, nome, descricao, rotulos, buckets):
+        self.nome = nome
+        self.descricao = descricao
+        self.rotulos = rotulos
+        self.buckets = buckets
+        self._series = {}
+        self._lock = threading.Lock()
+    
+    def observar(self, valores_rotulos, valor):
+        with self._lock:
+            serie = self._series.get(valores_rotulos)
+            if serie is None:
+                serie = self._series[valores_rotulos] = [[0] * len(self.buckets), 0.0, 0]
+            for indice, limite in enumerate(self.buckets):
+                if valor <= limite:
+                    serie[0][indice] += 1
+                    break
+            serie[1] += valor
+            serie[2] += 1
+    
+    def exportar(self):
+        linhas = [f"# HELP {self.nome} {self.descricao}", f"# TYPE {self.nome} histogram"]
+        with self._lock:
+            series = sorted((rotulos, (list(serie[0]), serie[1], serie[2])) for rotulos, serie in self._series.items())
+        for valores, (contagens, soma, total) in series:
+            acumulado = 0
+            for limite, quantidade in zip(self.buckets, contagens):
+                acumulado += quantidade
+                rotulos = _rotulos(self.rotulos + ('le',), valores + (limite,))
+                linhas.append(f"{self.nome}_bucket{rotulos} {acumulado}")
+            linhas.append(f"{self.nome}_bucket{_rotulos(self.rotulos + ('le',), valores + ('+Inf',))} {total}")
+            linhas.append(f"{self.nome}_sum{_rotulos(self.rotulos, valores)} {soma:.6f}")
+            linhas.append(f"{self.nome}_count{_rotulos(self.rotulos, valores)} {total}")
+        return linhas
+
+class Contador:
+    """
+    Contador com rótulos no modelo do Prometheus
+    """
+    
+    def __init__(self, nome, descricao, rotulos):
+        self.nome = nome
+        self.descricao = descricao
+        self.rotulos = rotulos
+        self._valores = {}
+        self._lock = threading.Lock()
+    
+    def incrementar(self, valores_rotulos, quantidade=1):
+        with self._lock:
+            self._valores[valores_rotulos] = self._valores.get(valores_rotulos, 0) + quantidade
+    
+    def exportar(self):
+        linhas = [f"# HELP {self.nome} {self.descricao}", f"# TYPE {self.nome} counter"]
+        with self._lock:
+            valores = sorted(self._valores.items())
+        for rotulos, valor in valores:
+            linhas.append(f"{self.nome}{_rotulos(self.rotulos, rotulos)} {valor}")
+        return linhas
+
+def _medida(nome, tipo, descricao, valor):
+    return [f"# HELP {nome} {descricao}", f"# TYPE {nome} {tipo}", f"{nome} {valor}"]
+
+class Metricas:
+    """
+    Coleta das métricas por requisição e exposição em /metrics
+    """
+    
+    def __init__(self):
+        self.requisicoes = Contador(f'{PREFIXO}_http_requisicoes_total',
+                                    'Requisicoes atendidas', ('endpoint', 'metodo', 'status'))
+        self.duracao = Histograma(f'{PREFIXO}_http_requisicao_duracao_segundos',
+                                  'Tempo total da requisicao', ('endpoint', 'metodo'), BUCKETS_DURACAO)
+        self.consultas = Histograma(f'{PREFIXO}_sql_comandos_por_requisicao',
+                                    'Comandos SQL executados por requisicao', ('endpoint', 'metodo'),
+                                    BUCKETS_CONSULTAS)
+        self.tempo_sql = Histograma(f'{PREFIXO}_sql_duracao_segundos',
+                                    'Tempo gasto no banco por requisicao', ('endpoint', 'metodo'),
+                                    BUCKETS_DURACAO)
+        self.pool_esgotado = Contador(f'{PREFIXO}_pool_esgotado_total',
+                                      'Requisicoes que esperaram DB_POOL_TIMEOUT por uma conexao', ())
+        self.pool_esgotado.incrementar((), 0)
+    
+    def init_app(self, app):
+        """
+        Registra a coleta na aplicação e a rota /metrics
+        
+        Args:
+            app (Flask): Aplicação a instrumentar
+        """
+        if not event.contains(Engine, 'before_cursor_execute', _antes_do_comando):
+            event.listen(Engine, 'before_cursor_execute', _antes_do_comando)
+            event.listen(Engine, 'after_cursor_execute', _depois_do_comando)
+        
+        app.before_request(self._iniciar_requisicao)
+        app.after_request(self._finalizar_requisicao)
+        app.add_url_rule('/metrics', 'metricas', self._rota_metricas, methods=['GET'])
+    
+    @staticmethod
+    def _iniciar_requisicao():
+        # Objeto mutável: continua acessível depois que a resposta em streaming termina
+        g.metricas = {'inicio': time.perf_counter(), 'comandos': 0, 'tempo_sql': 0.0}
+    
+    def _finalizar_requisicao(self, resposta):
+        medicao = g.get('metricas')
+        if medicao is None:
+            return resposta
+        
+        duracao = time.perf_counter() - medicao['inicio']
+        resposta.headers['Server-Timing'] = (
+            f'app;dur={duracao * 1000:.1f}, '
+            f'sql;dur={medicao["tempo_sql"] * 1000:.1f};desc="{medicao["comandos"]} comandos"'
+        )
+        
+        # Regra da rota (ex.: /api/despesas/<int:despesa_id>) mantém a cardinalidade baixa
+        endpoint = request.url_rule.rule if request.url_rule is not None else 'sem_rota'
+        rotulos = (endpoint, request.method)
+        status = resposta.status_code
+        
+        def registrar():
+            self.requisicoes.incrementar(rotulos + (status,))
+            self.duracao.observar(rotulos, time.perf_counter() - medicao['inicio'])
+            self.consultas.observar(rotulos, medicao['comandos'])
+            self.tempo_sql.observar(rotulos, medicao['tempo_sql'])
+        
+        # Em streaming o cabeçalho só cobre o início do envio; os histogramas
+        # são atualizados quando o corpo termina de ser gerado
+        if resposta.is_streamed:
+            resposta.call_on_close(registrar)
+        else:
+            registrar()
+        return resposta
+    
+    def exportar(self):
+        """
+        Gera o texto de todas as métricas no formato de exposição do Prometheus
+        
+        Returns:
+            str: Métricas em texto
+        """
+        from app.models.database import estado_do_pool
+        from app.cache import cache
+        
+        linhas = []
+        for metrica in (self.requisicoes, self.duracao, self.consultas, self.tempo_sql):
+            linhas.extend(metrica.exportar())
+        
+        # Pool de conexões (pools sem esses contadores, como o de SQLite em memória, são omitidos)
+        pool = estado_do_pool()
+        for nome, chave, descricao in (('checkedout', 'em_uso', 'Conexoes em uso'),
+                                       ('checkedin', 'livres', 'Conexoes livres no pool'),
+                                       ('overflow', 'overflow', 'Conexoes alem do tamanho do pool'),
+                                       ('size', 'tamanho', 'Tamanho configurado do pool'),
+                                       ('capacidade', 'capacidade', 'Tamanho do pool mais o overflow maximo'),
+                                       ('utilizacao', 'utilizacao', 'Conexoes em uso sobre a capacidade')):
+            if pool.get(chave) is not None:
+                linhas.extend(_medida(f'{PREFIXO}_pool_{nome}', 'gauge', descricao, pool[chave]))
+        linhas.extend(self.pool_esgotado.exportar())
+        
+        # Cache de leitura (app/cache.py)
+        estatisticas = cache.estatisticas()
+        linhas.extend(_medida(f'{PREFIXO}_cache_acertos_total', 'counter', 'Acertos do cache de leitura',
+                              estatisticas['acertos']))
+        linhas.extend(_medida(f'{PREFIXO}_cache_falhas_total', 'counter', 'Falhas do cache de leitura',
+                              estatisticas['falhas']))
+        linhas.extend(_medida(f'{PREFIXO}_cache_remocoes_total', 'counter', 'Entradas removidas pelo LRU',
+                              estatisticas['remocoes']))
+        linhas.extend(_medida(f'{PREFIXO}_cache_entradas', 'gauge', 'Entradas no cache de leitura',
+                              estatisticas['tamanho']))
+        linhas.extend(_medida(f'{PREFIXO}_cache_taxa_acerto', 'gauge', 'Taxa de acerto do cache de leitura',
+                              estatisticas['taxa_acerto']))
+        return '\n'.join(linhas) + '\n'
+    
+    def _rota_metricas(self):
+        """Endpoint com as métricas no formato do Prometheus"""
+        return Response(self.exportar(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+def _antes_do_comando(conexao, cursor, comando, parametros, contexto, executemany):
+    # O início fica no contexto de execução: se o comando falhar, nada sobra pendurado na conexão
+    if contexto is not None:
+        contexto.metricas_inicio = time.perf_counter()
+
+def _depois_do_comando(conexao, cursor, comando, parametros, contexto, executemany):
+    inicio = getattr(contexto, 'metricas_inicio', None)
+    if inicio is not None and has_request_context() and 'metricas' in g:
+        g.metricas['comandos'] += 1
+        g.metricas['tempo_sql'] += time.perf_counter() - inicio
+
+# Instância única usada pela aplicação
+metricas = Metricas()
@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Busca textual indexada sobre a descrição das despesas
+
+No MySQL a busca usa um índice FULLTEXT em `despesas.descricao` (modo
+booleano, com a collation padrão utf8mb4 *_ai_ci, que ignora acentos e
+maiúsculas). No SQLite usa uma tabela FTS5 de conteúdo externo
+(`despesas_busca`) com o tokenizador unicode61 sem diacríticos, mantida
+por triggers em toda inserção, alteração e exclusão. Nos demais bancos
+cai para LIKE, sem índice.
+
+Cada palavra buscada é um prefixo ("ub" encontra "Uber") e todas precisam
+aparecer na descrição.
+
+O cálculo da relevância (bm25 no FTS5) custa por linha encontrada, e não
+por linha retornada. Por isso só buscas com até LIMITE_RELEVANCIA
+resultados são ordenadas por relevância; as mais amplas (ex.: "uber" em um
+milhão de despesas) saem das cadastradas mais recentemente para as mais
+antigas, ordem que o próprio índice entrega sem ordenar nada.
+"""
+
+import base64
+import binascii
+import re
+import sqlalchemy as sa
+from sqlalchemy import text
+from sqlalchemy.dialects import mysql
+from app.models.database import db, Despesa as DespesaModel
+
+# Nome do índice FULLTEXT (MySQL) e da tabela FTS5 (SQLite)
+INDICE_MYSQL = 'ft_despesas_descricao'
+TABELA_FTS = 'despesas_busca'
+
+# Quantidade máxima de palavras consideradas em uma busca
+MAXIMO_TERMOS = 8
+
+# Tamanho mínimo de uma palavra buscada: prefixos de uma letra não têm índice
+# de prefixo no FTS5 e casariam com quase todas as despesas
+MINIMO_LETRAS = 2
+
+# Acima desta quantidade de resultados a busca não é ordenada por relevância
+LIMITE_RELEVANCIA = 2000
+
+# Tabela FTS5 com índices de prefixo de 2 e 3 letras, para que prefixos curtos
+# não precisem percorrer todos os termos do índice
+DDL_SQLITE = [
+    f"""CREATE VIRTUAL TABLE IF NOT EXISTS {TABELA_FTS} USING fts5(
+        descricao, content='despesas', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+    )""",
+    f"""CREATE TRIGGER IF NOT EXISTS despesas_busca_ai AFTER INSERT ON despesas BEGIN
+        INSERT INTO {TABELA_FTS} (rowid, descricao) VALUES (new.id, new.descricao);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS despesas_busca_ad AFTER DELETE ON despesas BEGIN
+        INSERT INTO {TABELA_FTS} ({TABELA_FTS}, rowid, descricao) VALUES ('delete', old.id, old.descricao);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS despesas_busca_au AFTER UPDATE OF descricao ON despesas BEGIN
+        INSERT INTO {TABELA_FTS} ({TABELA_FTS}, rowid, descricao) VALUES ('delete', old.id, old.descricao);
+        INSERT INTO {TABELA_FTS} (rowid, descricao) VALUES (new.id, new.descricao);
+    END"""
+]
+
+def termos_da_busca(texto):
+    """
+    Separa o texto buscado em palavras, descartando pontuação, operadores e
+    palavras com menos de MINIMO_LETRAS letras
+    
+    Args:
+        texto (str): Texto informado pelo usuário
+    
+    Returns:
+        list: Palavras em minúsculas (no máximo MAXIMO_TERMOS)
+    
+    Raises:
+        ValueError: Se o texto não tiver nenhuma palavra com o tamanho mínimo
+    """
+    termos = [termo for termo in re.findall(r'[^\W_]+', (texto or '').lower())
+              if len(termo) >= MINIMO_LETRAS][:MAXIMO_TERMOS]
+    if not termos:
+        raise ValueError(f"Informe em 'q' ao menos uma palavra com {MINIMO_LETRAS} letras ou mais")
+    return termos
+
+def criar_indice_busca():
+    """
+    Cria o índice de busca do banco atual, se ainda não existir
+    
+    No SQLite a tabela FTS5 é preenchida com as despesas já existentes.
+    """
+    dialeto = db.engine.dialect.name
+    
+    if dialeto == 'sqlite':
+        existia = sa.inspect(db.engine).has_table(TABELA_FTS)
+        with db.engine.begin() as conexao:
+            for comando in DDL_SQLITE:
+                conexao.execute(text(comando))
+            if not existia:
+                conexao.execute(text(f"INSERT INTO {TABELA_FTS} ({TABELA_FTS}) VALUES ('rebuild')"))
+    elif dialeto in ('mysql', 'mariadb'):
+        indices = {indice['name'] for indice in sa.inspect(db.engine).get_indexes('despesas')}
+        if INDICE_MYSQL not in indices:
+            with db.engine.begin() as conexao:
+                conexao.execute(text(f"ALTER TABLE despesas ADD FULLTEXT INDEX {INDICE_MYSQL} (descricao)"))
+
+def _expressao(termos, dialeto):
+    if dialeto == 'sqlite':
+        # Cada termo entre aspas (sem operadores do FTS5) e com * para prefixo
+        return ' '.join(f'"{termo}"*' for termo in termos)
+    # Modo booleano do MySQL: + exige o termo e * faz a busca por prefixo
+    return ' '.join(f'+{termo}*' for termo in termos)
+
+def contar_resultados(termos, dialeto):
+    """
+    Conta as despesas que contêm os termos, só no índice textual (sem os demais filtros)
+    
+    Args:
+        termos (list): Palavras retornadas por `termos_da_busca`
+        dialeto (str): Nome do dialeto do banco
+    
+    Returns:
+        int: Quantidade de despesas encontradas, ou None sem índice textual
+    """
+    if dialeto == 'sqlite':
+        comando = f"SELECT count(*) FROM {TABELA_FTS} WHERE {TABELA_FTS} MATCH :expressao"
+    elif dialeto in ('mysql', 'mariadb'):
+        comando = "SELECT count(*) FROM despesas WHERE MATCH (descricao) AGAINST (:expressao IN BOOLEAN MODE)"
+    else:
+        return None
+    return db.session.execute(text(comando), {'expressao': _expressao(termos, dialeto)}).scalar()
+
+def aplicar_busca(query, termos, dialeto, por_relevancia=True):
+    """
+    Restringe a query sobre despesas às que contêm os termos e a ordena
+    
+    Args:
+        query: Query sobre despesas
+        termos (list): Palavras retornadas por `termos_da_busca`
+        dialeto (str): Nome do dialeto do banco
+        por_relevancia (bool): Ordena pela relevância (mais relevante primeiro);
+            caso contrário, da despesa cadastrada mais recentemente para a mais antiga
+    
+    Returns:
+        Query filtrada e ordenada (id desempata)
+    """
+    expressao = _expressao(termos, dialeto)
+    
+    if dialeto == 'sqlite':
+        fts = sa.table(TABELA_FTS, sa.column('rowid'), sa.column('rank'))
+        query = query.join(fts, fts.c.rowid == DespesaModel.id)
+        query = query.filter(sa.literal_column(TABELA_FTS).op('MATCH')(expressao))
+        if por_relevancia:
+            return query.order_by(fts.c.rank, DespesaModel.id.desc())
+        # Ordenar pelo rowid da tabela FTS5 deixa a ordem a cargo do índice
+        return query.order_by(fts.c.rowid.desc())
+    
+    if dialeto in ('mysql', 'mariadb'):
+        relevancia = mysql.match(DespesaModel.descricao, against=expressao).in_boolean_mode()
+        query = query.filter(relevancia > 0)
+        if por_relevancia:
+            return query.order_by(relevancia.desc(), DespesaModel.id.desc())
+        return query.order_by(DespesaModel.id.desc())
+    
+    # Sem índice textual: substring sem distinção de maiúsculas
+    for termo in termos:
+        query = query.filter(DespesaModel.descricao.ilike(f'%{termo}%'))
+    return query.order_by(DespesaModel.data.desc(), DespesaModel.id.desc())
+
+def codificar_cursor_busca(deslocamento):
+    """
+    Gera o cursor opaco da próxima página de uma busca (posição no ranking)
+    """
+    return base64.urlsafe_b64encode(f"b|{deslocamento}".encode('ascii')).decode('ascii').rstrip('=')
+
+def decodificar_cursor_busca(cursor):
+    """
+    Extrai a posição no ranking de um cursor gerado por `codificar_cursor_busca`
+    
+    Raises:
+        ValueError: Se o cursor estiver malformado
+    """
+    try:
+        preenchimento = '=' * (-len(cursor) % 4)
+        prefixo, deslocamento = base64.urlsafe_b64decode(cursor + preenchimento).decode('ascii').split('|')
+        if prefixo != 'b' or int(deslocamento) < 0:
+            raise ValueError
+        return int(deslocamento)
+    except (ValueError, UnicodeDecodeError, binascii.Error):
+        raise ValueError("Cursor inválido")
@@ -6,6 +6,7 @@ Modelo para manipulação de categorias no banco de dados usando SQLAlchemy
 """
 
 from app.models.database import db, Categoria as CategoriaModel
+from app.cache import cache
 
 class Categoria:
     """
@@ -13,6 +14,7 @@ class Categoria:
     """
     
     @staticmethod
+    @cache.memorizar('categorias.listar')
     def listar():
         """
         Lista todas as categorias do banco de dados
@@ -24,6 +26,7 @@ class Categoria:
         return [categoria.to_dict() for categoria in categorias]
     
     @staticmethod
+    @cache.memorizar('categorias.obter_por_id')
     def obter_por_id(categoria_id):
         """
         Obtém uma categoria pelo ID
@@ -45,25 +48,13 @@ class Categoria:
         Returns:
             bool: True se as categorias foram criadas, False caso contrário
         """
+        from app.models.migracoes import Migracoes
+        
         try:
-            # Verifica se já existem categorias
+            # Só cria quando a tabela estiver vazia
             if CategoriaModel.query.count() > 0:
                 return False
-            
-            categorias_padrao = [
-                CategoriaModel(nome='Alimentação', cor='#FF5733'),
-                CategoriaModel(nome='Transporte', cor='#33FF57'),
-                CategoriaModel(nome='Moradia', cor='#3357FF'),
-                CategoriaModel(nome='Saúde', cor='#FF33A8'),
-                CategoriaModel(nome='Educação', cor='#33A8FF'),
-                CategoriaModel(nome='Lazer', cor='#A833FF'),
-                CategoriaModel(nome='Vestuário', cor='#FFD700'),
-                CategoriaModel(nome='Outros', cor='#808080')
-            ]
-            
-            db.session.add_all(categorias_padrao)
-            db.session.commit()
-            return True
+            return Migracoes.criar_categorias_padrao() > 0
         except Exception as e:
             db.session.rollback()
             print(f"Erro ao criar categorias padrão: {e}")
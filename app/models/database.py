@@ -5,18 +5,44 @@
 Módulo de configuração e conexão com o banco de dados MySQL usando SQLAlchemy
 """
 
+import importlib.util
 import os
 from flask_sqlalchemy import SQLAlchemy
+from flask_sqlalchemy.session import Session
 from datetime import datetime
 from flask import Flask
+from sqlalchemy.engine import make_url
+from sqlalchemy.pool import QueuePool
 import logging
+from app.models.dinheiro import Centavos, em_reais
+from app.replica import BIND_REPLICA, lendo_da_replica
 
 # Configuração de logs
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+class SessaoRoteada(Session):
+    """
+    Sessão que envia as leituras das rotas `@somente_leitura` para a réplica
+    
+    Escritas (flush do ORM e comandos INSERT/UPDATE/DELETE) vão sempre para o
+    primário, inclusive dentro de uma rota de leitura (ver app/replica.py).
+    """
+    
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if (bind is None and not self._flushing and lendo_da_replica()
+                and not getattr(clause, 'is_dml', False)):
+            return self._db.engines[BIND_REPLICA]
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
 # Inicializa a extensão SQLAlchemy
-db = SQLAlchemy()
+db = SQLAlchemy(session_options={'class_': SessaoRoteada})
+
+# Drivers MySQL aceitos em DB_DRIVER: (dialeto+driver do SQLAlchemy, módulo Python)
+DRIVERS_MYSQL = {
+    'mysqldb': ('mysql+mysqldb', 'MySQLdb'),  # mysqlclient, extensão em C
+    'mysqlconnector': ('mysql+mysqlconnector', 'mysql.connector')
+}
 
 # Definição dos modelos SQLAlchemy
 class Categoria(db.Model):
@@ -41,74 +67,197 @@ class Despesa(db.Model):
     
     id = db.Column(db.Integer, primary_key=True, autoincrement=True)
     descricao = db.Column(db.String(255), nullable=False)
-    valor = db.Column(db.Float, nullable=False)
+    # Valor em centavos (negativo para despesas); ver app/models/dinheiro.py
+    valor_centavos = db.Column(Centavos, nullable=False)
     data = db.Column(db.Date, nullable=False)
     categoria_id = db.Column(db.Integer, db.ForeignKey('categorias.id'))
+    # Versão da última escrita na linha (ver app/models/mudancas.py)
+    versao = db.Column(db.BigInteger, nullable=False, default=0, server_default='0')
+    
+    # Índices para filtros de período, agregações por categoria e mudanças por versão
+    __table_args__ = (
+        db.Index('idx_despesas_data', 'data'),
+        db.Index('idx_despesas_categoria_data', 'categoria_id', 'data'),
+        db.Index('idx_despesas_versao', 'versao'),
+    )
     
     def to_dict(self):
         return {
             'id': self.id,
             'descricao': self.descricao,
-            'valor': self.valor,
+            'valor': em_reais(self.valor_centavos),
+            'valor_centavos': self.valor_centavos,
             'data': self.data.strftime('%Y-%m-%d'),
             'categoria_id': self.categoria_id,
             'categoria_nome': self.categoria.nome if self.categoria else None,
             'categoria_cor': self.categoria.cor if self.categoria else None
         }
 
+class ResumoDiario(db.Model):
+    """
+    Total e quantidade de despesas por dia e categoria, mantidos
+    incrementalmente pelas escritas em `despesas` (ver app/models/resumo.py)
+    """
+    __tablename__ = 'despesas_resumo_diario'
+    
+    data = db.Column(db.Date, primary_key=True)
+    # 0 representa despesas sem categoria (colunas de chave primária não aceitam NULL)
+    categoria_id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    total_centavos = db.Column(Centavos, nullable=False, default=0)
+    contagem = db.Column(db.Integer, nullable=False, default=0)
+
+class VersaoDespesas(db.Model):
+    """
+    Contador global de versões das escritas em `despesas` (linha única, id 1)
+    """
+    __tablename__ = 'despesas_versao'
+    
+    id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    versao = db.Column(db.BigInteger, nullable=False, default=0)
+    # Menor versão a partir da qual as mudanças estão completas: exclusões
+    # anteriores a ela foram descartadas, e clientes mais antigos recarregam
+    minima = db.Column(db.BigInteger, nullable=False, default=0)
+
+class DespesaExcluida(db.Model):
+    """
+    Registro (tombstone) de uma despesa excluída, com a versão da exclusão
+    """
+    __tablename__ = 'despesas_excluidas'
+    
+    id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    # Sem chave estrangeira: a despesa não existe mais
+    despesa_id = db.Column(db.Integer, nullable=False)
+    versao = db.Column(db.BigInteger, nullable=False)
+    
+    __table_args__ = (
+        db.Index('idx_despesas_excluidas_versao', 'versao'),
+    )
+
+class SchemaVersao(db.Model):
+    """
+    Migrações de schema já aplicadas ao banco (ver app/models/migracoes.py)
+    """
+    __tablename__ = 'schema_versao'
+    
+    versao = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    descricao = db.Column(db.String(255), nullable=False)
+    aplicada_em = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+def driver_mysql():
+    """
+    Escolhe o driver MySQL conforme DB_DRIVER
+    
+    Com `auto` (padrão) usa o mysqlclient (MySQLdb, em C) se estiver
+    instalado e, senão, o mysql-connector-python.
+    
+    Returns:
+        str: Dialeto+driver para a URI do SQLAlchemy (ex.: mysql+mysqldb)
+    
+    Raises:
+        ValueError: Se DB_DRIVER tiver um valor desconhecido
+    """
+    escolhido = os.getenv('DB_DRIVER', 'auto')
+    if escolhido == 'auto':
+        escolhido = 'mysqldb' if importlib.util.find_spec('MySQLdb') else 'mysqlconnector'
+    if escolhido not in DRIVERS_MYSQL:
+        raise ValueError(f"DB_DRIVER deve ser auto, {' ou '.join(DRIVERS_MYSQL)}")
+    return DRIVERS_MYSQL[escolhido][0]
+
+def opcoes_do_engine(uri):
+    """
+    Opções do engine (pool de conexões) a partir das variáveis de ambiente
+    
+    O pool é por processo: com o gunicorn, o banco recebe até
+    workers x (DB_POOL_SIZE + DB_MAX_OVERFLOW) conexões.
+    
+    Args:
+        uri (str): URI do banco
+    
+    Returns:
+        dict: Valor de SQLALCHEMY_ENGINE_OPTIONS
+    """
+    opcoes = {
+        # Testa a conexão antes de entregá-la, descartando as fechadas pelo servidor
+        'pool_pre_ping': os.getenv('DB_POOL_PRE_PING', '1') == '1',
+        # Renova conexões mais antigas que isto (segundos), antes do wait_timeout do MySQL
+        'pool_recycle': int(os.getenv('DB_POOL_RECYCLE', '1800'))
+    }
+    
+    # SQLite em memória usa um pool de uma conexão por thread, sem dimensionamento
+    url = make_url(uri)
+    if url.get_backend_name() == 'sqlite' and url.database in (None, '', ':memory:'):
+        return opcoes
+    
+    opcoes.update({
+        'pool_size': int(os.getenv('DB_POOL_SIZE', '5')),
+        'max_overflow': int(os.getenv('DB_MAX_OVERFLOW', '10')),
+        'pool_timeout': int(os.getenv('DB_POOL_TIMEOUT', '30'))
+    })
+    return opcoes
+
+def estado_do_pool(engine=None):
+    """
+    Uso atual do pool de conexões do engine
+    
+    Args:
+        engine (Engine, optional): Engine a inspecionar (padrão: o do primário)
+    
+    Returns:
+        dict: Tamanho, conexões em uso e livres, overflow, capacidade
+            (tamanho + overflow máximo) e utilização (em uso / capacidade);
+            só a classe do pool quando ele não tem esses contadores
+    """
+    pool = (engine or db.engine).pool
+    if not isinstance(pool, QueuePool):
+        return {'classe': type(pool).__name__}
+    
+    tamanho = pool.size()
+    em_uso = pool.checkedout()
+    # O limite de overflow não tem acessor público; -1 significa sem limite
+    max_overflow = pool._max_overflow
+    capacidade = tamanho + max_overflow if max_overflow >= 0 else None
+    return {
+        'classe': type(pool).__name__,
+        'tamanho': tamanho,
+        'em_uso': em_uso,
+        'livres': pool.checkedin(),
+        # overflow() fica negativo enquanto o pool não está cheio
+        'overflow': max(0, pool.overflow()),
+        'max_overflow': max_overflow,
+        'capacidade': capacidade,
+        'utilizacao': round(em_uso / capacidade, 4) if capacidade else None,
+        'timeout': pool.timeout()
+    }
+
 def init_db(app):
     """
-    Inicializa o banco de dados MySQL usando SQLAlchemy
-    """
-    try:
-        # Configuração do banco de dados a partir de variáveis de ambiente
-        # Quando não fornecidas, usa valores padrão para desenvolvimento local
-        db_user = os.getenv('DB_USER', 'root')
-        db_password = os.getenv('DB_PASSWORD', 'root')
-        db_host = os.getenv('DB_HOST', 'localhost')
-        db_port = os.getenv('DB_PORT', '3306')
-        db_name = os.getenv('DB_NAME', 'primosfincntrl')
-        
-        # Configura a URI do MySQL
-        app.config['SQLALCHEMY_DATABASE_URI'] = f"mysql+mysqlconnector://{db_user}:{db_password}@{db_host}:{db_port}/{db_name}"
-        app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
-        
-        # Inicializa a aplicação com SQLAlchemy
-        db.init_app(app)
-        
-        # Cria as tabelas e adiciona categorias padrão
-        with app.app_context():
-            db.create_all()
-            logger.info("Banco de dados MySQL inicializado com sucesso")
-            criar_categorias_padrao()
-            
-    except Exception as e:
-        logger.error(f"Erro ao inicializar o banco de dados: {e}")
-        raise
-
-def criar_categorias_padrao():
-    """
-    Insere categorias padrão se a tabela estiver vazia
-    """
-    try:
-        # Verifica se já existem categorias
-        if Categoria.query.count() == 0:
-            categorias_padrao = [
-                Categoria(nome='Alimentação', cor='#FF5733'),
-                Categoria(nome='Transporte', cor='#33FF57'),
-                Categoria(nome='Moradia', cor='#3357FF'),
-                Categoria(nome='Saúde', cor='#FF33A8'),
-                Categoria(nome='Educação', cor='#33A8FF'),
-                Categoria(nome='Lazer', cor='#A833FF'),
-                Categoria(nome='Vestuário', cor='#FFD700'),
-                Categoria(nome='Outros', cor='#808080')
-            ]
-            
-            # Adiciona todas as categorias
-            db.session.add_all(categorias_padrao)
-            db.session.commit()
-            logger.info("Categorias padrão criadas com sucesso")
-    except Exception as e:
-        db.session.rollback()
-        logger.error(f"Erro ao criar categorias padrão: {e}")
-        raise
+    Configura o SQLAlchemy na aplicação, sem acessar o banco
+    
+    A criação de tabelas, índices e categorias padrão fica a cargo de
+    `Migracoes.aplicar()` (app/models/migracoes.py), executada uma vez por
+    deploy pelo `init_db.py`, e não a cada processo que sobe a aplicação.
+    """
+    # Configuração do banco de dados a partir de variáveis de ambiente
+    # Quando não fornecidas, usa valores padrão para desenvolvimento local
+    db_user = os.getenv('DB_USER', 'root')
+    db_password = os.getenv('DB_PASSWORD', 'root')
+    db_host = os.getenv('DB_HOST', 'localhost')
+    db_port = os.getenv('DB_PORT', '3306')
+    db_name = os.getenv('DB_NAME', 'primosfincntrl')
+    
+    # Configura a URI do MySQL (DATABASE_URL, se definida, tem precedência;
+    # útil para apontar para um banco local, ex.: sqlite:///local.db)
+    uri = os.getenv('DATABASE_URL')
+    if not uri:
+        uri = f"{driver_mysql()}://{db_user}:{db_password}@{db_host}:{db_port}/{db_name}?charset=utf8mb4"
+    app.config['SQLALCHEMY_DATABASE_URI'] = uri
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = opcoes_do_engine(uri)
+    
+    # Réplica de leitura opcional, com as mesmas opções de pool
+    uri_replica = os.getenv('DB_REPLICA_URL')
+    if uri_replica:
+        app.config['SQLALCHEMY_BINDS'] = {BIND_REPLICA: {'url': uri_replica, **opcoes_do_engine(uri_replica)}}
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    
+    # Inicializa a aplicação com SQLAlchemy (a conexão só é aberta na primeira consulta)
+    db.init_app(app)
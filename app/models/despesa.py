@@ -5,62 +5,257 @@
 Modelo para manipulação de despesas no banco de dados usando SQLAlchemy
 """
 
-from datetime import datetime, timedelta
+import base64
+import binascii
+import csv
+import functools
+import io
+import math
+from datetime import datetime
+from flask import current_app
 from app.models.database import db, Despesa as DespesaModel, Categoria as CategoriaModel
+from app.models.resumo import Resumo
+from app.models.mudancas import Mudancas
+from app.models.categoria import Categoria
+from app.models.dinheiro import para_centavos, em_reais, formatar_centavos
+from app.models.busca import (termos_da_busca, contar_resultados, aplicar_busca, LIMITE_RELEVANCIA,
+                              codificar_cursor_busca, decodificar_cursor_busca)
+from app.cache import cache
+from app.replica import no_primario
 import sqlalchemy as sa
 
+# Campos exigidos para criar ou atualizar uma despesa
+CAMPOS_OBRIGATORIOS = ['descricao', 'valor', 'data', 'categoria_id']
+
+# Quantidade de linhas por comando INSERT nas inserções em lote
+# (e por bloco lido do banco na exportação)
+TAMANHO_LOTE = 1000
+
+# Colunas do CSV de exportação
+COLUNAS_EXPORTACAO = ['id', 'data', 'descricao', 'valor', 'categoria_id', 'categoria_nome']
+
+@functools.lru_cache(maxsize=4096)
+def _formatar_data(data, formato):
+    # As páginas repetem poucas datas distintas; strftime custa mais que o dicionário da linha
+    return data.strftime(formato)
+
 class Despesa:
     """
     Classe para manipulação de despesas no banco de dados usando SQLAlchemy
     """
     
     @staticmethod
-    def listar(periodo=None):
+    def _consulta_projetada():
         """
-        Lista todas as despesas do banco de dados
+        Query das colunas usadas pela API, já com a categoria em LEFT JOIN
+        
+        Retorna tuplas leves em vez de objetos ORM, evitando a hidratação
+        de cada linha e o lazy load de `categoria` (uma consulta por despesa).
+        """
+        return db.session.query(
+            DespesaModel.id,
+            DespesaModel.descricao,
+            DespesaModel.valor_centavos,
+            DespesaModel.data,
+            DespesaModel.categoria_id,
+            CategoriaModel.nome.label('categoria_nome'),
+            CategoriaModel.cor.label('categoria_cor')
+        ).outerjoin(CategoriaModel, CategoriaModel.id == DespesaModel.categoria_id)
+    
+    @staticmethod
+    def _filtrar(query, filtros):
+        """
+        Aplica à query sobre despesas os filtros compartilhados (ver app/models/filtros.py)
+        """
+        if filtros is None:
+            return query
+        return filtros.aplicar(query, DespesaModel.data, DespesaModel.categoria_id, DespesaModel.valor_centavos)
+    
+    @staticmethod
+    def listar(filtros, limite, cursor=None):
+        """
+        Lista uma página de despesas, da mais recente para a mais antiga
+        
+        A listagem é paginada por cursor (keyset) sobre a ordenação
+        (data DESC, id DESC): cada página parte da última linha da anterior,
+        então qualquer página custa o mesmo que a primeira.
         
         Args:
-            periodo (str, optional): Filtro de período (diario, semanal, mensal, anual)
+            filtros (Filtros): Período, datas, categorias e faixa de valor
+            limite (int): Quantidade máxima de despesas por página
+            cursor (str, optional): Cursor opaco retornado pela página anterior
         
         Returns:
-            list: Lista de despesas
-        """
-        # Query base
-        query = DespesaModel.query
-        
-        # Adiciona filtro de período se necessário
-        hoje = datetime.now().date()
-        
-        if periodo:
-            if periodo == 'diario':
-                # Despesas do dia atual
-                query = query.filter(sa.func.date(DespesaModel.data) == hoje)
-            elif periodo == 'semanal':
-                # Despesas da última semana (7 dias)
-                data_inicio = hoje - timedelta(days=7)
-                query = query.filter(DespesaModel.data >= data_inicio)
-            elif periodo == 'mensal':
-                # Despesas do mês atual
-                inicio_mes = datetime(hoje.year, hoje.month, 1).date()
-                query = query.filter(DespesaModel.data >= inicio_mes)
-            elif periodo == 'anual':
-                # Despesas do ano atual
-                inicio_ano = datetime(hoje.year, 1, 1).date()
-                query = query.filter(DespesaModel.data >= inicio_ano)
-        
-        # Ordena por data mais recente
-        despesas = query.order_by(DespesaModel.data.desc()).all()
-        
-        # Converte em dicionários e formata as datas para formato brasileiro
-        result = []
-        for despesa in despesas:
-            despesa_dict = despesa.to_dict()
-            # Formata a data para o formato brasileiro
-            data = datetime.strptime(despesa_dict['data'], '%Y-%m-%d')
-            despesa_dict['data'] = data.strftime('%d/%m/%Y')
-            result.append(despesa_dict)
-        
-        return result
+            tuple: (lista de despesas, próximo cursor ou None)
+        
+        Raises:
+            ValueError: Se o cursor for inválido
+        """
+        # Query base (uma única consulta com a categoria em JOIN)
+        query = Despesa._consulta_projetada()
+        query = Despesa._filtrar(query, filtros)
+        
+        # Continua a partir da última despesa da página anterior
+        if cursor:
+            data_cursor, id_cursor = Despesa._decodificar_cursor(cursor)
+            query = query.filter(sa.or_(
+                DespesaModel.data < data_cursor,
+                sa.and_(DespesaModel.data == data_cursor, DespesaModel.id < id_cursor)
+            ))
+        
+        # Ordena por data mais recente (id desempata despesas do mesmo dia)
+        query = query.order_by(DespesaModel.data.desc(), DespesaModel.id.desc())
+        
+        # Busca uma linha a mais para saber se existe próxima página
+        despesas = query.limit(limite + 1).all()
+        proximo_cursor = None
+        if len(despesas) > limite:
+            despesas = despesas[:limite]
+            ultima = despesas[-1]
+            proximo_cursor = Despesa._codificar_cursor(ultima.data, ultima.id)
+        
+        return Despesa._formatar_linhas(despesas), proximo_cursor
+    
+    @staticmethod
+    def buscar(texto, filtros=None, limite=50, cursor=None):
+        """
+        Busca despesas pela descrição no índice textual, da mais relevante para a menos
+        
+        Cada palavra é buscada como prefixo, sem diferenciar acentos e
+        maiúsculas (ver app/models/busca.py). Buscas com mais de
+        LIMITE_RELEVANCIA resultados são ordenadas da despesa cadastrada mais
+        recentemente para a mais antiga. A paginação é pela posição na
+        ordenação, então páginas profundas custam mais que a primeira.
+        
+        Args:
+            texto (str): Texto buscado
+            filtros (Filtros, optional): Mesmos filtros de `listar`
+            limite (int): Quantidade máxima de despesas por página
+            cursor (str, optional): Cursor opaco retornado pela página anterior
+        
+        Returns:
+            tuple: (lista de despesas, próximo cursor ou None, ordenação: 'relevancia' ou 'recentes')
+        
+        Raises:
+            ValueError: Se o texto não tiver palavras ou o cursor for inválido
+        """
+        termos = termos_da_busca(texto)
+        deslocamento = decodificar_cursor_busca(cursor) if cursor else 0
+        dialeto = db.session.get_bind().dialect.name
+        
+        # A contagem no índice é barata e limita o custo de calcular a relevância
+        encontradas = contar_resultados(termos, dialeto)
+        por_relevancia = encontradas is not None and encontradas <= LIMITE_RELEVANCIA
+        
+        query = Despesa._filtrar(Despesa._consulta_projetada(), filtros)
+        query = aplicar_busca(query, termos, dialeto, por_relevancia)
+        
+        # Busca uma linha a mais para saber se existe próxima página
+        despesas = query.offset(deslocamento).limit(limite + 1).all()
+        proximo_cursor = None
+        if len(despesas) > limite:
+            despesas = despesas[:limite]
+            proximo_cursor = codificar_cursor_busca(deslocamento + limite)
+        
+        ordem = 'relevancia' if por_relevancia else 'recentes'
+        return Despesa._formatar_linhas(despesas), proximo_cursor, ordem
+    
+    @staticmethod
+    def exportar(formato, filtros=None):
+        """
+        Gera a exportação das despesas em partes, para envio em streaming
+        
+        As linhas são lidas do banco com cursor no servidor (stream_results)
+        em blocos de `TAMANHO_LOTE`, então a memória usada não depende da
+        quantidade de despesas exportadas.
+        
+        Args:
+            formato (str): csv ou ndjson
+            filtros (Filtros, optional): Mesmos filtros de `listar`
+        
+        Yields:
+            str: Trechos do arquivo exportado
+        """
+        query = Despesa._filtrar(Despesa._consulta_projetada(), filtros)
+        query = query.order_by(DespesaModel.data.desc(), DespesaModel.id.desc())
+        linhas = db.session.execute(
+            query.statement, execution_options={'stream_results': True, 'yield_per': TAMANHO_LOTE}
+        )
+        
+        if formato == 'ndjson':
+            codificar = current_app.json.dumps
+            for bloco in linhas.partitions():
+                despesas = Despesa._formatar_linhas(bloco, '%Y-%m-%d')
+                yield '\n'.join(codificar(despesa) for despesa in despesas) + '\n'
+            return
+        
+        buffer = io.StringIO()
+        escritor = csv.writer(buffer)
+        escritor.writerow(COLUNAS_EXPORTACAO)
+        for numero, (despesa_id, descricao, valor_centavos, data, categoria_id, categoria_nome, _) in enumerate(linhas, start=1):
+            escritor.writerow([
+                despesa_id, data.isoformat(), descricao, formatar_centavos(valor_centavos),
+                categoria_id, categoria_nome
+            ])
+            if numero % TAMANHO_LOTE == 0:
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+        yield buffer.getvalue()
+    
+    @staticmethod
+    def _formatar_linhas(linhas, formato_data='%d/%m/%Y'):
+        """
+        Converte linhas de `_consulta_projetada` em dicionários para a API
+        
+        As linhas são desempacotadas como tuplas (o acesso por nome à linha
+        do SQLAlchemy custa mais que montar o dicionário inteiro) e cada data
+        é formatada uma vez só (ver `_formatar_data`).
+        
+        Args:
+            linhas (list): Tuplas com as colunas projetadas, na ordem de `_consulta_projetada`
+            formato_data (str): Formato da data (brasileiro por padrão)
+        
+        Returns:
+            list: Dados das despesas
+        """
+        return [
+            {
+                'id': despesa_id,
+                'descricao': descricao,
+                'valor': em_reais(valor_centavos),
+                'valor_centavos': valor_centavos,
+                'data': _formatar_data(data, formato_data),
+                'categoria_id': categoria_id,
+                'categoria_nome': categoria_nome,
+                'categoria_cor': categoria_cor
+            }
+            for despesa_id, descricao, valor_centavos, data, categoria_id, categoria_nome, categoria_cor in linhas
+        ]
+    
+    @staticmethod
+    def _codificar_cursor(data, despesa_id):
+        """
+        Gera o cursor opaco que aponta para a última despesa de uma página
+        """
+        bruto = f"{data.isoformat()}|{despesa_id}".encode('ascii')
+        return base64.urlsafe_b64encode(bruto).decode('ascii').rstrip('=')
+    
+    @staticmethod
+    def _decodificar_cursor(cursor):
+        """
+        Extrai a data e o ID de um cursor gerado por `_codificar_cursor`
+        
+        Raises:
+            ValueError: Se o cursor estiver malformado
+        """
+        try:
+            preenchimento = '=' * (-len(cursor) % 4)
+            bruto = base64.urlsafe_b64decode(cursor + preenchimento).decode('ascii')
+            data_str, id_str = bruto.split('|')
+            return datetime.strptime(data_str, '%Y-%m-%d').date(), int(id_str)
+        except (ValueError, UnicodeDecodeError, binascii.Error):
+            raise ValueError("Cursor inválido")
     
     @staticmethod
     def obter_por_id(despesa_id):
@@ -73,10 +268,11 @@ class Despesa:
         Returns:
             dict: Dados da despesa ou None se não encontrada
         """
-        despesa = DespesaModel.query.get(despesa_id)
-        return despesa.to_dict() if despesa else None
+        linha = Despesa._consulta_projetada().filter(DespesaModel.id == despesa_id).first()
+        return Despesa._formatar_linhas([linha], '%Y-%m-%d')[0] if linha else None
     
     @staticmethod
+    @no_primario
     def criar(dados):
         """
         Cria uma nova despesa no banco de dados
@@ -88,25 +284,26 @@ class Despesa:
             int: ID da despesa criada
         """
         try:
-            # Garante que o valor seja negativo (despesa)
-            valor = float(dados['valor'])
-            if valor > 0:
-                valor = -valor
+            # Garante que o valor seja negativo (despesa), em centavos
+            valor = -abs(para_centavos(dados['valor']))
             
             # Converte a data de string para objeto date
             data_obj = datetime.strptime(dados['data'], '%Y-%m-%d').date()
             
-            # Cria o objeto despesa
+            # Cria o objeto despesa, com a versão desta escrita
             nova_despesa = DespesaModel(
                 descricao=dados['descricao'],
-                valor=valor,
+                valor_centavos=valor,
                 data=data_obj,
-                categoria_id=dados['categoria_id']
+                categoria_id=dados['categoria_id'],
+                versao=Mudancas.nova_versao()
             )
             
-            # Salva no banco de dados
+            # Salva no banco de dados, junto com o resumo diário
             db.session.add(nova_despesa)
+            Resumo.registrar(data_obj, nova_despesa.categoria_id, valor)
             db.session.commit()
+            cache.invalidar()
             
             return nova_despesa.id
         except Exception as e:
@@ -115,6 +312,165 @@ class Despesa:
             raise
     
     @staticmethod
+    def validar_lote(itens):
+        """
+        Valida e normaliza uma lista de despesas antes da inserção em lote
+        
+        Todos os itens são verificados, para que o cliente receba de uma vez
+        os erros de cada item. Os valores são normalizados como em `criar`
+        (sempre negativos) e as datas convertidas para objetos date.
+        
+        Args:
+            itens (list): Lista de dicionários (descricao, valor, data, categoria_id)
+        
+        Returns:
+            tuple: (linhas normalizadas, lista de erros {indice, error})
+        """
+        categorias_validas = {categoria['id'] for categoria in Categoria.listar()}
+        linhas = []
+        erros = []
+        
+        for indice, dados in enumerate(itens):
+            if not isinstance(dados, dict):
+                erros.append({"indice": indice, "error": "Item deve ser um objeto"})
+                continue
+            
+            ausentes = [campo for campo in CAMPOS_OBRIGATORIOS if campo not in dados]
+            if ausentes:
+                erros.append({"indice": indice, "error": f"Campo obrigatório ausente: {ausentes[0]}"})
+                continue
+            
+            try:
+                valor = -abs(para_centavos(dados['valor']))
+            except (TypeError, ValueError):
+                erros.append({"indice": indice, "error": "Valor inválido"})
+                continue
+            
+            try:
+                data_obj = datetime.strptime(dados['data'], '%Y-%m-%d').date()
+            except (TypeError, ValueError):
+                erros.append({"indice": indice, "error": "Data inválida (use AAAA-MM-DD)"})
+                continue
+            
+            categoria_id = dados['categoria_id']
+            if categoria_id is not None:
+                try:
+                    categoria_id = int(categoria_id)
+                except (TypeError, ValueError):
+                    categoria_id = -1
+                if categoria_id not in categorias_validas:
+                    erros.append({"indice": indice, "error": f"Categoria inexistente: {dados['categoria_id']}"})
+                    continue
+            
+            descricao = dados['descricao']
+            if not isinstance(descricao, str) or not descricao.strip():
+                erros.append({"indice": indice, "error": "Descrição inválida"})
+                continue
+            
+            linhas.append({
+                'descricao': descricao,
+                'valor_centavos': valor,
+                'data': data_obj,
+                'categoria_id': categoria_id
+            })
+        
+        return linhas, erros
+    
+    @staticmethod
+    @no_primario
+    def criar_lote(linhas):
+        """
+        Insere várias despesas já validadas em uma única transação
+        
+        Args:
+            linhas (list): Linhas retornadas por `validar_lote`
+        
+        Returns:
+            list: IDs das despesas criadas, na mesma ordem das linhas
+        """
+        try:
+            ids = Despesa._inserir_linhas(linhas)
+            db.session.commit()
+            cache.invalidar()
+            return ids
+        except Exception as e:
+            db.session.rollback()
+            print(f"Erro ao criar despesas em lote: {e}")
+            raise
+    
+    @staticmethod
+    def comandos_de_insercao(quantidade):
+        """
+        Comandos SQL que `_inserir_linhas` executa para gravar as linhas,
+        sem contar a nova versão e o resumo diário
+        
+        Args:
+            quantidade (int): Quantidade de linhas
+        
+        Returns:
+            int: Um INSERT a cada TAMANHO_LOTE linhas, mais a leitura dos IDs no MySQL
+        """
+        insercoes = math.ceil(quantidade / TAMANHO_LOTE)
+        if db.session.get_bind().dialect.name == 'mysql':
+            return insercoes + 1
+        return insercoes
+    
+    @staticmethod
+    def _inserir_linhas(linhas):
+        """
+        Insere linhas normalizadas em lotes (executemany), todas com uma nova
+        versão, e atualiza o resumo diário, sem fazer commit
+        
+        Args:
+            linhas (list): Dicionários com descricao, valor_centavos, data e categoria_id
+        
+        Returns:
+            list: IDs das despesas criadas, na mesma ordem das linhas
+        """
+        tabela = DespesaModel.__table__
+        dialeto = db.session.get_bind().dialect
+        versao = Mudancas.nova_versao()
+        ids = []
+        
+        for inicio in range(0, len(linhas), TAMANHO_LOTE):
+            # Todas as linhas da transação recebem a mesma versão
+            lote = [dict(linha, versao=versao) for linha in linhas[inicio:inicio + TAMANHO_LOTE]]
+            
+            if dialeto.name == 'sqlite':
+                # SQLite: um INSERT com várias linhas em VALUES. A escrita é exclusiva,
+                # os rowids saem consecutivos e lastrowid devolve o último deles
+                # (RETURNING ordenado faria um comando por linha no SQLite)
+                resultado = db.session.execute(sa.insert(tabela).values(lote))
+                ids.extend(range(resultado.lastrowid - len(lote) + 1, resultado.lastrowid + 1))
+            elif dialeto.insert_executemany_returning_sort_by_parameter_order:
+                # MariaDB/PostgreSQL: executemany com RETURNING na ordem dos parâmetros
+                stmt = sa.insert(tabela).returning(tabela.c.id, sort_by_parameter_order=True)
+                ids.extend(db.session.execute(stmt, lote).scalars().all())
+            else:
+                # MySQL: um INSERT com várias linhas em VALUES, sem RETURNING
+                db.session.execute(sa.insert(tabela).values(lote))
+        
+        if not ids and linhas:
+            # MySQL: com innodb_autoinc_lock_mode=2 os IDs de um INSERT podem não
+            # ser consecutivos, então são lidos de volta pela versão, exclusiva da
+            # transação; dentro de cada comando e entre os comandos da transação
+            # os IDs crescem na ordem das linhas
+            ids = db.session.execute(
+                sa.select(tabela.c.id).where(tabela.c.versao == versao).order_by(tabela.c.id)
+            ).scalars().all()
+        
+        # Resumo diário: uma variação por dia/categoria afetados
+        variacoes = {}
+        for linha in linhas:
+            chave = (linha['data'], linha['categoria_id'])
+            total, contagem = variacoes.get(chave, (0, 0))
+            variacoes[chave] = (total + linha['valor_centavos'], contagem + 1)
+        Resumo.registrar_varios(variacoes)
+        
+        return ids
+    
+    @staticmethod
+    @no_primario
     def atualizar(despesa_id, dados):
         """
         Atualiza uma despesa existente
@@ -131,22 +487,32 @@ class Despesa:
             if not despesa:
                 return False
             
-            # Garante que o valor seja negativo (despesa)
-            valor = float(dados['valor'])
-            if valor > 0:
-                valor = -valor
+            # Garante que o valor seja negativo (despesa), em centavos
+            valor = -abs(para_centavos(dados['valor']))
             
             # Converte a data de string para objeto date
             data_obj = datetime.strptime(dados['data'], '%Y-%m-%d').date()
             
+            # A versão vem antes de alterar a instância: o SELECT do contador
+            # faria autoflush e mandaria a despesa em um UPDATE separado
+            versao = Mudancas.nova_versao()
+            
+            # Move a despesa no resumo diário: sai do dia/categoria antigos...
+            Resumo.registrar(despesa.data, despesa.categoria_id, -despesa.valor_centavos, -1)
+            
             # Atualiza os campos
             despesa.descricao = dados['descricao']
-            despesa.valor = valor
+            despesa.valor_centavos = valor
             despesa.data = data_obj
             despesa.categoria_id = dados['categoria_id']
+            despesa.versao = versao
+            
+            # ...e entra nos novos
+            Resumo.registrar(data_obj, despesa.categoria_id, valor)
             
             # Salva as alterações
             db.session.commit()
+            cache.invalidar()
             return True
         except Exception as e:
             db.session.rollback()
@@ -154,6 +520,7 @@ class Despesa:
             return False
     
     @staticmethod
+    @no_primario
     def excluir(despesa_id):
         """
         Exclui uma despesa do banco de dados
@@ -169,9 +536,12 @@ class Despesa:
             if not despesa:
                 return False
             
-            # Remove a despesa
+            # Remove a despesa, a desconta do resumo diário e registra a exclusão
+            Resumo.registrar(despesa.data, despesa.categoria_id, -despesa.valor_centavos, -1)
+            Mudancas.registrar_exclusao(despesa.id)
             db.session.delete(despesa)
             db.session.commit()
+            cache.invalidar()
             return True
         except Exception as e:
             db.session.rollback()
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Valores monetários em centavos inteiros
+
+O banco guarda os valores como BIGINT em centavos (`despesas.valor_centavos`
+e `despesas_resumo_diario.total_centavos`) e o código trabalha com `int`:
+somas e percentuais são exatos, sem o arredondamento de float. A conversão
+para reais acontece só na entrada (texto ou número da API) e na saída
+(JSON e exportação).
+"""
+
+from decimal import Decimal, InvalidOperation, ROUND_HALF_UP
+import sqlalchemy as sa
+
+CENTAVOS_POR_REAL = 100
+
+def para_centavos(valor):
+    """
+    Converte um valor em reais para centavos inteiros, sem passar por float
+    
+    Args:
+        valor (int, float, str ou Decimal): Valor em reais (ex.: 250.75 ou "250.75")
+    
+    Returns:
+        int: Valor em centavos, arredondado para o centavo mais próximo
+    
+    Raises:
+        ValueError: Se o valor não for numérico
+    """
+    if isinstance(valor, bool):
+        raise ValueError(f"Valor inválido: {valor}")
+    try:
+        # str() de um float dá a menor representação decimal (0.1 -> "0.1")
+        decimal = Decimal(str(valor).strip())
+    except (InvalidOperation, ValueError):
+        raise ValueError(f"Valor inválido: {valor}")
+    if not decimal.is_finite():
+        raise ValueError(f"Valor inválido: {valor}")
+    return int((decimal * CENTAVOS_POR_REAL).quantize(Decimal('1'), rounding=ROUND_HALF_UP))
+
+def em_reais(centavos):
+    """
+    Valor em reais como número, para os campos `valor`/`total` da API
+    
+    O float mais próximo de centavos/100 é serializado com no máximo duas
+    casas decimais (25075 -> 250.75).
+    """
+    return centavos / CENTAVOS_POR_REAL
+
+def formatar_centavos(centavos):
+    """
+    Valor em reais como texto decimal exato (ex.: -25075 -> "-250.75")
+    """
+    sinal = '-' if centavos < 0 else ''
+    reais, resto = divmod(abs(centavos), CENTAVOS_POR_REAL)
+    return f"{sinal}{reais}.{resto:02d}"
+
+def percentual(parte, total):
+    """
+    Percentual de `parte` em `total` com duas casas, calculado em inteiros
+    
+    Args:
+        parte (int): Valor em centavos
+        total (int): Total em centavos
+    
+    Returns:
+        float: Percentual arredondado para 0,01 (0 se o total for zero)
+    """
+    if not total:
+        return 0
+    # Centésimos de ponto percentual, com arredondamento para o mais próximo
+    centesimos = (abs(parte) * 10000 * 2 + abs(total)) // (2 * abs(total))
+    return centesimos / 100
+
+class Centavos(sa.types.TypeDecorator):
+    """
+    Coluna BIGINT de centavos, lida sempre como `int`
+    
+    Normaliza o tipo do resultado entre drivers e agregações (SUM no MySQL
+    devolve Decimal) e recusa na escrita qualquer valor que não seja `int`,
+    para que um valor em reais (float) nunca seja gravado como centavos.
+    """
+    impl = sa.BigInteger
+    cache_ok = True
+    
+    def process_bind_param(self, valor, dialeto):
+        if valor is None or (isinstance(valor, int) and not isinstance(valor, bool)):
+            return valor
+        raise TypeError(f"Valores em centavos devem ser int, não {type(valor).__name__}")
+    
+    def process_result_value(self, valor, dialeto):
+        return None if valor is None else int(valor)
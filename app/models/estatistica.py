@@ -3,117 +3,321 @@
 
 """
 Modelo para geração de estatísticas a partir das despesas usando SQLAlchemy
+
+As consultas usam o resumo diário (despesas_resumo_diario), mantido pelas
+escritas em despesas, em vez de agregar a tabela de despesas inteira. Só
+com filtro de valor, que o resumo não guarda, a agregação é feita sobre a
+tabela de despesas (ainda restrita pelos índices de data e categoria).
 """
 
-from app.models.database import db, Despesa as DespesaModel, Categoria as CategoriaModel
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
+from app.models.database import db, ResumoDiario, Despesa as DespesaModel, Categoria as CategoriaModel
+from app.models.filtros import Filtros
+from app.models.dinheiro import em_reais, percentual
+from app.models.periodo import data_atual
+from app.cache import cache
 import sqlalchemy as sa
 
+GRANULARIDADES = ('dia', 'semana', 'mes')
+
+# Quantidade máxima de pontos em uma série (cerca de 10 anos por dia)
+PONTOS_MAXIMOS = 3700
+
+def inicio_do_balde(dia, granularidade):
+    """
+    Primeiro dia do intervalo (dia, semana começando na segunda ou mês) que contém a data
+    """
+    if granularidade == 'semana':
+        return dia - timedelta(days=dia.weekday())
+    if granularidade == 'mes':
+        return dia.replace(day=1)
+    return dia
+
+def proximo_balde(dia, granularidade):
+    """
+    Início do intervalo seguinte ao que começa em `dia`
+    """
+    if granularidade == 'semana':
+        return dia + timedelta(days=7)
+    if granularidade == 'mes':
+        return date(dia.year + dia.month // 12, dia.month % 12 + 1, 1)
+    return dia + timedelta(days=1)
+
+def _expressao_balde(coluna, granularidade, dialeto):
+    """
+    Expressão SQL com o início do intervalo de cada linha, ou None quando o
+    dialeto não tem uma expressão conhecida (o agrupamento é feito por dia)
+    """
+    if granularidade == 'dia':
+        return coluna
+    if dialeto == 'sqlite':
+        # 'weekday 0' avança até o domingo (ou mantém, se já for domingo); -6 dias volta à segunda
+        if granularidade == 'semana':
+            return sa.func.date(coluna, 'weekday 0', '-6 days')
+        return sa.func.date(coluna, 'start of month')
+    if dialeto == 'mysql':
+        # WEEKDAY: segunda = 0
+        if granularidade == 'semana':
+            return sa.func.subdate(coluna, sa.func.weekday(coluna))
+        return sa.func.subdate(coluna, sa.func.dayofmonth(coluna) - 1)
+    if dialeto == 'postgresql':
+        campo = 'week' if granularidade == 'semana' else 'month'
+        return sa.cast(sa.func.date_trunc(campo, coluna), sa.Date)
+    return None
+
+def _como_filtros(filtros):
+    # Aceita também só o nome do período, como na API antiga
+    if isinstance(filtros, Filtros):
+        return filtros
+    return Filtros(periodo=filtros)
+
+def _origem(filtros):
+    """
+    Colunas de onde as estatísticas são agregadas e a função que aplica os filtros
+    
+    Returns:
+        tuple: (data, categoria, soma dos valores em centavos, contagem, filtrar)
+    """
+    if filtros.por_valor():
+        return (
+            DespesaModel.data, DespesaModel.categoria_id,
+            sa.func.sum(DespesaModel.valor_centavos), sa.func.count(DespesaModel.id),
+            lambda query: filtros.aplicar(query, DespesaModel.data, DespesaModel.categoria_id, DespesaModel.valor_centavos)
+        )
+    return (
+        ResumoDiario.data, ResumoDiario.categoria_id,
+        sa.func.sum(ResumoDiario.total_centavos), sa.func.sum(ResumoDiario.contagem),
+        lambda query: filtros.aplicar(query, ResumoDiario.data, ResumoDiario.categoria_id, sem_categoria_nulo=False)
+    )
+
+def _formatar_por_categoria(linhas):
+    """
+    Formata as linhas (id, nome, cor, total_centavos) por categoria com os percentuais
+    
+    Os totais e percentuais são calculados em centavos inteiros; só o campo
+    `total` (em reais, para compatibilidade) é convertido no final.
+    
+    Args:
+        linhas (list): Linhas já ordenadas pelo valor absoluto do total
+    
+    Returns:
+        list: Lista de despesas por categoria
+    """
+    # Totais em módulo (positivos para exibição) e total geral para os percentuais
+    totais = [abs(linha.total_centavos or 0) for linha in linhas]
+    total_geral = sum(totais)
+    
+    return [
+        {
+            'id': linha.id,
+            'nome': linha.nome,
+            'cor': linha.cor,
+            'total': em_reais(centavos),
+            'total_centavos': centavos,
+            'percentual': percentual(centavos, total_geral)
+        }
+        for linha, centavos in zip(linhas, totais)
+    ]
+
 class Estatistica:
     """
     Classe para geração de estatísticas a partir das despesas usando SQLAlchemy
     """
     
     @staticmethod
-    def total_despesas(periodo=None):
+    @cache.memorizar('estatisticas.total', por_dia=True)
+    def total_despesas(filtros=None):
         """
         Calcula o total de despesas para um determinado período
         
         Args:
-            periodo (str, optional): Filtro de período (diario, semanal, mensal, anual)
+            filtros (Filtros ou str, optional): Filtros da API ou só o período
+                (diario, semanal, mensal, anual)
         
         Returns:
-            float: Total de despesas
+            int: Total de despesas em centavos (negativo)
         """
-        # Query base
-        query = db.session.query(sa.func.sum(DespesaModel.valor))
-        
-        # Adiciona filtro de período se necessário
-        hoje = datetime.now().date()
-        
-        if periodo:
-            if periodo == 'diario':
-                # Despesas do dia atual
-                query = query.filter(sa.func.date(DespesaModel.data) == hoje)
-            elif periodo == 'semanal':
-                # Despesas da última semana (7 dias)
-                data_inicio = hoje - timedelta(days=7)
-                query = query.filter(DespesaModel.data >= data_inicio)
-            elif periodo == 'mensal':
-                # Despesas do mês atual
-                inicio_mes = datetime(hoje.year, hoje.month, 1).date()
-                query = query.filter(DespesaModel.data >= inicio_mes)
-            elif periodo == 'anual':
-                # Despesas do ano atual
-                inicio_ano = datetime(hoje.year, 1, 1).date()
-                query = query.filter(DespesaModel.data >= inicio_ano)
-        
-        total = query.scalar()
+        _, _, soma, _, filtrar = _origem(_como_filtros(filtros))
+        total = filtrar(db.session.query(soma)).scalar()
         
         # Se não houver despesas, retorna 0
-        return float(total) if total else 0.0
+        return total or 0
     
     @staticmethod
-    def despesas_por_categoria(periodo=None):
+    @cache.memorizar('estatisticas.por_categoria', por_dia=True)
+    def despesas_por_categoria(filtros=None):
         """
         Calcula o total de despesas agrupadas por categoria
         
         Args:
-            periodo (str, optional): Filtro de período (diario, semanal, mensal, anual)
+            filtros (Filtros ou str, optional): Filtros da API ou só o período
+                (diario, semanal, mensal, anual)
         
         Returns:
             list: Lista de despesas por categoria
         """
+        _, categoria, soma, contagem, filtrar = _origem(_como_filtros(filtros))
+        
         # Query base para selecionar id, nome, cor da categoria e o total de despesas
         query = db.session.query(
             CategoriaModel.id,
             CategoriaModel.nome,
             CategoriaModel.cor,
-            sa.func.sum(DespesaModel.valor).label('total')
-        ).join(DespesaModel, CategoriaModel.id == DespesaModel.categoria_id)
-        
-        # Adiciona filtro de período se necessário
-        hoje = datetime.now().date()
-        
-        if periodo:
-            if periodo == 'diario':
-                # Despesas do dia atual
-                query = query.filter(sa.func.date(DespesaModel.data) == hoje)
-            elif periodo == 'semanal':
-                # Despesas da última semana (7 dias)
-                data_inicio = hoje - timedelta(days=7)
-                query = query.filter(DespesaModel.data >= data_inicio)
-            elif periodo == 'mensal':
-                # Considera o mês atual
-                inicio_mes = datetime(hoje.year, hoje.month, 1).date()
-                query = query.filter(DespesaModel.data >= inicio_mes)
-            elif periodo == 'anual':
-                # Considera o ano atual
-                inicio_ano = datetime(hoje.year, 1, 1).date()
-                query = query.filter(DespesaModel.data >= inicio_ano)
-        
-        # Agrupa por categoria e ordena pelo valor absoluto das despesas (decrescente)
+            soma.label('total_centavos')
+        ).join(categoria.table, CategoriaModel.id == categoria)
+        query = filtrar(query)
+        
+        # Agrupa por categoria, descartando as que ficaram sem despesas no resumo,
+        # e ordena pelo valor absoluto das despesas (decrescente)
         query = query.group_by(CategoriaModel.id, CategoriaModel.nome, CategoriaModel.cor)
-        query = query.order_by(sa.desc(sa.func.abs(sa.func.sum(DespesaModel.valor))))
-        
-        results = query.all()
-        
-        # Formata o resultado
-        categorias_despesas = []
-        for result in results:
-            categorias_despesas.append({
-                'id': result.id,
-                'nome': result.nome,
-                'cor': result.cor,
-                'total': float(result.total) if result.total else 0.0
-            })
+        query = query.having(contagem > 0)
+        query = query.order_by(sa.desc(sa.func.abs(soma)))
         
-        # Calcula o total geral para percentuais
-        total_geral = sum(abs(float(cat['total'])) for cat in categorias_despesas)
+        return _formatar_por_categoria(query.all())
+    
+    @staticmethod
+    @cache.memorizar('estatisticas.resumo', por_dia=True)
+    def resumo(filtros=None):
+        """
+        Total e despesas por categoria em uma única consulta
+        
+        Agrupa por categoria com LEFT JOIN em categorias: o total é a soma de
+        todos os grupos (inclusive despesas sem categoria), e a divisão por
+        categoria é a mesma de `despesas_por_categoria`.
+        
+        Args:
+            filtros (Filtros ou str, optional): Filtros da API ou só o período
+        
+        Returns:
+            dict: {'total_centavos': int, 'por_categoria': list}
+        """
+        _, categoria, soma, contagem, filtrar = _origem(_como_filtros(filtros))
         
-        # Adiciona o percentual para cada categoria
-        for cat in categorias_despesas:
-            cat['percentual'] = round(abs(float(cat['total'])) / total_geral * 100, 2) if total_geral > 0 else 0
-            cat['total'] = abs(float(cat['total']))  # Converte para positivo para exibição e serialização JSON
+        query = db.session.query(
+            CategoriaModel.id,
+            CategoriaModel.nome,
+            CategoriaModel.cor,
+            soma.label('total_centavos'),
+            contagem.label('contagem')
+        ).select_from(categoria.table).outerjoin(CategoriaModel, CategoriaModel.id == categoria)
+        query = filtrar(query)
+        query = query.group_by(categoria, CategoriaModel.id, CategoriaModel.nome, CategoriaModel.cor)
+        
+        linhas = query.all()
+        total = sum(linha.total_centavos or 0 for linha in linhas)
+        
+        # Mesma ordenação de despesas_por_categoria, feita aqui sobre poucas linhas
+        por_categoria = [linha for linha in linhas if linha.id is not None and linha.contagem]
+        por_categoria.sort(key=lambda linha: abs(linha.total_centavos or 0), reverse=True)
+        
+        return {
+            'total_centavos': total,
+            'por_categoria': _formatar_por_categoria(por_categoria)
+        }
+    
+    @staticmethod
+    def intervalo_serie(granularidade, inicio=None, fim=None, hoje=None):
+        """
+        Completa e valida o intervalo de uma série temporal
+        
+        Sem datas, usa os últimos 30 dias, 12 semanas ou 12 meses até hoje.
+        
+        Args:
+            granularidade (str): dia, semana ou mes
+            inicio (date, optional): Primeiro dia
+            fim (date, optional): Último dia (inclusive)
+            hoje (date, optional): Data de referência (padrão: data atual)
+        
+        Returns:
+            tuple: (inicio, fim) com as datas preenchidas
+        
+        Raises:
+            ValueError: Granularidade desconhecida, intervalo invertido ou série longa demais
+        """
+        if granularidade not in GRANULARIDADES:
+            raise ValueError(f"Granularidade inválida (use {', '.join(GRANULARIDADES)})")
+        
+        fim = fim or hoje or data_atual()
+        if inicio is None:
+            if granularidade == 'dia':
+                inicio = fim - timedelta(days=29)
+            elif granularidade == 'semana':
+                inicio = inicio_do_balde(fim, 'semana') - timedelta(weeks=11)
+            else:
+                inicio = inicio_do_balde(fim, 'mes')
+                for _ in range(11):
+                    inicio = inicio_do_balde(inicio - timedelta(days=1), 'mes')
+        
+        if inicio > fim:
+            raise ValueError("'inicio' deve ser anterior ou igual a 'fim'")
+        
+        dias_por_ponto = {'dia': 1, 'semana': 7, 'mes': 28}[granularidade]
+        if (fim - inicio).days // dias_por_ponto + 1 > PONTOS_MAXIMOS:
+            raise ValueError(f"Intervalo longo demais para a granularidade '{granularidade}'")
+        
+        return inicio, fim
+    
+    @staticmethod
+    @cache.memorizar('estatisticas.serie', por_dia=True)
+    def serie(granularidade, filtros=None):
+        """
+        Série temporal dos totais de despesas, agrupada no banco
+        
+        Os intervalos sem despesas aparecem com total e contagem zerados, para
+        que a série seja contínua.
+        
+        Args:
+            granularidade (str): dia, semana ou mes
+            filtros (Filtros, optional): Datas (ou período), categorias e faixa de valor
+        
+        Returns:
+            dict: Granularidade, intervalo, categorias e lista de pontos {inicio, total, total_centavos, contagem}
+        """
+        filtros = _como_filtros(filtros)
+        de, ate = filtros.intervalo()
+        inicio, fim = Estatistica.intervalo_serie(granularidade, de, ate - timedelta(days=1) if ate else None)
+        filtros = Filtros(None, inicio, fim, filtros.categorias, filtros.valor_min, filtros.valor_max)
+        
+        coluna_data, _, soma, contagem, filtrar = _origem(filtros)
+        dialeto = db.session.get_bind().dialect.name
+        balde = _expressao_balde(coluna_data, granularidade, dialeto)
+        agrupar_no_banco = balde is not None
+        if not agrupar_no_banco:
+            balde = coluna_data
+        
+        # Intervalo semiaberto sobre a data (chave primária do resumo ou índice de despesas)
+        query = db.session.query(balde.label('balde'), soma.label('total_centavos'), contagem.label('contagem'))
+        query = filtrar(query).group_by('balde')
+        
+        pontos = {}
+        for linha in query:
+            chave = linha.balde
+            if isinstance(chave, str):
+                chave = date.fromisoformat(chave[:10])
+            elif isinstance(chave, datetime):
+                chave = chave.date()
+            if not agrupar_no_banco:
+                chave = inicio_do_balde(chave, granularidade)
+            total, quantidade = pontos.get(chave, (0, 0))
+            pontos[chave] = (total + (linha.total_centavos or 0), quantidade + int(linha.contagem or 0))
+        
+        # Preenche os intervalos sem despesas
+        serie = []
+        atual = inicio_do_balde(inicio, granularidade)
+        while atual <= fim:
+            total, quantidade = pontos.get(atual, (0, 0))
+            serie.append({
+                'inicio': atual.strftime('%Y-%m-%d'),
+                'total': em_reais(abs(total)),  # Positivo para exibição, como em despesas_por_categoria
+                'total_centavos': abs(total),
+                'contagem': quantidade
+            })
+            atual = proximo_balde(atual, granularidade)
         
-        return categorias_despesas
+        return {
+            'granularidade': granularidade,
+            'inicio': inicio.strftime('%Y-%m-%d'),
+            'fim': fim.strftime('%Y-%m-%d'),
+            'categorias': list(filtros.categorias),
+            'serie': serie
+        }
@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Filtros de despesas compartilhados pela listagem, exportação e estatísticas
+
+Os filtros (período, intervalo de datas, categorias e faixa de valor) são
+convertidos em predicados sobre as colunas, sem funções em volta delas:
+intervalos semiabertos em `data`, `IN` em `categoria_id` e comparações
+simples em `valor_centavos`, para que o banco use os índices (data) e
+(categoria_id, data).
+"""
+
+from datetime import datetime, timedelta
+import sqlalchemy as sa
+from app.models.periodo import intervalo_periodo
+from app.models.dinheiro import para_centavos
+
+# Identificador usado nos filtros para despesas sem categoria
+SEM_CATEGORIA = 0
+
+class Filtros:
+    """
+    Conjunto de filtros de despesas, imutável e utilizável como chave de cache
+    """
+    
+    def __init__(self, periodo=None, inicio=None, fim=None, categorias=None, valor_min=None, valor_max=None):
+        """
+        Args:
+            periodo (str, optional): diario, semanal, mensal ou anual (relativo a hoje)
+            inicio (date, optional): Data inicial (inclusive)
+            fim (date, optional): Data final (inclusive)
+            categorias (iterable, optional): IDs de categoria (0 = sem categoria)
+            valor_min (int, optional): Valor mínimo da despesa em centavos, em módulo
+            valor_max (int, optional): Valor máximo da despesa em centavos, em módulo
+        
+        Raises:
+            ValueError: Se o intervalo de datas ou a faixa de valor forem invertidos
+        """
+        if inicio and fim and inicio > fim:
+            raise ValueError("'inicio' deve ser anterior ou igual a 'fim'")
+        if valor_min is not None and valor_max is not None and valor_min > valor_max:
+            raise ValueError("'valor_min' deve ser menor ou igual a 'valor_max'")
+        
+        self.periodo = periodo or None
+        self.inicio = inicio
+        self.fim = fim
+        self.categorias = tuple(sorted(set(categorias))) if categorias else ()
+        self.valor_min = valor_min
+        self.valor_max = valor_max
+    
+    @staticmethod
+    def de_argumentos(args):
+        """
+        Lê os filtros da query string
+        
+        `categoria_id` aceita vários valores (`categoria_id=1&categoria_id=3`
+        ou `categoria_id=1,3`). Os valores são informados em reais e em
+        módulo (`valor_min=50` = despesas de pelo menos R$ 50).
+        
+        Args:
+            args (MultiDict): request.args
+        
+        Returns:
+            Filtros: Filtros lidos
+        
+        Raises:
+            ValueError: Se alguma data, categoria ou valor forem inválidos
+        """
+        datas = {}
+        for campo in ('inicio', 'fim'):
+            valor = args.get(campo)
+            try:
+                datas[campo] = datetime.strptime(valor, '%Y-%m-%d').date() if valor else None
+            except ValueError:
+                raise ValueError(f"Data inválida em '{campo}' (use AAAA-MM-DD)")
+        
+        categorias = []
+        for valor in args.getlist('categoria_id'):
+            for parte in valor.split(','):
+                if parte.strip():
+                    try:
+                        categorias.append(int(parte))
+                    except ValueError:
+                        raise ValueError("categoria_id deve ser um número inteiro")
+        
+        valores = {}
+        for campo in ('valor_min', 'valor_max'):
+            valor = args.get(campo)
+            try:
+                valores[campo] = abs(para_centavos(valor)) if valor else None
+            except ValueError:
+                raise ValueError(f"'{campo}' deve ser um número")
+        
+        return Filtros(args.get('periodo'), datas['inicio'], datas['fim'], categorias, **valores)
+    
+    def intervalo(self, hoje=None):
+        """
+        Intervalo semiaberto [de, ate) de datas, combinando período e datas explícitas
+        
+        Args:
+            hoje (date, optional): Data de referência do período
+        
+        Returns:
+            tuple: (de, ate), com None onde não houver limite
+        """
+        de, ate = intervalo_periodo(self.periodo, hoje)
+        if self.inicio and (de is None or self.inicio > de):
+            de = self.inicio
+        fim = self.fim + timedelta(days=1) if self.fim else None
+        if fim and (ate is None or fim < ate):
+            ate = fim
+        return de, ate
+    
+    def por_valor(self):
+        """
+        Indica se há filtro de valor (que o resumo diário não consegue atender)
+        """
+        return self.valor_min is not None or self.valor_max is not None
+    
+    def aplicar(self, query, data, categoria, valor=None, sem_categoria_nulo=True):
+        """
+        Adiciona os predicados dos filtros à query
+        
+        Args:
+            query: Query a filtrar
+            data: Coluna de data
+            categoria: Coluna de categoria
+            valor: Coluna de valor em centavos (obrigatória se houver filtro de valor)
+            sem_categoria_nulo (bool): Despesas sem categoria têm categoria NULL
+                (tabela despesas) em vez de 0 (resumo diário)
+        
+        Returns:
+            Query filtrada
+        """
+        de, ate = self.intervalo()
+        if de:
+            query = query.filter(data >= de)
+        if ate:
+            query = query.filter(data < ate)
+        
+        if self.categorias:
+            ids = [categoria_id for categoria_id in self.categorias if categoria_id != SEM_CATEGORIA]
+            condicoes = [categoria.in_(ids)] if ids else []
+            if SEM_CATEGORIA in self.categorias:
+                condicoes.append(categoria.is_(None) if sem_categoria_nulo else categoria == SEM_CATEGORIA)
+            query = query.filter(sa.or_(*condicoes))
+        
+        # Despesas são gravadas com valor negativo: |valor| >= min equivale a valor <= -min
+        if self.valor_min is not None:
+            query = query.filter(valor <= -self.valor_min)
+        if self.valor_max is not None:
+            query = query.filter(valor >= -self.valor_max)
+        
+        return query
+    
+    def _chave(self):
+        return (self.periodo, self.inicio, self.fim, self.categorias, self.valor_min, self.valor_max)
+    
+    def __eq__(self, outro):
+        return isinstance(outro, Filtros) and self._chave() == outro._chave()
+    
+    def __hash__(self):
+        return hash(self._chave())
+    
+    def __repr__(self):
+        return f"Filtros{self._chave()}"
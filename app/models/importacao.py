@@ -0,0 +1,420 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Importação de extratos bancários (CSV e OFX) como despesas
+
+O arquivo passa linha a linha por um pipeline de geradores:
+
+    leitura (CSV/OFX) -> normalização -> categorização -> deduplicação -> gravação
+
+Cada etapa consome e produz um registro por vez, e a gravação faz commit a
+cada lote, então a memória usada não depende do tamanho do arquivo.
+"""
+
+import csv
+import re
+from collections import Counter, OrderedDict
+from datetime import datetime
+from app.models.database import db, Despesa as DespesaModel
+from app.models.categoria import Categoria
+from app.models.despesa import Despesa
+from app.models.dinheiro import para_centavos
+from app.cache import cache
+from app.replica import no_primario
+import sqlalchemy as sa
+
+# Regras padrão de categorização: expressão sobre a descrição -> nome da categoria
+REGRAS_PADRAO = [
+    (r'uber|99\s*pop|99app|taxi|combust|posto|shell|ipiranga|estacionamento|pedagio|pedágio|metr[oô]|onibus|ônibus', 'Transporte'),
+    (r'mercado|supermerc|padaria|restaurante|lanchonete|ifood|rappi|a[cç]ougue|hortifruti|pizzaria', 'Alimentação'),
+    (r'aluguel|condom[ií]nio|energia|\bluz\b|[aá]gua|\bg[aá]s\b|internet|iptu', 'Moradia'),
+    (r'farm[aá]cia|drogaria|hospital|cl[ií]nica|laborat[oó]rio|m[eé]dic|odonto|plano de sa[uú]de', 'Saúde'),
+    (r'escola|faculdade|curso|livraria|mensalidade|udemy|alura', 'Educação'),
+    (r'cinema|netflix|spotify|teatro|show|ingresso|viagem|hotel|bar\b', 'Lazer'),
+    (r'roupa|cal[cç]ado|renner|riachuelo|c&a|zara|vestu[aá]rio', 'Vestuário'),
+]
+
+# Nomes de coluna aceitos no cabeçalho do CSV (comparados sem acento/maiúsculas)
+COLUNAS_CSV = {
+    'data': {'data', 'date', 'data lancamento', 'data do lancamento', 'dt'},
+    'descricao': {'descricao', 'description', 'historico', 'memo', 'lancamento', 'estabelecimento'},
+    'valor': {'valor', 'amount', 'value', 'valor (r$)', 'quantia'},
+    'categoria': {'categoria', 'category'},
+}
+
+# Tipos de transação OFX que não são despesas
+TIPOS_OFX_CREDITO = {'CREDIT', 'DEP', 'INT', 'DIV', 'DIRECTDEP'}
+
+# Valor sem vírgula com pontos de milhar (1.234 ou -1.234.567)
+PADRAO_MILHAR = re.compile(r'[-+]?[1-9]\d{0,2}(\.\d{3})+')
+
+# Quantidade máxima de datas com despesas existentes mantidas em memória
+DATAS_EM_MEMORIA = 400
+
+# Quantidade máxima de erros detalhados no relatório
+ERROS_NO_RELATORIO = 50
+
+def _sem_acento(texto):
+    """
+    Remove acentos comuns e normaliza para minúsculas
+    """
+    tabela = str.maketrans('áàâãäéèêëíìîïóòôõöúùûüç', 'aaaaaeeeeiiiiooooouuuuc')
+    return texto.strip().lower().translate(tabela)
+
+class RelatorioImportacao:
+    """
+    Contadores e erros acumulados ao longo do pipeline de importação
+    """
+    
+    def __init__(self):
+        self.lidas = 0
+        self.importadas = 0
+        self.duplicadas = 0
+        self.ignoradas = 0
+        self.invalidas = 0
+        self.lotes = 0
+        self.erros = []
+    
+    def erro(self, linha, mensagem):
+        self.invalidas += 1
+        if len(self.erros) < ERROS_NO_RELATORIO:
+            self.erros.append({"linha": linha, "error": mensagem})
+    
+    def to_dict(self):
+        return {
+            'lidas': self.lidas,
+            'importadas': self.importadas,
+            'duplicadas': self.duplicadas,
+            'ignoradas': self.ignoradas,
+            'invalidas': self.invalidas,
+            'lotes': self.lotes,
+            'erros': self.erros
+        }
+
+class Importacao:
+    """
+    Classe com as etapas do pipeline de importação de extratos
+    """
+    
+    @staticmethod
+    def ler_csv(arquivo, relatorio):
+        """
+        Lê um CSV com cabeçalho, detectando o separador (";" ou ",")
+        
+        Args:
+            arquivo: Arquivo de texto aberto
+            relatorio (RelatorioImportacao): Relatório da importação
+        
+        Yields:
+            dict: Registro bruto (linha, data, descricao, valor, categoria)
+        """
+        cabecalho = arquivo.readline()
+        separador = ';' if cabecalho.count(';') > cabecalho.count(',') else ','
+        nomes = [_sem_acento(nome) for nome in next(csv.reader([cabecalho], delimiter=separador))]
+        
+        posicoes = {}
+        for campo, aceitos in COLUNAS_CSV.items():
+            for posicao, nome in enumerate(nomes):
+                if nome in aceitos:
+                    posicoes[campo] = posicao
+                    break
+        
+        ausentes = [campo for campo in ('data', 'descricao', 'valor') if campo not in posicoes]
+        if ausentes:
+            raise ValueError(f"Coluna obrigatória ausente no CSV: {ausentes[0]}")
+        
+        for numero, colunas in enumerate(csv.reader(arquivo, delimiter=separador), start=2):
+            if not any(coluna.strip() for coluna in colunas):
+                continue
+            relatorio.lidas += 1
+            try:
+                yield {
+                    'linha': numero,
+                    'data': colunas[posicoes['data']],
+                    'descricao': colunas[posicoes['descricao']],
+                    'valor': colunas[posicoes['valor']],
+                    'categoria': colunas[posicoes['categoria']] if 'categoria' in posicoes else None
+                }
+            except IndexError:
+                relatorio.erro(numero, "Quantidade de colunas menor que o cabeçalho")
+    
+    @staticmethod
+    def _tags_ofx(arquivo, tamanho_bloco=65536):
+        """
+        Percorre as tags de um arquivo OFX (SGML ou XML) em blocos
+        
+        Yields:
+            tuple: (nome da tag em maiúsculas, texto após a tag)
+        """
+        padrao = re.compile(r'<([^>]+)>([^<]*)')
+        resto = ''
+        while True:
+            bloco = arquivo.read(tamanho_bloco)
+            texto = resto + bloco
+            if not bloco:
+                corte = len(texto)
+            else:
+                # Processa até a última tag completa; o restante vai para o próximo bloco
+                corte = texto.rfind('<')
+                if corte <= 0:
+                    resto = texto
+                    continue
+            for tag in padrao.finditer(texto, 0, corte):
+                yield tag.group(1).strip().upper(), tag.group(2).strip()
+            resto = texto[corte:]
+            if not bloco:
+                return
+    
+    @staticmethod
+    def ler_ofx(arquivo, relatorio):
+        """
+        Lê as transações (<STMTTRN>) de um arquivo OFX
+        
+        Transações de crédito (depósitos, rendimentos) não são despesas
+        e são contadas como ignoradas.
+        
+        Args:
+            arquivo: Arquivo de texto aberto
+            relatorio (RelatorioImportacao): Relatório da importação
+        
+        Yields:
+            dict: Registro bruto (linha, data, descricao, valor, categoria)
+        """
+        transacao = None
+        for tag, texto in Importacao._tags_ofx(arquivo):
+            if tag == 'STMTTRN':
+                transacao = {}
+            elif tag == '/STMTTRN' and transacao is not None:
+                relatorio.lidas += 1
+                if transacao.get('TRNTYPE', '').upper() in TIPOS_OFX_CREDITO:
+                    relatorio.ignoradas += 1
+                else:
+                    yield {
+                        'linha': relatorio.lidas,
+                        'data': transacao.get('DTPOSTED', ''),
+                        'descricao': transacao.get('MEMO') or transacao.get('NAME', ''),
+                        'valor': transacao.get('TRNAMT', ''),
+                        'categoria': None
+                    }
+                transacao = None
+            elif transacao is not None and not tag.startswith('/'):
+                transacao[tag] = texto
+    
+    @staticmethod
+    def _converter_data(texto):
+        """
+        Converte datas nos formatos DD/MM/AAAA, AAAA-MM-DD e AAAAMMDD[hhmmss] (OFX)
+        """
+        texto = texto.strip()
+        if texto[:8].isdigit():
+            # OFX: 20251010, 20251010120000 ou 20251010120000[-3:BRT]
+            return datetime.strptime(texto[:8], '%Y%m%d').date()
+        if '/' in texto:
+            return datetime.strptime(texto, '%d/%m/%Y').date()
+        return datetime.strptime(texto[:10], '%Y-%m-%d').date()
+    
+    @staticmethod
+    def _converter_valor(texto):
+        """
+        Converte valores nos formatos 1.234,56 / 1234,56 / 1234.56 / 1.234 / R$ -12,50 para centavos
+        
+        Sem vírgula, pontos seguidos de exatamente três dígitos (1.234, 1.234.567)
+        são separadores de milhar, e não casas decimais.
+        """
+        texto = texto.strip().replace('R$', '').replace(' ', '')
+        if ',' in texto or PADRAO_MILHAR.fullmatch(texto):
+            texto = texto.replace('.', '').replace(',', '.')
+        return para_centavos(texto)
+    
+    @staticmethod
+    def normalizar(registros, relatorio):
+        """
+        Converte data e valor e normaliza o sinal como em `Despesa.criar`
+        
+        Extratos de cartão listam as compras com valor positivo, então o
+        valor vira sempre negativo; só os créditos marcados pelo formato
+        (tipos de transação do OFX) são ignorados, na leitura.
+        
+        Yields:
+            dict: Registro com data (date), valor_centavos (int negativo) e descrição
+        """
+        for registro in registros:
+            try:
+                registro['data'] = Importacao._converter_data(registro['data'])
+            except ValueError:
+                relatorio.erro(registro['linha'], f"Data inválida: {registro['data']}")
+                continue
+            
+            try:
+                valor = Importacao._converter_valor(registro['valor'])
+            except ValueError:
+                relatorio.erro(registro['linha'], f"Valor inválido: {registro['valor']}")
+                continue
+            registro['valor_centavos'] = -abs(valor)
+            
+            registro['descricao'] = ' '.join(registro['descricao'].split())[:255]
+            if not registro['descricao']:
+                relatorio.erro(registro['linha'], "Descrição vazia")
+                continue
+            
+            yield registro
+    
+    @staticmethod
+    def categorizar(registros, regras=None):
+        """
+        Define a categoria de cada registro
+        
+        Usa a coluna de categoria do arquivo quando ela corresponde a uma
+        categoria existente; senão, a primeira regra cuja expressão casa com
+        a descrição; senão, a categoria "Outros".
+        
+        Args:
+            registros: Registros normalizados
+            regras (list, optional): Lista de (expressão, nome da categoria)
+        
+        Yields:
+            dict: Registro com categoria_id
+        """
+        por_nome = {_sem_acento(categoria['nome']): categoria['id'] for categoria in Categoria.listar()}
+        compiladas = [
+            (re.compile(padrao, re.IGNORECASE), por_nome[_sem_acento(nome)])
+            for padrao, nome in (regras if regras is not None else REGRAS_PADRAO)
+            if _sem_acento(nome) in por_nome
+        ]
+        padrao_outros = por_nome.get('outros')
+        
+        for registro in registros:
+            categoria_id = por_nome.get(_sem_acento(registro['categoria'] or ''))
+            if categoria_id is None:
+                categoria_id = next(
+                    (cat_id for padrao, cat_id in compiladas if padrao.search(registro['descricao'])),
+                    padrao_outros
+                )
+            registro['categoria_id'] = categoria_id
+            yield registro
+    
+    @staticmethod
+    def deduplicar(registros, relatorio, id_limite, tamanho_lote):
+        """
+        Descarta registros que já existiam no banco antes da importação
+        
+        A comparação usa (data, valor, descrição) e conta ocorrências, então
+        duas compras iguais no mesmo dia só são descartadas se as duas já
+        existirem. Só são consideradas despesas com ID até `id_limite`, para
+        que linhas gravadas pela própria importação não sejam tratadas como
+        duplicadas. As contagens ficam em memória apenas para as datas mais
+        recentes, consultadas em lote pelo índice de data.
+        
+        Yields:
+            dict: Registro ainda não existente no banco
+        """
+        existentes = OrderedDict()
+        lote = []
+        
+        def processar(lote):
+            datas = {registro['data'] for registro in lote}
+            faltantes = datas - set(existentes)
+            if faltantes:
+                for data in faltantes:
+                    existentes[data] = Counter()
+                consulta = db.session.query(
+                    DespesaModel.data, DespesaModel.valor_centavos, DespesaModel.descricao
+                ).filter(DespesaModel.data.in_(faltantes), DespesaModel.id <= id_limite)
+                for data, valor, descricao in consulta:
+                    existentes[data][(valor, descricao)] += 1
+            
+            # Mantém as datas do lote atual e descarta as usadas há mais tempo
+            for data in datas:
+                existentes.move_to_end(data)
+            while len(existentes) > max(DATAS_EM_MEMORIA, len(datas)):
+                existentes.popitem(last=False)
+            
+            for registro in lote:
+                contagem = existentes[registro['data']]
+                chave = (registro['valor_centavos'], registro['descricao'])
+                if contagem[chave] > 0:
+                    contagem[chave] -= 1
+                    relatorio.duplicadas += 1
+                else:
+                    yield registro
+        
+        for registro in registros:
+            lote.append(registro)
+            if len(lote) >= tamanho_lote:
+                yield from processar(lote)
+                lote = []
+        if lote:
+            yield from processar(lote)
+    
+    @staticmethod
+    def gravar(registros, relatorio, tamanho_lote, ao_gravar_lote=None):
+        """
+        Insere os registros em lotes, com um commit por lote
+        
+        Args:
+            registros: Registros categorizados e deduplicados
+            relatorio (RelatorioImportacao): Relatório da importação
+            tamanho_lote (int): Quantidade de despesas por commit
+            ao_gravar_lote (callable, optional): Chamado com o relatório após cada lote
+        """
+        def gravar_lote(lote):
+            try:
+                Despesa._inserir_linhas(lote)
+                db.session.commit()
+                cache.invalidar()
+            except Exception:
+                db.session.rollback()
+                raise
+            relatorio.importadas += len(lote)
+            relatorio.lotes += 1
+            if ao_gravar_lote:
+                ao_gravar_lote(relatorio)
+        
+        lote = []
+        for registro in registros:
+            lote.append({
+                'descricao': registro['descricao'],
+                'valor_centavos': registro['valor_centavos'],
+                'data': registro['data'],
+                'categoria_id': registro['categoria_id']
+            })
+            if len(lote) >= tamanho_lote:
+                gravar_lote(lote)
+                lote = []
+        if lote:
+            gravar_lote(lote)
+    
+    @staticmethod
+    @no_primario
+    def executar(arquivo, formato, tamanho_lote=1000, regras=None, ao_gravar_lote=None):
+        """
+        Importa um extrato CSV ou OFX já aberto em modo texto
+        
+        Args:
+            arquivo: Arquivo de texto aberto
+            formato (str): csv ou ofx
+            tamanho_lote (int): Quantidade de despesas por commit
+            regras (list, optional): Regras de categorização (expressão, categoria)
+            ao_gravar_lote (callable, optional): Chamado com o relatório após cada lote
+        
+        Returns:
+            dict: Relatório da importação
+        
+        Raises:
+            ValueError: Se o formato ou o cabeçalho do arquivo forem inválidos
+        """
+        leitores = {'csv': Importacao.ler_csv, 'ofx': Importacao.ler_ofx}
+        if formato not in leitores:
+            raise ValueError(f"Formato não suportado: {formato}")
+        
+        relatorio = RelatorioImportacao()
+        id_limite = db.session.query(sa.func.coalesce(sa.func.max(DespesaModel.id), 0)).scalar()
+        
+        registros = leitores[formato](arquivo, relatorio)
+        registros = Importacao.normalizar(registros, relatorio)
+        registros = Importacao.categorizar(registros, regras)
+        registros = Importacao.deduplicar(registros, relatorio, id_limite, tamanho_lote)
+        Importacao.gravar(registros, relatorio, tamanho_lote, ao_gravar_lote)
+        
+        return relatorio.to_dict()
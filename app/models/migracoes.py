@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Migrações de schema versionadas e seed das categorias padrão
+
+Cada migração tem um número de versão e é registrada na tabela
+`schema_versao` depois de aplicada, de modo que rodar `aplicar()` de novo
+só executa as que faltam. Os passos também são idempotentes por si só
+(verificam o que já existe), o que permite adotar o controle de versão em
+bancos criados antes dele.
+
+Deve ser executado uma vez por deploy (`python init_db.py`), nunca no boot
+dos workers da aplicação.
+"""
+
+import logging
+import sqlalchemy as sa
+from sqlalchemy import text
+from app.models.database import db, Categoria, Despesa, ResumoDiario, SchemaVersao, VersaoDespesas
+from app.cache import cache
+
+logger = logging.getLogger(__name__)
+
+# Categorias criadas em todo banco novo (nome, cor)
+CATEGORIAS_PADRAO = [
+    ('Alimentação', '#FF5733'),
+    ('Transporte', '#33FF57'),
+    ('Moradia', '#3357FF'),
+    ('Saúde', '#FF33A8'),
+    ('Educação', '#33A8FF'),
+    ('Lazer', '#A833FF'),
+    ('Vestuário', '#FFD700'),
+    ('Outros', '#808080')
+]
+
+# Nome do lock do MySQL que impede duas execuções simultâneas (ex.: dois
+# containers subindo juntos)
+NOME_LOCK = 'primosfincntrl_migracoes'
+ESPERA_LOCK = 60
+
+def _colunas(tabela):
+    return {info['name'] for info in sa.inspect(db.engine).get_columns(tabela)}
+
+def _criar_tabelas():
+    db.create_all()
+
+def _criar_indices_despesas():
+    # Bancos criados antes dos índices: create_all não altera tabelas existentes.
+    # Índices de colunas que ainda não existem ficam para a migração que as cria
+    colunas = _colunas('despesas')
+    for indice in Despesa.__table__.indexes:
+        if all(coluna.name in colunas for coluna in indice.columns):
+            indice.create(bind=db.engine, checkfirst=True)
+
+def _preencher_resumo_diario():
+    # Banco ainda com valores em reais: o resumo é reconstruído pela migração 5
+    if 'valor_centavos' not in _colunas('despesas'):
+        return
+    
+    # Tabela de resumo recém-criada em um banco com despesas: faz o backfill
+    if ResumoDiario.query.first() is None and Despesa.query.first() is not None:
+        from app.models.resumo import Resumo
+        # O contador de versões só existe a partir da migração 6
+        Resumo.reconstruir(versionar=False)
+        logger.info("Resumo diário de despesas reconstruído")
+
+def _criar_indice_busca():
+    # FULLTEXT no MySQL; FTS5 com triggers no SQLite (ver app/models/busca.py)
+    from app.models.busca import criar_indice_busca
+    criar_indice_busca()
+
+def _converter_valores_para_centavos():
+    # Bancos anteriores guardavam reais em FLOAT/DECIMAL (despesas.valor e
+    # despesas_resumo_diario.total); os valores passam para BIGINT em centavos
+    despesas = _colunas('despesas')
+    resumo = _colunas('despesas_resumo_diario')
+    if 'valor' not in despesas and 'total' not in resumo:
+        return
+    
+    with db.engine.begin() as conexao:
+        if 'valor' in despesas:
+            if 'valor_centavos' not in despesas:
+                conexao.execute(text("ALTER TABLE despesas ADD COLUMN valor_centavos BIGINT NOT NULL DEFAULT 0"))
+            conexao.execute(text("UPDATE despesas SET valor_centavos = ROUND(valor * 100)"))
+            conexao.execute(text("ALTER TABLE despesas DROP COLUMN valor"))
+        
+        if 'total' in resumo:
+            if 'total_centavos' not in resumo:
+                conexao.execute(text("ALTER TABLE despesas_resumo_diario ADD COLUMN total_centavos BIGINT NOT NULL DEFAULT 0"))
+            conexao.execute(text("ALTER TABLE despesas_resumo_diario DROP COLUMN total"))
+    
+    # Refaz os totais somando os centavos exatos, em vez de converter as somas em float
+    from app.models.resumo import Resumo
+    Resumo.reconstruir(versionar=False)
+    logger.info("Resumo diário de despesas reconstruído em centavos")
+
+def _rastrear_mudancas_despesas():
+    # Versão por linha, exclusões registradas e contador global, usados pela
+    # sincronização incremental (ver app/models/mudancas.py). Linhas já
+    # existentes ficam na versão 0
+    if 'versao' not in _colunas('despesas'):
+        with db.engine.begin() as conexao:
+            conexao.execute(text("ALTER TABLE despesas ADD COLUMN versao BIGINT NOT NULL DEFAULT 0"))
+    _criar_indices_despesas()
+    
+    # Cria só as tabelas novas (despesas_versao e despesas_excluidas)
+    db.create_all()
+    if db.session.get(VersaoDespesas, 1) is None:
+        db.session.add(VersaoDespesas(id=1, versao=0))
+        db.session.commit()
+
+def _versao_minima_mudancas():
+    # Versão a partir da qual as mudanças estão completas (ver
+    # Mudancas.descartar_historico); bancos existentes ainda têm todas
+    if 'minima' not in _colunas('despesas_versao'):
+        with db.engine.begin() as conexao:
+            conexao.execute(text("ALTER TABLE despesas_versao ADD COLUMN minima BIGINT NOT NULL DEFAULT 0"))
+
+# Migrações em ordem de aplicação: (versão, descrição, função)
+# Novas migrações entram sempre no final, com a próxima versão
+MIGRACOES = [
+    (1, 'Tabelas iniciais', _criar_tabelas),
+    (2, 'Índices de despesas por data e categoria', _criar_indices_despesas),
+    (3, 'Backfill do resumo diário de despesas', _preencher_resumo_diario),
+    (4, 'Índice de busca textual em despesas.descricao', _criar_indice_busca),
+    (5, 'Valores em centavos inteiros (BIGINT)', _converter_valores_para_centavos),
+    (6, 'Versões e exclusões de despesas para sincronização incremental', _rastrear_mudancas_despesas),
+    (7, 'Versão mínima da sincronização incremental', _versao_minima_mudancas)
+]
+
+class Migracoes:
+    """
+    Classe que aplica as migrações pendentes e o seed de categorias
+    """
+    
+    @staticmethod
+    def versoes_aplicadas():
+        """
+        Lista as versões já registradas em `schema_versao`
+        
+        Returns:
+            set: Números das versões aplicadas
+        """
+        SchemaVersao.__table__.create(bind=db.engine, checkfirst=True)
+        return {versao for (versao,) in db.session.query(SchemaVersao.versao)}
+    
+    @staticmethod
+    def pendentes():
+        """
+        Lista as migrações ainda não aplicadas ao banco
+        
+        Returns:
+            list: Tuplas (versão, descrição, função) em ordem de aplicação
+        """
+        aplicadas = Migracoes.versoes_aplicadas()
+        return [migracao for migracao in MIGRACOES if migracao[0] not in aplicadas]
+    
+    @staticmethod
+    def aplicar():
+        """
+        Aplica as migrações pendentes e cria as categorias padrão ausentes
+        
+        Returns:
+            dict: Versões aplicadas nesta execução e categorias criadas
+        """
+        with _LockMigracoes():
+            aplicadas = []
+            for versao, descricao, funcao in Migracoes.pendentes():
+                funcao()
+                db.session.add(SchemaVersao(versao=versao, descricao=descricao))
+                db.session.commit()
+                aplicadas.append(versao)
+                logger.info(f"Migração {versao} aplicada: {descricao}")
+            
+            categorias = Migracoes.criar_categorias_padrao()
+        
+        return {'versoes': aplicadas, 'categorias': categorias}
+    
+    @staticmethod
+    def criar_categorias_padrao():
+        """
+        Insere as categorias padrão que ainda não existem no banco
+        
+        Usa uma única consulta para os nomes existentes e um único commit
+        para as novas categorias.
+        
+        Returns:
+            int: Quantidade de categorias criadas
+        """
+        existentes = {nome for (nome,) in db.session.query(Categoria.nome)}
+        novas = [Categoria(nome=nome, cor=cor) for nome, cor in CATEGORIAS_PADRAO if nome not in existentes]
+        
+        if novas:
+            db.session.add_all(novas)
+            db.session.commit()
+            cache.invalidar()
+        
+        return len(novas)
+
+class _LockMigracoes:
+    """
+    Lock exclusivo entre processos durante as migrações, via
+    GET_LOCK/RELEASE_LOCK do MySQL (nos demais bancos não faz nada)
+    """
+    
+    def __enter__(self):
+        self._conexao = None
+        if db.engine.dialect.name == 'mysql':
+            # Conexão própria: o lock pertence à sessão do MySQL que o obteve
+            self._conexao = db.engine.connect()
+            obtido = self._conexao.execute(
+                text("SELECT GET_LOCK(:nome, :espera)"),
+                {'nome': NOME_LOCK, 'espera': ESPERA_LOCK}
+            ).scalar()
+            if obtido != 1:
+                self._conexao.close()
+                raise RuntimeError("Outra execução das migrações está em andamento")
+        return self
+    
+    def __exit__(self, *excecao):
+        if self._conexao is not None:
+            self._conexao.execute(text("SELECT RELEASE_LOCK(:nome)"), {'nome': NOME_LOCK})
+            self._conexao.close()
+        return False
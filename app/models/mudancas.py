@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Rastreamento de mudanças em despesas para a sincronização incremental
+
+Cada transação que escreve em `despesas` obtém uma nova versão do contador
+global (tabela despesas_versao) e a grava na coluna `versao` das linhas
+inseridas ou alteradas; exclusões deixam um registro em despesas_excluidas
+com a versão da exclusão. Assim um cliente que já tem os dados da versão N
+pede só o que mudou depois dela (`GET /api/despesas/mudancas?desde=N`), e o
+custo da atualização depende da quantidade de edições, não do tamanho da
+tabela.
+
+O UPDATE no contador bloqueia a linha até o commit, então as versões são
+atribuídas na ordem dos commits: nenhuma escrita com versão menor aparece
+depois que uma maior já foi lida.
+
+Quando as exclusões registradas são descartadas (`descartar_historico`, ex.:
+ao limpar o banco), a versão mínima do contador passa a ser a atual, e
+clientes com versão anterior a ela recebem `recarregar`.
+"""
+
+from flask import g, has_request_context
+from app.models.database import db, Despesa as DespesaModel, VersaoDespesas, DespesaExcluida
+import sqlalchemy as sa
+
+# Linha única do contador
+ID_CONTADOR = 1
+
+class Mudancas:
+    """
+    Classe para versionamento das escritas e consulta das mudanças em despesas
+    """
+    
+    @staticmethod
+    def nova_versao():
+        """
+        Incrementa o contador global e retorna a nova versão, sem fazer commit
+        
+        Returns:
+            int: Versão das escritas da transação atual
+        """
+        db.session.execute(
+            sa.update(VersaoDespesas)
+            .where(VersaoDespesas.id == ID_CONTADOR)
+            .values(versao=VersaoDespesas.versao + 1)
+        )
+        return Mudancas.versao_atual()
+    
+    @staticmethod
+    def versao_atual():
+        """
+        Retorna a versão mais recente dos dados de despesas
+        
+        Returns:
+            int: Versão atual (0 em um banco sem escritas rastreadas)
+        """
+        versao = db.session.execute(
+            sa.select(VersaoDespesas.versao).where(VersaoDespesas.id == ID_CONTADOR)
+        ).scalar()
+        return versao or 0
+    
+    @staticmethod
+    def versao_da_requisicao():
+        """
+        Retorna a versão dos dados lida uma única vez por requisição
+        
+        A primeira leitura (feita pelo ETag, em app/etag.py) fica em `g`, e
+        as rotas e o cache da mesma requisição reaproveitam o valor.
+        
+        Returns:
+            int: Versão atual no início da requisição
+        """
+        if not has_request_context():
+            return Mudancas.versao_atual()
+        if 'versao_despesas' not in g:
+            g.versao_despesas = Mudancas.versao_atual()
+        return g.versao_despesas
+    
+    @staticmethod
+    def descartar_historico():
+        """
+        Descarta as exclusões registradas e exige que clientes com versão
+        anterior recarreguem a listagem, sem fazer commit
+        
+        Returns:
+            int: Nova versão, a menor para a qual ainda há mudanças completas
+        """
+        versao = Mudancas.nova_versao()
+        db.session.execute(sa.delete(DespesaExcluida))
+        db.session.execute(
+            sa.update(VersaoDespesas).where(VersaoDespesas.id == ID_CONTADOR).values(minima=versao)
+        )
+        return versao
+    
+    @staticmethod
+    def registrar_exclusao(despesa_id):
+        """
+        Registra a exclusão de uma despesa com uma nova versão, sem fazer commit
+        
+        Args:
+            despesa_id (int): ID da despesa excluída
+        """
+        versao = Mudancas.nova_versao()
+        db.session.execute(sa.insert(DespesaExcluida).values(despesa_id=despesa_id, versao=versao))
+    
+    @staticmethod
+    def desde(versao, filtros=None, limite=500):
+        """
+        Lista as despesas criadas, alteradas e excluídas depois de uma versão
+        
+        Despesas alteradas que deixaram de atender aos filtros são informadas
+        como removidas, assim como as excluídas.
+        
+        Args:
+            versao (int): Última versão que o cliente já tem
+            filtros (Filtros, optional): Filtros da listagem do cliente
+            limite (int): Máximo de despesas alteradas; acima dele, ou com
+                versão anterior à mínima do contador, o cliente deve
+                recarregar a listagem
+        
+        Returns:
+            dict: versao (atual), despesas (alteradas que atendem aos filtros,
+                no formato da listagem), removidas (IDs) e recarregar (bool)
+        """
+        from app.models.despesa import Despesa
+        
+        atual, minima = db.session.execute(
+            sa.select(VersaoDespesas.versao, VersaoDespesas.minima).where(VersaoDespesas.id == ID_CONTADOR)
+        ).one()
+        # Cliente à frente do servidor (ex.: banco restaurado) ou anterior às
+        # exclusões ainda registradas: recarrega tudo
+        if versao > atual or versao < minima:
+            return {'versao': atual, 'despesas': [], 'removidas': [], 'recarregar': True}
+        
+        # Escritas que terminarem durante a consulta ficam para a próxima (versão > atual)
+        intervalo = sa.and_(DespesaModel.versao > versao, DespesaModel.versao <= atual)
+        alteradas = db.session.query(DespesaModel.id).filter(intervalo).union_all(
+            db.session.query(DespesaExcluida.despesa_id)
+            .filter(DespesaExcluida.versao > versao, DespesaExcluida.versao <= atual)
+        )
+        # Uma linha a mais basta para saber se o limite foi ultrapassado
+        linhas_alteradas = alteradas.limit(limite + 1).all()
+        if len(linhas_alteradas) > limite:
+            return {'versao': atual, 'despesas': [], 'removidas': [], 'recarregar': True}
+        
+        ids = {despesa_id for (despesa_id,) in linhas_alteradas}
+        despesas = []
+        if ids:
+            query = Despesa._filtrar(Despesa._consulta_projetada().filter(intervalo), filtros)
+            linhas = query.order_by(DespesaModel.data.desc(), DespesaModel.id.desc()).all()
+            despesas = Despesa._formatar_linhas(linhas)
+        
+        # Um ID excluído pode voltar a existir (o SQLite reaproveita o maior rowid)
+        presentes = {despesa['id'] for despesa in despesas}
+        return {
+            'versao': atual,
+            'despesas': despesas,
+            'removidas': sorted(ids - presentes),
+            'recarregar': False
+        }
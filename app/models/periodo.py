@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Cálculo dos intervalos de data usados pelos filtros de período
+
+"Hoje" é a data no fuso horário configurado em APP_TIMEZONE (padrão
+America/Sao_Paulo), e não no relógio do servidor, que em containers e
+instâncias na nuvem costuma estar em UTC.
+"""
+
+import os
+from datetime import datetime, timedelta
+from zoneinfo import ZoneInfo
+
+# Fuso horário usado para definir "hoje" nos filtros de período
+FUSO_HORARIO = ZoneInfo(os.getenv('APP_TIMEZONE', 'America/Sao_Paulo'))
+
+def data_atual():
+    """
+    Data de hoje no fuso horário da aplicação
+    
+    Returns:
+        date: Data atual em APP_TIMEZONE
+    """
+    return datetime.now(FUSO_HORARIO).date()
+
+def intervalo_periodo(periodo, hoje=None):
+    """
+    Converte um período em um intervalo semiaberto [inicio, fim)
+    
+    O intervalo é aplicado direto sobre a coluna `data`
+    (`data >= inicio AND data < fim`), sem funções em volta da coluna,
+    para que o banco possa usar os índices em `data` (range scan).
+    
+    Args:
+        periodo (str): Período (diario, semanal, mensal, anual)
+        hoje (date, optional): Data de referência (padrão: `data_atual()`)
+    
+    Returns:
+        tuple: (inicio, fim) ou (None, None) se o período não for reconhecido
+    """
+    hoje = hoje or data_atual()
+    amanha = hoje + timedelta(days=1)
+    
+    if periodo == 'diario':
+        # Despesas do dia atual
+        return hoje, amanha
+    if periodo == 'semanal':
+        # Despesas da última semana (7 dias)
+        return hoje - timedelta(days=7), amanha
+    if periodo == 'mensal':
+        # Despesas do mês atual
+        inicio_mes = hoje.replace(day=1)
+        proximo_mes = (inicio_mes + timedelta(days=32)).replace(day=1)
+        return inicio_mes, proximo_mes
+    if periodo == 'anual':
+        # Despesas do ano atual
+        return hoje.replace(month=1, day=1), hoje.replace(year=hoje.year + 1, month=1, day=1)
+    
+    return None, None
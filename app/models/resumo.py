@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Manutenção do resumo diário de despesas (tabela despesas_resumo_diario)
+
+O resumo guarda total e quantidade de despesas por (data, categoria) e é
+atualizado na mesma transação das escritas em `despesas`. As estatísticas
+consultam o resumo, que tem no máximo uma linha por dia e categoria, em vez
+de agregar a tabela de despesas inteira.
+"""
+
+from app.models.database import db, Despesa as DespesaModel, ResumoDiario
+from app.models.dinheiro import formatar_centavos
+from app.models.mudancas import Mudancas
+from app.cache import cache
+from sqlalchemy.dialects import mysql, sqlite
+import sqlalchemy as sa
+
+# Chave usada no resumo para despesas sem categoria
+SEM_CATEGORIA = 0
+
+class Resumo:
+    """
+    Classe para manutenção do resumo diário de despesas por categoria
+    """
+    
+    @staticmethod
+    def registrar(data, categoria_id, valor, contagem=1):
+        """
+        Soma uma variação ao resumo do dia/categoria, sem fazer commit
+        
+        Args:
+            data (date): Data da despesa
+            categoria_id (int): ID da categoria (None para sem categoria)
+            valor (int): Variação do total em centavos (negativa ao remover uma despesa)
+            contagem (int): Variação da quantidade de despesas
+        """
+        Resumo.registrar_varios({(data, categoria_id): (valor, contagem)})
+    
+    @staticmethod
+    def registrar_varios(variacoes):
+        """
+        Aplica várias variações ao resumo com um único upsert, sem fazer commit
+        
+        Args:
+            variacoes (dict): {(data, categoria_id): (valor em centavos, contagem)}
+        """
+        if not variacoes:
+            return
+        
+        linhas = [
+            {
+                'data': data,
+                'categoria_id': categoria_id or SEM_CATEGORIA,
+                'total_centavos': valor,
+                'contagem': contagem
+            }
+            for (data, categoria_id), (valor, contagem) in variacoes.items()
+        ]
+        
+        dialeto = db.session.get_bind().dialect.name
+        tabela = ResumoDiario.__table__
+        
+        if dialeto == 'mysql':
+            stmt = mysql.insert(tabela)
+            stmt = stmt.on_duplicate_key_update(
+                total_centavos=tabela.c.total_centavos + stmt.inserted.total_centavos,
+                contagem=tabela.c.contagem + stmt.inserted.contagem
+            )
+        elif dialeto == 'sqlite':
+            stmt = sqlite.insert(tabela)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[tabela.c.data, tabela.c.categoria_id],
+                set_={
+                    'total_centavos': tabela.c.total_centavos + stmt.excluded.total_centavos,
+                    'contagem': tabela.c.contagem + stmt.excluded.contagem
+                }
+            )
+        else:
+            # Outros bancos: atualiza e insere somente as linhas que não existiam
+            for linha in linhas:
+                atualizadas = db.session.execute(
+                    sa.update(tabela)
+                    .where(tabela.c.data == linha['data'], tabela.c.categoria_id == linha['categoria_id'])
+                    .values(total_centavos=tabela.c.total_centavos + linha['total_centavos'], contagem=tabela.c.contagem + linha['contagem'])
+                ).rowcount
+                if not atualizadas:
+                    db.session.execute(sa.insert(tabela), linha)
+            return
+        
+        db.session.execute(stmt, linhas)
+    
+    @staticmethod
+    def _agregado_bruto():
+        """
+        SELECT que agrega a tabela de despesas no formato do resumo
+        """
+        categoria = sa.func.coalesce(DespesaModel.categoria_id, SEM_CATEGORIA)
+        return sa.select(
+            DespesaModel.data,
+            categoria.label('categoria_id'),
+            sa.func.sum(DespesaModel.valor_centavos).label('total_centavos'),
+            sa.func.count().label('contagem')
+        ).group_by(DespesaModel.data, categoria)
+    
+    @staticmethod
+    def reconstruir(versionar=True):
+        """
+        Recria o resumo inteiro a partir da tabela de despesas
+        
+        Os totais podem mudar, então a reconstrução ganha uma nova versão dos
+        dados, como as escritas em despesas: ETags e caches de outros
+        processos e servidores deixam de valer.
+        
+        Args:
+            versionar (bool): Incrementa a versão dos dados (as migrações
+                anteriores à que cria o contador passam False)
+        
+        Returns:
+            int: Quantidade de linhas do resumo após a reconstrução
+        """
+        try:
+            if versionar:
+                Mudancas.nova_versao()
+            db.session.execute(sa.delete(ResumoDiario))
+            db.session.execute(
+                sa.insert(ResumoDiario).from_select(
+                    ['data', 'categoria_id', 'total_centavos', 'contagem'],
+                    Resumo._agregado_bruto()
+                )
+            )
+            db.session.commit()
+            cache.invalidar()
+            return db.session.query(sa.func.count()).select_from(ResumoDiario).scalar()
+        except Exception as e:
+            db.session.rollback()
+            print(f"Erro ao reconstruir resumo diário: {e}")
+            raise
+    
+    @staticmethod
+    def verificar():
+        """
+        Compara o resumo com a agregação da tabela de despesas
+        
+        Os totais são inteiros em centavos, então a comparação é exata.
+        
+        Returns:
+            list: Divergências encontradas, uma por (data, categoria_id)
+        """
+        bruto = {
+            (linha.data, linha.categoria_id): (linha.total_centavos, linha.contagem)
+            for linha in db.session.execute(Resumo._agregado_bruto())
+        }
+        resumo = {
+            (linha.data, linha.categoria_id): (linha.total_centavos, linha.contagem)
+            for linha in ResumoDiario.query.filter(ResumoDiario.contagem != 0)
+        }
+        
+        divergencias = []
+        for chave in sorted(set(bruto) | set(resumo)):
+            total_bruto, contagem_bruta = bruto.get(chave, (0, 0))
+            total_resumo, contagem_resumo = resumo.get(chave, (0, 0))
+            if contagem_bruta != contagem_resumo or total_bruto != total_resumo:
+                divergencias.append({
+                    'data': chave[0].isoformat(),
+                    'categoria_id': chave[1],
+                    'total_despesas': formatar_centavos(total_bruto),
+                    'total_resumo': formatar_centavos(total_resumo),
+                    'contagem_despesas': contagem_bruta,
+                    'contagem_resumo': contagem_resumo
+                })
+        return divergencias
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Separação de leituras e escritas entre o banco primário e uma réplica
+
+Com DB_REPLICA_URL definida, `init_db` registra a réplica como o bind
+`replica`, e a sessão (`SessaoRoteada`, em app/models/database.py) envia a
+ela as consultas das rotas marcadas com `@somente_leitura`. Todo o resto
+vai para o primário: INSERT/UPDATE/DELETE e flush do ORM, os métodos de
+escrita marcados com `@no_primario`, scripts e migrações.
+
+Leitura das próprias escritas: uma requisição que escreve lê do primário
+até o fim e devolve o cookie `ler_primario_ate`. Enquanto ele vale
+(DB_REPLICA_JANELA segundos), as leituras desse cliente também vão para o
+primário. Para os demais clientes, o que é lido da réplica logo depois de
+uma escrita (geração de escrita mais nova que a janela) não entra no cache
+nem recebe ETag, para que o atraso da réplica não fique fixado até a
+próxima escrita.
+
+Configuração (variáveis de ambiente):
+    DB_REPLICA_URL: URI SQLAlchemy da réplica (sem ela, tudo vai para o primário)
+    DB_REPLICA_JANELA: segundos de leitura no primário depois de uma escrita (padrão 5)
+"""
+
+import functools
+import os
+import time
+from flask import current_app, g, has_request_context, request
+
+# Nome do bind da réplica em SQLALCHEMY_BINDS
+BIND_REPLICA = 'replica'
+
+# Cookie com o instante (epoch) até o qual o cliente lê do primário
+COOKIE_PRIMARIO = 'ler_primario_ate'
+
+def replica_configurada():
+    """
+    Indica se a aplicação atual tem uma réplica de leitura
+    """
+    return BIND_REPLICA in current_app.config.get('SQLALCHEMY_BINDS', {})
+
+def janela():
+    """
+    Segundos, depois de uma escrita, em que a réplica pode estar atrasada
+    """
+    return current_app.config['DB_REPLICA_JANELA']
+
+def lendo_da_replica():
+    """
+    Indica se as consultas da requisição atual vão para a réplica
+    """
+    return has_request_context() and g.get('ler_da_replica', False)
+
+def _cliente_escreveu_recentemente():
+    try:
+        return float(request.cookies.get(COOKIE_PRIMARIO, 0)) > time.time()
+    except ValueError:
+        return False
+
+def somente_leitura(funcao):
+    """
+    Decorador de rota que só lê: as consultas vão para a réplica, se houver
+    
+    O cliente que escreveu há menos de DB_REPLICA_JANELA segundos continua
+    lendo do primário.
+    """
+    @functools.wraps(funcao)
+    def envoltorio(*args, **kwargs):
+        if replica_configurada() and not _cliente_escreveu_recentemente():
+            g.ler_da_replica = True
+        return funcao(*args, **kwargs)
+    return envoltorio
+
+def no_primario(funcao):
+    """
+    Decorador de método de escrita: ele e o restante da requisição usam o
+    primário, e o cliente passa a ler do primário durante a janela
+    """
+    @functools.wraps(funcao)
+    def envoltorio(*args, **kwargs):
+        if has_request_context():
+            g.ler_da_replica = False
+            g.escreveu = True
+        return funcao(*args, **kwargs)
+    return envoltorio
+
+class Replica:
+    """
+    Cookie de leitura das próprias escritas
+    """
+    
+    def init_app(self, app):
+        """
+        Lê a janela de atraso e registra o cookie nas respostas de escrita
+        
+        Args:
+            app (Flask): Aplicação a configurar
+        """
+        app.config.setdefault('DB_REPLICA_JANELA', float(os.getenv('DB_REPLICA_JANELA', '5')))
+        app.after_request(self._marcar_cliente)
+    
+    @staticmethod
+    def _marcar_cliente(resposta):
+        if g.get('escreveu') and replica_configurada():
+            resposta.set_cookie(COOKIE_PRIMARIO, f"{time.time() + janela():.3f}",
+                                max_age=int(janela()) + 1, httponly=True, samesite='Lax')
+        return resposta
+
+# Instância única usada pela aplicação
+replica = Replica()
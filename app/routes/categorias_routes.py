@@ -7,11 +7,17 @@ Rotas para manipulação de categorias
 
 from flask import Blueprint, jsonify
 from app.models.categoria import Categoria
+from app.etag import condicional
+from app.replica import somente_leitura
+from app.diagnostico import orcamento_consultas
 
 # Criação do blueprint para as rotas de categorias
 bp = Blueprint('categorias', __name__)
 
 @bp.route('/', methods=['GET'])
+@somente_leitura
+@condicional
+@orcamento_consultas(1)
 def listar_categorias():
     """
     Lista todas as categorias disponíveis
@@ -20,6 +26,9 @@ def listar_categorias():
     return jsonify(categorias)
 
 @bp.route('/<int:categoria_id>', methods=['GET'])
+@somente_leitura
+@condicional
+@orcamento_consultas(1)
 def obter_categoria(categoria_id):
     """
     Obtém uma categoria específica pelo ID
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Rota do painel: tudo o que a página inicial precisa em uma só requisição
+"""
+
+from flask import Blueprint, request, jsonify
+from app.models.categoria import Categoria
+from app.models.despesa import Despesa
+from app.models.estatistica import Estatistica
+from app.models.filtros import Filtros
+from app.models.mudancas import Mudancas
+from app.models.dinheiro import em_reais
+from app.routes.despesas_routes import LIMITE_PADRAO, LIMITE_MAXIMO
+from app.routes.estatisticas_routes import VARREDURAS_RESUMO, com_filtro_valor
+from app.etag import condicional
+from app.replica import somente_leitura
+from app.diagnostico import orcamento_consultas
+
+# Criação do blueprint para a rota do painel
+bp = Blueprint('dashboard', __name__)
+
+@bp.route('/', methods=['GET'])
+@somente_leitura
+@condicional
+@orcamento_consultas(3, com_filtro_valor(VARREDURAS_RESUMO))
+def painel():
+    """
+    Retorna o total, as despesas por categoria, a primeira página de despesas,
+    a lista de categorias e a versão dos dados
+    
+    São dois comandos SQL (o agrupamento por categoria, de onde sai também o
+    total, e a primeira página) mais a lista de categorias, que normalmente
+    já está no cache. A versão é a mesma lida pelo ETag antes da rota, sem
+    consulta própria: com ela o cliente pede depois só as mudanças
+    (GET /api/despesas/mudancas).
+    
+    Parâmetros de query:
+        Os mesmos filtros da listagem de despesas (periodo, inicio, fim,
+        categoria_id, valor_min, valor_max) e `limite` (padrão 50, máximo 500)
+    """
+    try:
+        filtros = Filtros.de_argumentos(request.args)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    
+    limite = request.args.get('limite', LIMITE_PADRAO, type=int)
+    if limite < 1 or limite > LIMITE_MAXIMO:
+        return jsonify({"error": f"Limite deve estar entre 1 e {LIMITE_MAXIMO}"}), 400
+    
+    versao = Mudancas.versao_da_requisicao()
+    resumo = Estatistica.resumo(filtros)
+    despesas, proximo_cursor = Despesa.listar(filtros, limite)
+    
+    return jsonify({
+        "total": em_reais(resumo['total_centavos']),
+        "total_centavos": resumo['total_centavos'],
+        "por_categoria": resumo['por_categoria'],
+        "despesas": despesas,
+        "limite": limite,
+        "next_cursor": proximo_cursor,
+        "categorias": Categoria.listar(),
+        "versao": versao
+    })
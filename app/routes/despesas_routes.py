@@ -5,22 +5,163 @@
 Rotas para manipulação de despesas
 """
 
-from flask import Blueprint, request, jsonify
+import codecs
+from flask import Blueprint, Response, request, jsonify, stream_with_context
 from app.models.despesa import Despesa
+from app.models.filtros import Filtros
+from app.models.importacao import Importacao
+from app.models.mudancas import Mudancas
+from app.models.estatistica import Estatistica
+from app.models.dinheiro import em_reais
+from app.etag import condicional
+from app.replica import somente_leitura
+from app.diagnostico import orcamento_consultas
+from app.routes.estatisticas_routes import VARREDURAS_RESUMO, com_filtro_valor
 
 # Criação do blueprint para as rotas de despesas
 bp = Blueprint('despesas', __name__)
 
+# Tamanho de página padrão e máximo da listagem paginada
+LIMITE_PADRAO = 50
+LIMITE_MAXIMO = 500
+
 @bp.route('/', methods=['GET'])
+@somente_leitura
+@condicional
+@orcamento_consultas(1)
 def listar_despesas():
     """
-    Lista todas as despesas, com opção de filtro por período
+    Lista as despesas paginadas por cursor, com filtros de período, datas,
+    categorias e valor
+    
+    Parâmetros de query:
+        periodo: diario, semanal, mensal ou anual
+        inicio, fim: intervalo de datas AAAA-MM-DD (inclusive)
+        categoria_id: IDs de categoria, repetido ou separado por vírgula (0 = sem categoria)
+        valor_min, valor_max: faixa de valor, em módulo
+        limite: quantidade de despesas por página (padrão 50, máximo 500)
+        cursor: valor de `next_cursor` retornado pela página anterior
+    """
+    try:
+        filtros = Filtros.de_argumentos(request.args)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    
+    limite = request.args.get('limite', LIMITE_PADRAO, type=int)
+    if limite < 1 or limite > LIMITE_MAXIMO:
+        return jsonify({"error": f"Limite deve estar entre 1 e {LIMITE_MAXIMO}"}), 400
+    
+    try:
+        despesas, proximo_cursor = Despesa.listar(filtros, limite, request.args.get('cursor'))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    
+    return jsonify({
+        "despesas": despesas,
+        "limite": limite,
+        "next_cursor": proximo_cursor
+    })
+
+@bp.route('/busca', methods=['GET'])
+@somente_leitura
+@condicional
+@orcamento_consultas(2)
+def buscar_despesas():
+    """
+    Busca despesas pela descrição, ordenadas por relevância
+    
+    Parâmetros de query:
+        q: texto buscado (cada palavra vale como prefixo; acentos e maiúsculas são ignorados)
+        limite, cursor: paginação, como na listagem
+        Demais filtros da listagem (periodo, inicio, fim, categoria_id, valor_min, valor_max)
+    """
+    limite = request.args.get('limite', LIMITE_PADRAO, type=int)
+    if limite < 1 or limite > LIMITE_MAXIMO:
+        return jsonify({"error": f"Limite deve estar entre 1 e {LIMITE_MAXIMO}"}), 400
+    
+    try:
+        filtros = Filtros.de_argumentos(request.args)
+        despesas, proximo_cursor, ordem = Despesa.buscar(
+            request.args.get('q'), filtros, limite, request.args.get('cursor')
+        )
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    
+    return jsonify({
+        "despesas": despesas,
+        "limite": limite,
+        "next_cursor": proximo_cursor,
+        "ordem": ordem
+    })
+
+@bp.route('/mudancas', methods=['GET'])
+@somente_leitura
+@condicional
+@orcamento_consultas(4, com_filtro_valor(VARREDURAS_RESUMO))
+def mudancas_despesas():
+    """
+    Retorna só as despesas criadas, alteradas ou excluídas depois de uma versão
+    
+    O cliente guarda a `versao` do painel (ou da última chamada) e aplica à
+    sua cópia da listagem as despesas retornadas e a remoção dos IDs em
+    `removidas`; o `total` já considera as mudanças. Com `recarregar`
+    verdadeiro (mudanças demais, ou versão desconhecida) o cliente deve
+    carregar a listagem de novo.
+    
+    Parâmetros de query:
+        desde: última versão que o cliente já tem (obrigatório)
+        Os mesmos filtros da listagem (periodo, inicio, fim, categoria_id, valor_min, valor_max)
     """
-    periodo = request.args.get('periodo')
-    despesas = Despesa.listar(periodo)
-    return jsonify(despesas)
+    desde = request.args.get('desde', type=int)
+    if desde is None or desde < 0:
+        return jsonify({"error": "Informe em 'desde' a última versão recebida"}), 400
+    
+    try:
+        filtros = Filtros.de_argumentos(request.args)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    
+    mudancas = Mudancas.desde(desde, filtros, LIMITE_MAXIMO)
+    total = Estatistica.total_despesas(filtros)
+    mudancas.update({"total": em_reais(total), "total_centavos": total})
+    return jsonify(mudancas)
+
+# Tipos de conteúdo dos formatos de exportação
+FORMATOS_EXPORTACAO = {
+    'csv': 'text/csv; charset=utf-8',
+    'ndjson': 'application/x-ndjson; charset=utf-8'
+}
+
+@bp.route('/exportar', methods=['GET'])
+@somente_leitura
+def exportar_despesas():
+    """
+    Exporta as despesas em CSV ou NDJSON, enviadas em streaming
+    
+    Parâmetros de query:
+        formato: csv (padrão) ou ndjson
+        periodo, inicio, fim, categoria_id, valor_min, valor_max: mesmos filtros da listagem
+    """
+    formato = request.args.get('formato', 'csv')
+    if formato not in FORMATOS_EXPORTACAO:
+        return jsonify({"error": "Formato deve ser csv ou ndjson"}), 400
+    
+    try:
+        filtros = Filtros.de_argumentos(request.args)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    
+    partes = Despesa.exportar(formato, filtros)
+    return Response(
+        stream_with_context(partes),
+        content_type=FORMATOS_EXPORTACAO[formato],
+        headers={'Content-Disposition': f'attachment; filename=despesas.{formato}'}
+    )
 
 @bp.route('/<int:despesa_id>', methods=['GET'])
+@somente_leitura
+@condicional
+@orcamento_consultas(1)
 def obter_despesa(despesa_id):
     """
     Obtém uma despesa específica pelo ID
@@ -31,6 +172,7 @@ def obter_despesa(despesa_id):
     return jsonify({"error": "Despesa não encontrada"}), 404
 
 @bp.route('/', methods=['POST'])
+@orcamento_consultas(5)
 def criar_despesa():
     """
     Cria uma nova despesa
@@ -49,7 +191,69 @@ def criar_despesa():
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+# Quantidade máxima de despesas aceitas por requisição de lote
+LOTE_MAXIMO = 50000
+
+def _orcamento_lote():
+    # Categorias válidas + nova versão (2) + INSERTs (e leitura dos IDs no MySQL) + resumo diário
+    itens = request.get_json(silent=True)
+    return 4 + Despesa.comandos_de_insercao(len(itens)) if isinstance(itens, list) else 0
+
+@bp.route('/lote', methods=['POST'])
+@orcamento_consultas(_orcamento_lote)
+def criar_despesas_lote():
+    """
+    Cria várias despesas em uma única transação
+    
+    Recebe uma lista de despesas no mesmo formato de POST /api/despesas/.
+    Se qualquer item for inválido, nada é gravado e a resposta lista os
+    erros de cada item.
+    """
+    itens = request.get_json(silent=True)
+    if not isinstance(itens, list) or not itens:
+        return jsonify({"error": "Envie uma lista não vazia de despesas"}), 400
+    if len(itens) > LOTE_MAXIMO:
+        return jsonify({"error": f"Máximo de {LOTE_MAXIMO} despesas por lote"}), 413
+    
+    linhas, erros = Despesa.validar_lote(itens)
+    if erros:
+        return jsonify({"error": "Lote contém itens inválidos", "erros": erros}), 400
+    
+    try:
+        ids = Despesa.criar_lote(linhas)
+        return jsonify({"ids": ids, "message": f"{len(ids)} despesas criadas com sucesso"}), 201
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@bp.route('/importar', methods=['POST'])
+def importar_extrato():
+    """
+    Importa um extrato bancário CSV ou OFX enviado como multipart (campo "arquivo")
+    
+    Campos opcionais do formulário:
+        formato: csv ou ofx (padrão: extensão do arquivo)
+        encoding: codificação do arquivo (padrão utf-8-sig)
+    
+    O arquivo é processado em streaming, com commit a cada lote; a resposta
+    traz o relatório da importação (lidas, importadas, duplicadas, ...).
+    """
+    arquivo = request.files.get('arquivo')
+    if not arquivo or not arquivo.filename:
+        return jsonify({"error": "Envie o extrato no campo 'arquivo'"}), 400
+    
+    formato = request.form.get('formato') or arquivo.filename.rsplit('.', 1)[-1].lower()
+    
+    try:
+        leitor = codecs.getreader(request.form.get('encoding', 'utf-8-sig'))(arquivo.stream, errors='replace')
+        relatorio = Importacao.executar(leitor, formato)
+        return jsonify(relatorio)
+    except (LookupError, ValueError) as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
 @bp.route('/<int:despesa_id>', methods=['PUT'])
+@orcamento_consultas(7)
 def atualizar_despesa(despesa_id):
     """
     Atualiza uma despesa existente
@@ -76,6 +280,7 @@ def atualizar_despesa(despesa_id):
         return jsonify({"error": str(e)}), 500
 
 @bp.route('/<int:despesa_id>', methods=['DELETE'])
+@orcamento_consultas(7)
 def excluir_despesa(despesa_id):
     """
     Exclui uma despesa
@@ -5,26 +5,91 @@
 Rotas para obtenção de estatísticas
 """
 
+from datetime import timedelta
 from flask import Blueprint, request, jsonify
 from app.models.estatistica import Estatistica
+from app.models.filtros import Filtros
+from app.models.dinheiro import em_reais
+from app.etag import condicional
+from app.replica import somente_leitura
+from app.diagnostico import orcamento_consultas, VARREDURAS_PERMITIDAS
+
+# O resumo diário tem uma linha por dia e categoria; sem filtro de período
+# (total geral) a leitura completa dele é esperada
+VARREDURAS_RESUMO = VARREDURAS_PERMITIDAS + ('despesas_resumo_diario',)
+
+def com_filtro_valor(permitidas):
+    # Com filtro de valor a agregação é feita sobre despesas, e sem datas ou
+    # categorias não há índice que restrinja a leitura
+    def varreduras():
+        if request.args.get('valor_min') or request.args.get('valor_max'):
+            return permitidas + ('despesas',)
+        return permitidas
+    return varreduras
 
 # Criação do blueprint para as rotas de estatísticas
 bp = Blueprint('estatisticas', __name__)
 
 @bp.route('/total', methods=['GET'])
+@somente_leitura
+@condicional
+@orcamento_consultas(1, com_filtro_valor(VARREDURAS_RESUMO))
 def total_despesas():
     """
     Retorna o total de despesas para um determinado período
+    
+    Aceita os mesmos filtros da listagem de despesas (periodo, inicio, fim,
+    categoria_id, valor_min, valor_max).
     """
-    periodo = request.args.get('periodo')
-    total = Estatistica.total_despesas(periodo)
-    return jsonify({"total": total})
+    try:
+        filtros = Filtros.de_argumentos(request.args)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    
+    total = Estatistica.total_despesas(filtros)
+    return jsonify({"total": em_reais(total), "total_centavos": total})
 
 @bp.route('/por-categoria', methods=['GET'])
+@somente_leitura
+@condicional
+@orcamento_consultas(1, com_filtro_valor(VARREDURAS_RESUMO))
 def despesas_por_categoria():
     """
     Retorna as despesas agrupadas por categoria para um determinado período
+    
+    Aceita os mesmos filtros da listagem de despesas.
     """
-    periodo = request.args.get('periodo')
-    dados = Estatistica.despesas_por_categoria(periodo)
+    try:
+        filtros = Filtros.de_argumentos(request.args)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    
+    dados = Estatistica.despesas_por_categoria(filtros)
     return jsonify(dados)
+
+@bp.route('/serie', methods=['GET'])
+@somente_leitura
+@condicional
+@orcamento_consultas(1, com_filtro_valor(VARREDURAS_PERMITIDAS))
+def serie_temporal():
+    """
+    Retorna a série temporal dos totais de despesas, com os intervalos sem
+    despesas preenchidos com zero
+    
+    Parâmetros (query string):
+        granularidade: dia, semana ou mes (padrão: dia)
+        inicio, fim: intervalo em AAAA-MM-DD (padrão: 30 dias, 12 semanas ou 12 meses até hoje)
+        categoria_id, valor_min, valor_max, periodo: mesmos filtros da listagem de despesas
+    """
+    granularidade = request.args.get('granularidade', 'dia')
+    
+    try:
+        filtros = Filtros.de_argumentos(request.args)
+        
+        # Valida antes de consultar, para responder 400 sem ir ao banco
+        de, ate = filtros.intervalo()
+        Estatistica.intervalo_serie(granularidade, de, ate - timedelta(days=1) if ate else None)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    
+    return jsonify(Estatistica.serie(granularidade, filtros))
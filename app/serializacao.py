@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Serialização JSON das respostas com um codificador em C, quando disponível
+
+O provedor `ProvedorJSON` substitui o `json` da biblioteca padrão pelo
+orjson nas respostas (`jsonify`) e em `app.json.dumps/loads`. A saída é
+equivalente: chaves ordenadas como no Flask, datas no formato HTTP e
+Decimal/UUID pelo mesmo `default` do Flask. Valores que o orjson não
+representa (inteiros acima de 64 bits, chaves de tipos não suportados)
+caem para a biblioteca padrão naquela resposta. Os dois backends emitem
+UTF-8 sem escapar acentos.
+
+Configuração (variáveis de ambiente):
+    JSON_PROVIDER: auto (orjson se instalado), orjson ou padrao (padrão auto)
+"""
+
+import logging
+import os
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+logger = logging.getLogger(__name__)
+
+# Backends aceitos em JSON_PROVIDER
+BACKENDS = ('auto', 'orjson', 'padrao')
+
+class ProvedorJSON(DefaultJSONProvider):
+    """
+    Provedor JSON do Flask que usa o orjson e cai para a biblioteca padrão
+    """
+    
+    # Definido por `configurar_json`; com False o provedor é o do Flask
+    usar_orjson = orjson is not None
+    
+    # O orjson sempre emite UTF-8; o json padrão faz o mesmo, para a saída não
+    # depender do backend
+    ensure_ascii = False
+    
+    def _opcoes(self, indentar=False):
+        # Datas passam pelo `default` do Flask (formato HTTP), como no json padrão
+        opcoes = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+        if self.sort_keys:
+            opcoes |= orjson.OPT_SORT_KEYS
+        if indentar:
+            opcoes |= orjson.OPT_INDENT_2
+        return opcoes
+    
+    def _codificar(self, obj, indentar=False):
+        """
+        Serializa com o orjson, ou retorna None se o valor não for suportado
+        """
+        try:
+            return orjson.dumps(obj, default=self.default, option=self._opcoes(indentar))
+        except orjson.JSONEncodeError:
+            return None
+    
+    def dumps(self, obj, **kwargs):
+        # Argumentos do json padrão (cls, separators...) ficam com a biblioteca padrão
+        if self.usar_orjson and not kwargs:
+            codificado = self._codificar(obj)
+            if codificado is not None:
+                return codificado.decode('utf-8')
+        return super().dumps(obj, **kwargs)
+    
+    def loads(self, s, **kwargs):
+        if self.usar_orjson and not kwargs:
+            return orjson.loads(s)
+        return super().loads(s, **kwargs)
+    
+    def response(self, *args, **kwargs):
+        if not self.usar_orjson:
+            return super().response(*args, **kwargs)
+        
+        obj = self._prepare_response_obj(args, kwargs)
+        indentar = (self.compact is None and self._app.debug) or self.compact is False
+        codificado = self._codificar(obj, indentar)
+        if codificado is None:
+            return super().response(*args, **kwargs)
+        # Corpo em bytes direto do orjson, sem decodificar e recodificar a string
+        return self._app.response_class(codificado + b'\n', mimetype=self.mimetype)
+
+def configurar_json(app):
+    """
+    Instala o `ProvedorJSON` na aplicação conforme JSON_PROVIDER
+    
+    Args:
+        app (Flask): Aplicação a configurar
+    
+    Raises:
+        ValueError: Se JSON_PROVIDER tiver um valor desconhecido
+    """
+    backend = os.getenv('JSON_PROVIDER', 'auto')
+    if backend not in BACKENDS:
+        raise ValueError(f"JSON_PROVIDER deve ser um de: {', '.join(BACKENDS)}")
+    
+    if backend == 'orjson' and orjson is None:
+        logger.warning("JSON_PROVIDER=orjson, mas o orjson não está instalado; usando o json padrão")
+    
+    provedor = ProvedorJSON(app)
+    provedor.usar_orjson = orjson is not None and backend != 'padrao'
+    app.json = provedor
@@ -0,0 +1,355 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Benchmark de carga de ponta a ponta da API
+
+Sobe a aplicação sobre um banco local (ou usa um servidor já em execução,
+com --url) e dispara clientes concorrentes contra todos os endpoints de
+app/routes/, em um mix de leituras e escritas parecido com o uso do
+frontend. Mostra vazão e latências p50/p95/p99 por endpoint e grava o
+resultado em JSON, que pode ser comparado com uma linha de base anterior.
+
+Uso:
+    python -m benchmarks.carga --preparar 10000 --duracao 30
+    python -m benchmarks.carga --comparar benchmarks/baselines/sqlite-10k.json
+"""
+
+import argparse
+import http.client
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
+from urllib.parse import quote, urlsplit
+
+from benchmarks.startup import RAIZ, porta_livre, iniciar_servidor, aguardar_ping
+
+# Peso de cada endpoint no mix de requisições
+MIX_PADRAO = {
+    'ping': 2,
+    'despesas.listar': 20,
+    'despesas.listar_periodo': 10,
+    'despesas.obter': 10,
+    'despesas.exportar': 2,
+    'despesas.buscar': 5,
+    'despesas.criar': 6,
+    'despesas.atualizar': 4,
+    'despesas.excluir': 4,
+    'despesas.lote': 1,
+    'despesas.importar': 1,
+    'categorias.listar': 10,
+    'categorias.obter': 5,
+    'estatisticas.total': 10,
+    'estatisticas.por_categoria': 10,
+    'estatisticas.serie': 5,
+    'dashboard': 5
+}
+
+# Prefixos buscados em /api/despesas/busca (amplos e restritos)
+TERMOS_BUSCA = ['uber', 'farm', 'mercado', 'conta luz', 'restaurante']
+
+# Despesas por requisição nos endpoints de lote e importação
+ITENS_POR_LOTE = 20
+
+def percentil(valores, p):
+    """
+    Percentil pelo método do posto mais próximo (valores já ordenados)
+    """
+    if not valores:
+        return 0.0
+    posicao = max(0, min(len(valores) - 1, int(round(p / 100 * len(valores) + 0.5)) - 1))
+    return valores[posicao]
+
+class Cliente:
+    """
+    Cliente HTTP keep-alive que executa o mix de requisições e registra as latências
+    """
+    
+    def __init__(self, host, porta, semente, mix, ids, categorias):
+        self.host = host
+        self.porta = porta
+        self.rng = random.Random(semente)
+        self.nomes = list(mix)
+        self.pesos = [mix[nome] for nome in self.nomes]
+        self.ids = ids
+        self.categorias = categorias
+        self.criadas = []
+        self.latencias = {nome: [] for nome in self.nomes}
+        self.erros = {nome: 0 for nome in self.nomes}
+        self.conexao = http.client.HTTPConnection(host, porta, timeout=60)
+    
+    def _despesa(self):
+        return {
+            'descricao': f"Carga {self.rng.randrange(10 ** 6)}",
+            'valor': round(self.rng.uniform(1, 300), 2),
+            'data': (datetime.now().date() - timedelta(days=self.rng.randrange(60))).isoformat(),
+            'categoria_id': self.rng.choice(self.categorias)
+        }
+    
+    def _requisicao(self, nome):
+        """
+        Monta (método, caminho, corpo, cabeçalhos, status esperados) da requisição
+        """
+        json_ = {'Content-Type': 'application/json'}
+        if nome == 'ping':
+            return 'GET', '/ping', None, {}, (200,)
+        if nome == 'despesas.listar':
+            return 'GET', '/api/despesas/?limite=50', None, {}, (200,)
+        if nome == 'despesas.listar_periodo':
+            return 'GET', '/api/despesas/?periodo=mensal&limite=50', None, {}, (200,)
+        if nome == 'despesas.obter':
+            return 'GET', f'/api/despesas/{self.rng.choice(self.ids)}', None, {}, (200,)
+        if nome == 'despesas.exportar':
+            return 'GET', '/api/despesas/exportar?formato=ndjson&periodo=diario', None, {}, (200,)
+        if nome == 'despesas.criar' or (nome in ('despesas.atualizar', 'despesas.excluir') and not self.criadas):
+            return 'POST', '/api/despesas/', json.dumps(self._despesa()), json_, (201,)
+        if nome == 'despesas.atualizar':
+            return 'PUT', f'/api/despesas/{self.rng.choice(self.criadas)}', json.dumps(self._despesa()), json_, (200,)
+        if nome == 'despesas.excluir':
+            return 'DELETE', f'/api/despesas/{self.criadas.pop()}', None, {}, (200,)
+        if nome == 'despesas.lote':
+            corpo = json.dumps([self._despesa() for _ in range(ITENS_POR_LOTE)])
+            return 'POST', '/api/despesas/lote', corpo, json_, (201,)
+        if nome == 'despesas.importar':
+            return self._importacao()
+        if nome == 'despesas.buscar':
+            return 'GET', f"/api/despesas/busca?q={quote(self.rng.choice(TERMOS_BUSCA))}", None, {}, (200,)
+        if nome == 'categorias.listar':
+            return 'GET', '/api/categorias/', None, {}, (200,)
+        if nome == 'categorias.obter':
+            return 'GET', f'/api/categorias/{self.rng.choice(self.categorias)}', None, {}, (200,)
+        if nome == 'estatisticas.total':
+            return 'GET', '/api/estatisticas/total?periodo=mensal', None, {}, (200,)
+        if nome == 'estatisticas.por_categoria':
+            return 'GET', '/api/estatisticas/por-categoria?periodo=mensal', None, {}, (200,)
+        if nome == 'estatisticas.serie':
+            return 'GET', '/api/estatisticas/serie?granularidade=mes', None, {}, (200,)
+        if nome == 'dashboard':
+            return 'GET', '/api/dashboard/?periodo=mensal', None, {}, (200,)
+        raise ValueError(f"Endpoint desconhecido: {nome}")
+    
+    def _importacao(self):
+        # Extrato CSV com descrições únicas, para não cair na deduplicação
+        linhas = ['data;descricao;valor']
+        for _ in range(ITENS_POR_LOTE):
+            despesa = self._despesa()
+            linhas.append(f"{despesa['data']};Extrato {uuid.uuid4().hex[:12]};-{despesa['valor']}")
+        fronteira = uuid.uuid4().hex
+        corpo = (f'--{fronteira}\r\nContent-Disposition: form-data; name="arquivo"; filename="extrato.csv"\r\n'
+                 f'Content-Type: text/csv\r\n\r\n' + '\n'.join(linhas) + f'\r\n--{fronteira}--\r\n')
+        cabecalhos = {'Content-Type': f'multipart/form-data; boundary={fronteira}'}
+        return 'POST', '/api/despesas/importar?formato=csv', corpo.encode('utf-8'), cabecalhos, (200,)
+    
+    def executar(self, fim):
+        """
+        Executa requisições até o instante `fim` (time.perf_counter)
+        """
+        while time.perf_counter() < fim:
+            nome = self.rng.choices(self.nomes, weights=self.pesos)[0]
+            metodo, caminho, corpo, cabecalhos, esperados = self._requisicao(nome)
+            inicio = time.perf_counter()
+            try:
+                self.conexao.request(metodo, caminho, body=corpo, headers=cabecalhos)
+                resposta = self.conexao.getresponse()
+                conteudo = resposta.read()
+            except (OSError, http.client.HTTPException):
+                self.erros[nome] += 1
+                self.conexao.close()
+                self.conexao = http.client.HTTPConnection(self.host, self.porta, timeout=60)
+                continue
+            self.latencias[nome].append(time.perf_counter() - inicio)
+            
+            if resposta.status not in esperados:
+                self.erros[nome] += 1
+            elif metodo == 'POST' and caminho == '/api/despesas/':
+                self.criadas.append(json.loads(conteudo)['id'])
+            if resposta.getheader('Connection', '').lower() == 'close':
+                self.conexao.close()
+                self.conexao = http.client.HTTPConnection(self.host, self.porta, timeout=60)
+
+def obter_json(host, porta, caminho):
+    conexao = http.client.HTTPConnection(host, porta, timeout=60)
+    conexao.request('GET', caminho)
+    resposta = conexao.getresponse()
+    dados = json.loads(resposta.read())
+    conexao.close()
+    return dados
+
+def executar_carga(host, porta, clientes, duracao, aquecimento, mix, semente):
+    """
+    Dispara os clientes concorrentes e consolida as métricas
+    
+    Returns:
+        dict: Métricas totais e por endpoint
+    """
+    ids = [despesa['id'] for despesa in obter_json(host, porta, '/api/despesas/?limite=500')['despesas']]
+    categorias = [categoria['id'] for categoria in obter_json(host, porta, '/api/categorias/')]
+    if not ids or not categorias:
+        raise RuntimeError("O banco precisa ter despesas e categorias (use --preparar)")
+    
+    def rodar(lista, segundos):
+        fim = time.perf_counter() + segundos
+        threads = [threading.Thread(target=cliente.executar, args=(fim,)) for cliente in lista]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    
+    if aquecimento > 0:
+        rodar([Cliente(host, porta, semente + 1000 + i, mix, ids, categorias) for i in range(clientes)], aquecimento)
+    
+    lista = [Cliente(host, porta, semente + i, mix, ids, categorias) for i in range(clientes)]
+    inicio = time.perf_counter()
+    rodar(lista, duracao)
+    decorrido = time.perf_counter() - inicio
+    
+    def resumo(latencias, erros):
+        latencias.sort()
+        return {
+            'requisicoes': len(latencias),
+            'erros': erros,
+            'vazao_rps': round(len(latencias) / decorrido, 1),
+            'media_ms': round(sum(latencias) / len(latencias) * 1000, 2) if latencias else 0.0,
+            'p50_ms': round(percentil(latencias, 50) * 1000, 2),
+            'p95_ms': round(percentil(latencias, 95) * 1000, 2),
+            'p99_ms': round(percentil(latencias, 99) * 1000, 2)
+        }
+    
+    endpoints = {}
+    todas = []
+    erros_total = 0
+    for nome in mix:
+        latencias = [valor for cliente in lista for valor in cliente.latencias[nome]]
+        erros = sum(cliente.erros[nome] for cliente in lista)
+        todas.extend(latencias)
+        erros_total += erros
+        endpoints[nome] = resumo(latencias, erros)
+    
+    return {'total': resumo(todas, erros_total), 'endpoints': endpoints}
+
+def preparar_banco(quantidade, ambiente, semente):
+    """
+    Aplica as migrações e gera `quantidade` despesas sintéticas no banco
+    """
+    subprocess.run([sys.executable, 'init_db.py'], cwd=RAIZ, env=ambiente, check=True,
+                   stdout=subprocess.DEVNULL)
+    subprocess.run([sys.executable, 'gerar_dados.py', '--quantidade', str(quantidade),
+                    '--semente', str(semente), '--limpar'], cwd=RAIZ, env=ambiente, check=True,
+                   stdout=subprocess.DEVNULL)
+
+def commit_atual():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=RAIZ, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def comparar(atual, base, tolerancia):
+    """
+    Compara o resultado com uma linha de base e imprime as diferenças
+    
+    Returns:
+        list: Endpoints com regressão acima da tolerância
+    """
+    regressoes = []
+    print(f"\nComparação com {base.get('commit')} ({base.get('data')}):")
+    print(f"{'endpoint':<28} {'rps base':>9} {'rps':>9} {'p95 base':>9} {'p95':>9} {'Δp95':>8}")
+    for nome, metricas in [('total', atual['total'])] + list(atual['endpoints'].items()):
+        anterior = base['total'] if nome == 'total' else base['endpoints'].get(nome)
+        if not anterior or not anterior['requisicoes'] or not metricas['requisicoes']:
+            continue
+        variacao = (metricas['p95_ms'] - anterior['p95_ms']) / anterior['p95_ms'] if anterior['p95_ms'] else 0.0
+        marca = ''
+        if variacao > tolerancia or (nome == 'total' and metricas['vazao_rps'] < anterior['vazao_rps'] * (1 - tolerancia)):
+            regressoes.append(nome)
+            marca = ' ⚠️'
+        print(f"{nome:<28} {anterior['vazao_rps']:>9} {metricas['vazao_rps']:>9} "
+              f"{anterior['p95_ms']:>9} {metricas['p95_ms']:>9} {variacao:>+7.0%}{marca}")
+    return regressoes
+
+def imprimir(resultado):
+    print(f"{'endpoint':<28} {'req':>7} {'erros':>6} {'rps':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+    for nome, metricas in list(resultado['endpoints'].items()) + [('total', resultado['total'])]:
+        print(f"{nome:<28} {metricas['requisicoes']:>7} {metricas['erros']:>6} {metricas['vazao_rps']:>8} "
+              f"{metricas['p50_ms']:>8} {metricas['p95_ms']:>8} {metricas['p99_ms']:>8}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de carga de ponta a ponta da API")
+    parser.add_argument('--url', help="servidor já em execução (ex.: http://127.0.0.1:5000)")
+    parser.add_argument('--banco', help="DATABASE_URL do servidor iniciado pelo benchmark "
+                                        "(padrão: SQLite no diretório temporário)")
+    parser.add_argument('--preparar', type=int, metavar='N', help="recria o banco com N despesas sintéticas")
+    parser.add_argument('--servidor', choices=['werkzeug', 'gunicorn'], default='werkzeug')
+    parser.add_argument('--workers', type=int, default=1, help="workers do gunicorn")
+    parser.add_argument('--clientes', type=int, default=8, help="clientes concorrentes")
+    parser.add_argument('--duracao', type=float, default=30, help="duração da medição (s)")
+    parser.add_argument('--aquecimento', type=float, default=3, help="duração do aquecimento (s)")
+    parser.add_argument('--semente', type=int, default=42)
+    parser.add_argument('--saida', help="arquivo JSON do resultado (padrão: benchmarks/resultados/<commit>.json)")
+    parser.add_argument('--comparar', help="JSON de uma execução anterior usada como linha de base")
+    parser.add_argument('--tolerancia', type=float, default=0.2,
+                        help="aumento de p95 (ou queda de vazão) tolerado na comparação (padrão 0.2)")
+    args = parser.parse_args()
+    
+    processo = None
+    if args.url:
+        destino = urlsplit(args.url)
+        host, porta = destino.hostname, destino.port or 80
+    else:
+        banco = args.banco or f"sqlite:///{os.path.join(tempfile.gettempdir(), 'primosfincntrl-carga.db')}"
+        ambiente = dict(os.environ, DATABASE_URL=banco)
+        if args.preparar:
+            print(f"Preparando o banco com {args.preparar} despesas...")
+            preparar_banco(args.preparar, ambiente, args.semente)
+        host, porta = '127.0.0.1', porta_livre()
+        processo = iniciar_servidor(args.servidor, porta, args.workers, ambiente)
+        aguardar_ping(processo, porta)
+    
+    try:
+        print(f"Executando {args.clientes} clientes por {args.duracao:.0f} s...")
+        metricas = executar_carga(host, porta, args.clientes, args.duracao, args.aquecimento,
+                                  MIX_PADRAO, args.semente)
+    finally:
+        if processo is not None:
+            processo.terminate()
+            processo.wait()
+    
+    resultado = {
+        'commit': commit_atual(),
+        'data': datetime.now().isoformat(timespec='seconds'),
+        'configuracao': {
+            'servidor': 'externo' if args.url else args.servidor,
+            'workers': args.workers,
+            'clientes': args.clientes,
+            'duracao_s': args.duracao,
+            'despesas': args.preparar,
+            'semente': args.semente,
+            'mix': MIX_PADRAO
+        },
+        **metricas
+    }
+    imprimir(resultado)
+    
+    saida = args.saida or os.path.join(RAIZ, 'benchmarks', 'resultados', f"{resultado['commit'] or 'resultado'}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(saida)), exist_ok=True)
+    with open(saida, 'w', encoding='utf-8') as arquivo:
+        json.dump(resultado, arquivo, ensure_ascii=False, indent=2)
+    print(f"\nResultado gravado em {saida}")
+    
+    if args.comparar:
+        with open(args.comparar, encoding='utf-8') as arquivo:
+            regressoes = comparar(resultado, json.load(arquivo), args.tolerancia)
+        if regressoes:
+            print(f"\n❌ Regressão acima de {args.tolerancia:.0%} em: {', '.join(regressoes)}")
+            return 1
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
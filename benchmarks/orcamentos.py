@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Verificação dos orçamentos de consultas das rotas sobre um banco populado
+
+Cria a aplicação em modo de teste (TESTING), em que `orcamento_consultas`
+está ativo, e chama cada rota da API com o cache frio. Falha (código de
+saída 1) se alguma rota passar do número de comandos SQL declarado ou se o
+plano de alguma consulta fizer varredura completa de tabela.
+
+Uso:
+    python -m benchmarks.orcamentos --preparar 100000
+    DATABASE_URL=mysql+mysqlconnector://... python -m benchmarks.orcamentos
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+from datetime import datetime
+
+from benchmarks.carga import preparar_banco
+
+def requisicoes(ids, categoria_id, versao):
+    """
+    Requisições exercitadas: (método, URL, corpo JSON)
+    
+    As mudanças são pedidas depois das escritas, a partir da versão anterior a elas.
+    """
+    hoje = datetime.now().date()
+    despesa = {'descricao': 'Orçamento', 'valor': 10.5, 'data': hoje.isoformat(), 'categoria_id': categoria_id}
+    return [
+        ('GET', '/api/despesas/?limite=50', None),
+        ('GET', '/api/despesas/?periodo=mensal&limite=50', None),
+        ('GET', '/api/despesas/?periodo=semanal&limite=500', None),
+        ('GET', f'/api/despesas/?limite=50&categoria_id={categoria_id}&inicio={hoje.replace(day=1)}', None),
+        ('GET', f'/api/despesas/{ids[0]}', None),
+        ('GET', '/api/categorias/', None),
+        ('GET', f'/api/categorias/{categoria_id}', None),
+        ('GET', '/api/estatisticas/total?periodo=mensal', None),
+        ('GET', '/api/estatisticas/total?periodo=anual', None),
+        ('GET', '/api/estatisticas/total', None),
+        ('GET', '/api/estatisticas/por-categoria?periodo=mensal', None),
+        ('GET', '/api/estatisticas/serie?granularidade=dia', None),
+        ('GET', f'/api/estatisticas/serie?granularidade=mes&inicio={hoje.replace(year=hoje.year - 5, day=1)}', None),
+        ('GET', f'/api/estatisticas/serie?granularidade=semana&categoria_id={categoria_id}', None),
+        ('GET', '/api/dashboard/', None),
+        ('GET', '/api/despesas/busca?q=uber', None),
+        ('GET', '/api/despesas/busca?q=farm&periodo=anual', None),
+        ('GET', '/api/dashboard/?periodo=mensal', None),
+        ('POST', '/api/despesas/', despesa),
+        ('POST', '/api/despesas/lote', [despesa] * 10),
+        ('PUT', f'/api/despesas/{ids[1]}', despesa),
+        ('DELETE', f'/api/despesas/{ids[2]}', None),
+        ('GET', f'/api/despesas/mudancas?desde={versao}', None),
+        ('GET', f'/api/despesas/mudancas?desde={versao}&periodo=mensal', None)
+    ]
+
+def main():
+    parser = argparse.ArgumentParser(description="Verifica os orçamentos de consultas das rotas")
+    parser.add_argument('--banco', help="DATABASE_URL (padrão: variável de ambiente ou SQLite temporário)")
+    parser.add_argument('--preparar', type=int, metavar='N', help="recria o banco com N despesas sintéticas")
+    parser.add_argument('--semente', type=int, default=42)
+    args = parser.parse_args()
+    
+    banco = args.banco or os.getenv('DATABASE_URL') or \
+        f"sqlite:///{os.path.join(tempfile.gettempdir(), 'primosfincntrl-orcamentos.db')}"
+    os.environ['DATABASE_URL'] = banco
+    if args.preparar:
+        print(f"Preparando o banco com {args.preparar} despesas...")
+        preparar_banco(args.preparar, dict(os.environ), args.semente)
+    
+    from app import create_app
+    from app.cache import cache
+    from app.diagnostico import OrcamentoExcedido
+    
+    app = create_app()
+    cliente = app.test_client()
+    
+    ids = [despesa['id'] for despesa in cliente.get('/api/despesas/?limite=3').get_json()['despesas']]
+    categoria_id = cliente.get('/api/categorias/').get_json()[0]['id']
+    versao = cliente.get('/api/dashboard/').get_json()['versao']
+    if len(ids) < 3:
+        print("❌ O banco precisa ter despesas (use --preparar)")
+        return 1
+    
+    # Modo de teste: ativa os orçamentos e propaga OrcamentoExcedido até aqui
+    app.config['TESTING'] = True
+    
+    falhas = 0
+    for metodo, url, corpo in requisicoes(ids, categoria_id, versao):
+        # Cache frio: o orçamento vale para a primeira requisição, que vai ao banco
+        cache.invalidar()
+        try:
+            resposta = cliente.open(url, method=metodo, json=corpo)
+            comandos = resposta.headers.get('Server-Timing', '').rsplit('desc=', 1)[-1].strip('"')
+            print(f"✅ {metodo} {url} ({resposta.status_code}, {comandos})")
+        except OrcamentoExcedido as e:
+            falhas += 1
+            print(f"❌ {e}")
+    
+    if falhas:
+        print(f"\n❌ {falhas} rotas fora do orçamento.")
+        return 1
+    print("\n✅ Todas as rotas dentro do orçamento.")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
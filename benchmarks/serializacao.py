@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Micro-benchmark da serialização JSON das listagens de despesas
+
+Monta em memória páginas de despesas no formato das tuplas projetadas
+(`Despesa._consulta_projetada`), com os dados do gerador determinístico, e
+mede quantas linhas por segundo cada backend do `ProvedorJSON` transforma
+em resposta: formatação das linhas (`Despesa._formatar_linhas`) mais
+serialização (`app.json.response`). Não acessa o banco.
+
+Uso: python -m benchmarks.serializacao [--linhas 500] [--repeticoes 200] [--json]
+"""
+
+import argparse
+import json
+import os
+import time
+from datetime import date
+from app import create_app
+from app.models.despesa import Despesa
+from app.serializacao import orjson
+from gerar_dados import PERFIS, gerar_despesas
+
+# Cor fixa por categoria, só para as linhas terem o tamanho real
+COR = '#3357FF'
+
+def linhas_projetadas(quantidade, semente=42):
+    """
+    Gera tuplas (id, descricao, valor_centavos, data, categoria_id, categoria_nome, categoria_cor)
+    """
+    nomes = list(PERFIS)
+    categorias = {nome: indice for indice, nome in enumerate(nomes, start=1)}
+    despesas = gerar_despesas(quantidade, categorias, semente, ate=date(2026, 1, 1))
+    return [
+        (
+            despesa_id, despesa['descricao'], despesa['valor_centavos'], despesa['data'],
+            despesa['categoria_id'],
+            nomes[despesa['categoria_id'] - 1] if despesa['categoria_id'] else None,
+            COR if despesa['categoria_id'] else None
+        )
+        for despesa_id, despesa in enumerate(despesas, start=1)
+    ]
+
+def medir(backend, linhas, repeticoes):
+    """
+    Mede formatação e serialização de uma página com o backend informado
+    
+    Returns:
+        dict: Linhas por segundo da formatação, da serialização e do total, e o tamanho da resposta
+    """
+    os.environ['JSON_PROVIDER'] = backend
+    app = create_app()
+    
+    with app.app_context():
+        despesas = Despesa._formatar_linhas(linhas)
+        resposta = app.json.response({'despesas': despesas, 'limite': len(linhas), 'next_cursor': None})
+        
+        inicio = time.perf_counter()
+        for _ in range(repeticoes):
+            Despesa._formatar_linhas(linhas)
+        formatacao = time.perf_counter() - inicio
+        
+        inicio = time.perf_counter()
+        for _ in range(repeticoes):
+            app.json.response({'despesas': despesas, 'limite': len(linhas), 'next_cursor': None})
+        serializacao = time.perf_counter() - inicio
+    
+    total_linhas = len(linhas) * repeticoes
+    return {
+        'backend': backend,
+        'formatacao_linhas_s': round(total_linhas / formatacao),
+        'serializacao_linhas_s': round(total_linhas / serializacao),
+        'total_linhas_s': round(total_linhas / (formatacao + serializacao)),
+        'bytes': len(resposta.get_data())
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Compara a serialização JSON com orjson e com o json padrão")
+    parser.add_argument('--linhas', type=int, default=500, help="despesas por página (padrão: limite máximo da API)")
+    parser.add_argument('--repeticoes', type=int, default=200)
+    parser.add_argument('--json', action='store_true', help="imprime o resultado em JSON")
+    args = parser.parse_args()
+    
+    # O banco não é acessado, mas create_app precisa de uma URL que não exija driver
+    os.environ.setdefault('DATABASE_URL', 'sqlite://')
+    linhas = linhas_projetadas(args.linhas)
+    backends = ['padrao'] + (['orjson'] if orjson is not None else [])
+    resultados = [medir(backend, linhas, args.repeticoes) for backend in backends]
+    
+    if args.json:
+        print(json.dumps(resultados))
+        return
+    
+    print(f"{'backend':<10} {'formatação':>14} {'serialização':>14} {'total':>14} {'bytes':>9}   (linhas/s)")
+    for resultado in resultados:
+        print(f"{resultado['backend']:<10} {resultado['formatacao_linhas_s']:>14} "
+              f"{resultado['serializacao_linhas_s']:>14} {resultado['total_linhas_s']:>14} {resultado['bytes']:>9}")
+    if len(resultados) == 2:
+        print(f"orjson: {resultados[1]['total_linhas_s'] / resultados[0]['total_linhas_s']:.1f}x o total do json padrão")
+    else:
+        print("orjson não instalado; medido só o json padrão")
+
+if __name__ == '__main__':
+    main()
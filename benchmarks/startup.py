@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Benchmark de inicialização: tempo do boot a frio até a primeira resposta
+
+Inicia um processo novo que importa wsgi.py e serve a aplicação, e mede o
+tempo até /ping responder 200. Repete algumas vezes e mostra mediana,
+mínimo e máximo. Use DATABASE_URL (ou DB_*) para escolher o banco.
+
+Uso: python -m benchmarks.startup [--repeticoes 5] [--servidor werkzeug|gunicorn]
+"""
+
+import argparse
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import urllib.request
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def porta_livre():
+    """
+    Obtém uma porta TCP livre em 127.0.0.1
+    """
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+def comando_servidor(servidor, porta, workers=1):
+    """
+    Linha de comando que sobe a aplicação na porta informada
+    """
+    if servidor == 'gunicorn':
+        return [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py',
+                '--bind', f'127.0.0.1:{porta}', '--workers', str(workers), 'wsgi:app']
+    codigo = ("from wsgi import app; from werkzeug.serving import run_simple; "
+              f"run_simple('127.0.0.1', {porta}, app, threaded=True)")
+    return [sys.executable, '-c', codigo]
+
+def iniciar_servidor(servidor, porta, workers=1, ambiente=None):
+    """
+    Inicia o processo do servidor, sem aguardar que ele responda
+    """
+    return subprocess.Popen(comando_servidor(servidor, porta, workers), cwd=RAIZ,
+                            env=ambiente, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+def aguardar_ping(processo, porta, tempo_limite=60):
+    """
+    Aguarda /ping responder 200 e retorna o tempo decorrido em segundos
+    """
+    inicio = time.perf_counter()
+    while time.perf_counter() - inicio < tempo_limite:
+        try:
+            with urllib.request.urlopen(f'http://127.0.0.1:{porta}/ping', timeout=1) as resposta:
+                if resposta.status == 200:
+                    return time.perf_counter() - inicio
+        except OSError:
+            if processo.poll() is not None:
+                raise RuntimeError("O servidor terminou antes de responder")
+            time.sleep(0.005)
+    raise RuntimeError("Tempo limite excedido aguardando /ping")
+
+def medir(servidor):
+    """
+    Mede o tempo, em segundos, do início do processo até /ping responder
+    """
+    porta = porta_livre()
+    inicio = time.perf_counter()
+    processo = iniciar_servidor(servidor, porta)
+    try:
+        aguardar_ping(processo, porta)
+        return time.perf_counter() - inicio
+    finally:
+        processo.terminate()
+        processo.wait()
+
+def main():
+    parser = argparse.ArgumentParser(description="Mede o tempo de boot até a primeira resposta")
+    parser.add_argument('--repeticoes', type=int, default=5)
+    parser.add_argument('--servidor', choices=['werkzeug', 'gunicorn'], default='werkzeug')
+    parser.add_argument('--json', action='store_true', help="imprime o resultado em JSON")
+    args = parser.parse_args()
+    
+    tempos = [medir(args.servidor) for _ in range(args.repeticoes)]
+    resultado = {
+        'servidor': args.servidor,
+        'repeticoes': args.repeticoes,
+        'mediana_ms': round(statistics.median(tempos) * 1000, 1),
+        'min_ms': round(min(tempos) * 1000, 1),
+        'max_ms': round(max(tempos) * 1000, 1)
+    }
+    
+    if args.json:
+        print(json.dumps(resultado))
+    else:
+        print(f"Boot até a primeira resposta ({args.servidor}, {args.repeticoes}x): "
+              f"mediana {resultado['mediana_ms']} ms, "
+              f"mín {resultado['min_ms']} ms, máx {resultado['max_ms']} ms")
+
+if __name__ == '__main__':
+    main()
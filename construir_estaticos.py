@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Gera os arquivos estáticos versionados e pré-comprimidos
+Copia static/css e static/js para static/dist com o hash do conteúdo no
+nome, grava as versões .gz (e .br, com o pacote brotli) e o manifesto
+static/dist/manifest.json usado por app/estaticos.py; deve rodar a cada
+deploy, depois de qualquer alteração em static/
+"""
+
+import gzip
+import hashlib
+import json
+import os
+import shutil
+import sys
+from app.compressao import brotli
+from app.estaticos import PASTA_DIST, MANIFESTO
+
+RAIZ = os.path.dirname(os.path.abspath(__file__))
+PASTA_STATIC = os.path.join(RAIZ, 'static')
+
+# Pastas de static/ versionadas
+ORIGENS = ('css', 'js')
+
+# Caracteres do hash SHA-256 usados no nome do arquivo
+TAMANHO_HASH = 10
+
+def arquivos_de_origem():
+    """
+    Lista os arquivos de ORIGENS, relativos a static/ e com separador '/'
+    """
+    for origem in ORIGENS:
+        for pasta, _, nomes in os.walk(os.path.join(PASTA_STATIC, origem)):
+            for nome in sorted(nomes):
+                caminho = os.path.relpath(os.path.join(pasta, nome), PASTA_STATIC)
+                yield caminho.replace(os.sep, '/')
+
+def versionar(relativo, destino):
+    """
+    Grava o arquivo com o hash no nome e suas versões comprimidas
+    
+    Args:
+        relativo (str): Caminho do arquivo relativo a static/ (ex.: css/style.css)
+        destino (str): Pasta de saída (static/dist)
+    
+    Returns:
+        tuple: (caminho versionado relativo a static/, tamanhos {original, gzip, br})
+    """
+    with open(os.path.join(PASTA_STATIC, relativo), 'rb') as arquivo:
+        conteudo = arquivo.read()
+    
+    base, extensao = os.path.splitext(relativo)
+    resumo = hashlib.sha256(conteudo).hexdigest()[:TAMANHO_HASH]
+    versionado = f"{base}.{resumo}{extensao}"
+    caminho = os.path.join(destino, versionado)
+    os.makedirs(os.path.dirname(caminho), exist_ok=True)
+    
+    versoes = {'': conteudo, '.gz': gzip.compress(conteudo, compresslevel=9, mtime=0)}
+    if brotli is not None:
+        versoes['.br'] = brotli.compress(conteudo, quality=11)
+    for sufixo, dados in versoes.items():
+        with open(caminho + sufixo, 'wb') as arquivo:
+            arquivo.write(dados)
+    
+    tamanhos = {sufixo.lstrip('.') or 'original': len(dados) for sufixo, dados in versoes.items()}
+    return f"{PASTA_DIST}/{versionado}", tamanhos
+
+def construir():
+    """
+    Recria static/dist e o manifesto a partir dos arquivos atuais
+    """
+    destino = os.path.join(PASTA_STATIC, PASTA_DIST)
+    # Recria do zero para não acumular versões antigas
+    shutil.rmtree(destino, ignore_errors=True)
+    os.makedirs(destino)
+    
+    manifesto = {}
+    for relativo in arquivos_de_origem():
+        versionado, tamanhos = versionar(relativo, destino)
+        manifesto[relativo] = versionado
+        detalhes = ', '.join(f"{nome} {tamanho} B" for nome, tamanho in tamanhos.items())
+        print(f"   {relativo} → {versionado} ({detalhes})")
+    
+    with open(os.path.join(destino, MANIFESTO), 'w', encoding='utf-8') as arquivo:
+        json.dump(manifesto, arquivo, indent=2, sort_keys=True)
+    
+    if brotli is None:
+        print("ℹ️ Pacote brotli não instalado: só as versões .gz foram geradas.")
+    print(f"✅ {len(manifesto)} arquivos estáticos versionados em static/{PASTA_DIST}/")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(construir())
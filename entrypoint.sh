@@ -41,6 +41,11 @@ wait_for_db
 echo "🗄️ Inicializando banco de dados..."
 init_database
 
-# Iniciar a aplicação Flask
-echo "🚀 Iniciando aplicação Flask..."
-exec python app.py 
\ No newline at end of file
+# Iniciar a aplicação: gunicorn em produção, servidor do Flask em desenvolvimento
+if [ "$FLASK_ENV" = "production" ]; then
+    echo "🚀 Iniciando aplicação com gunicorn (workers=${WEB_CONCURRENCY:-auto}, threads=${GUNICORN_THREADS:-4})..."
+    exec gunicorn -c gunicorn.conf.py wsgi:app
+else
+    echo "🚀 Iniciando aplicação Flask (servidor de desenvolvimento)..."
+    exec python app.py
+fi 
\ No newline at end of file
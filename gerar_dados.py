@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Gerador determinístico de despesas sintéticas para testes de carga
+Cria N despesas (de 10 mil a 10 milhões) com distribuições realistas de data,
+categoria e valor; a mesma semente e os mesmos parâmetros geram sempre os
+mesmos dados
+"""
+
+import argparse
+import math
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+from flask import Flask
+from app.models.database import db, init_db, Despesa as DespesaModel, ResumoDiario
+from app.models.migracoes import Migracoes
+from app.models.categoria import Categoria
+from app.models.despesa import Despesa
+from app.models.mudancas import Mudancas
+from app.models.dinheiro import para_centavos
+from app.models.periodo import data_atual
+from app.cache import cache
+from dotenv import load_dotenv
+
+# Carrega as variáveis de ambiente
+load_dotenv()
+
+# Perfil de cada categoria: (peso na quantidade de despesas, valor mediano,
+# dispersão do log-normal, descrições possíveis)
+PERFIS = {
+    'Alimentação': (0.35, 45.0, 0.8, ['Supermercado', 'Restaurante', 'Padaria', 'Lanchonete', 'Delivery', 'Feira']),
+    'Transporte': (0.20, 30.0, 0.7, ['Uber', '99', 'Combustível', 'Ônibus', 'Estacionamento', 'Pedágio']),
+    'Moradia': (0.06, 250.0, 0.9, ['Aluguel', 'Condomínio', 'Conta de luz', 'Conta de água', 'Internet', 'Gás']),
+    'Saúde': (0.07, 80.0, 0.9, ['Farmácia', 'Consulta médica', 'Plano de saúde', 'Exames', 'Dentista']),
+    'Educação': (0.04, 200.0, 0.7, ['Mensalidade', 'Curso online', 'Livros', 'Material escolar']),
+    'Lazer': (0.13, 60.0, 0.9, ['Cinema', 'Streaming', 'Show', 'Bar', 'Viagem']),
+    'Vestuário': (0.06, 120.0, 0.7, ['Roupas', 'Calçados', 'Acessórios']),
+    'Outros': (0.08, 40.0, 1.0, ['Presente', 'Assinatura', 'Taxa bancária', 'Diversos'])
+}
+
+# Fração de despesas sem categoria e teto dos valores gerados
+FRACAO_SEM_CATEGORIA = 0.01
+VALOR_MAXIMO = 20000.0
+
+def pesos_dos_dias(inicio, dias):
+    """
+    Pesos acumulados de cada dia do intervalo: fins de semana e início do
+    mês (salário) concentram mais gastos, e o volume cresce ao longo do tempo
+    """
+    acumulados = []
+    total = 0.0
+    for deslocamento in range(dias):
+        dia = inicio + timedelta(days=deslocamento)
+        peso = 1.0 + 0.5 * deslocamento / dias
+        if dia.weekday() >= 5:
+            peso *= 1.3
+        if dia.day <= 10:
+            peso *= 1.2
+        total += peso
+        acumulados.append(total)
+    return acumulados
+
+def gerar_despesas(quantidade, categorias, semente=42, ate=None, dias=730):
+    """
+    Gera despesas sintéticas de forma determinística
+    
+    Args:
+        quantidade (int): Quantidade de despesas
+        categorias (dict): ID de cada categoria pelo nome
+        semente (int): Semente do gerador pseudoaleatório
+        ate (date): Último dia do intervalo (padrão: hoje)
+        dias (int): Quantidade de dias do intervalo
+    
+    Yields:
+        dict: Linha com descricao, valor_centavos, data e categoria_id
+    """
+    rng = random.Random(semente)
+    ate = ate or data_atual()
+    inicio = ate - timedelta(days=dias - 1)
+    dias_acumulados = pesos_dos_dias(inicio, dias)
+    
+    nomes = list(PERFIS)
+    categorias_acumuladas = []
+    total = 0.0
+    for nome in nomes:
+        total += PERFIS[nome][0]
+        categorias_acumuladas.append(total)
+    
+    for _ in range(quantidade):
+        nome = rng.choices(nomes, cum_weights=categorias_acumuladas)[0]
+        _, mediana, dispersao, descricoes = PERFIS[nome]
+        deslocamento = rng.choices(range(dias), cum_weights=dias_acumulados)[0]
+        valor = min(rng.lognormvariate(math.log(mediana), dispersao), VALOR_MAXIMO)
+        sem_categoria = rng.random() < FRACAO_SEM_CATEGORIA
+        
+        yield {
+            'descricao': rng.choice(descricoes),
+            'valor_centavos': -max(para_centavos(valor), 1),
+            'data': inicio + timedelta(days=deslocamento),
+            'categoria_id': None if sem_categoria else categorias.get(nome)
+        }
+
+def limpar():
+    """
+    Remove todas as despesas, o resumo diário e as exclusões registradas
+    
+    A versão mínima da sincronização incremental passa a ser a da limpeza:
+    clientes com dados anteriores recebem `recarregar` em vez de mudanças
+    incompletas.
+    """
+    Mudancas.descartar_historico()
+    db.session.query(ResumoDiario).delete()
+    db.session.query(DespesaModel).delete()
+    db.session.commit()
+    cache.invalidar()
+
+def main():
+    """
+    Gera e grava as despesas conforme os argumentos da linha de comando
+    """
+    parser = argparse.ArgumentParser(description="Gera despesas sintéticas determinísticas")
+    parser.add_argument('--quantidade', type=int, default=10000, help="quantidade de despesas")
+    parser.add_argument('--semente', type=int, default=42, help="semente do gerador")
+    parser.add_argument('--ate', help="último dia do intervalo, AAAA-MM-DD (padrão: hoje)")
+    parser.add_argument('--dias', type=int, default=730, help="quantidade de dias do intervalo")
+    parser.add_argument('--lote', type=int, default=10000, help="despesas por commit")
+    parser.add_argument('--limpar', action='store_true', help="apaga as despesas existentes antes")
+    args = parser.parse_args()
+    
+    ate = datetime.strptime(args.ate, '%Y-%m-%d').date() if args.ate else None
+    
+    # Cria uma instância da aplicação Flask
+    app = Flask(__name__)
+    init_db(app)
+    
+    with app.app_context():
+        Migracoes.aplicar()
+        if args.limpar:
+            limpar()
+            print("✅ Despesas existentes removidas.")
+        
+        categorias = {categoria['nome']: categoria['id'] for categoria in Categoria.listar()}
+        inicio = time.perf_counter()
+        lote = []
+        gravadas = 0
+        
+        for linha in gerar_despesas(args.quantidade, categorias, args.semente, ate, args.dias):
+            lote.append(linha)
+            if len(lote) == args.lote:
+                gravadas += len(Despesa.criar_lote(lote))
+                lote = []
+                print(f"   {gravadas}/{args.quantidade} despesas gravadas")
+        if lote:
+            gravadas += len(Despesa.criar_lote(lote))
+        
+        duracao = time.perf_counter() - inicio
+        print(f"✅ {gravadas} despesas geradas em {duracao:.1f} s ({gravadas / max(duracao, 1e-9):.0f}/s).")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,63 @@
+# -*- coding: utf-8 -*-
+
+"""
+Configuração do gunicorn para produção (gunicorn -c gunicorn.conf.py wsgi:app)
+
+Modelo de processos: um master que carrega a aplicação uma única vez
+(preload) e faz fork de WEB_CONCURRENCY workers, cada um com
+GUNICORN_THREADS threads (worker "gthread"). As requisições de I/O no banco
+de um worker não bloqueiam as demais threads nem os outros workers.
+
+Reinício gracioso:
+    kill -HUP <pid do master>   recria os workers (sem recarregar o código, por causa do preload)
+    kill -USR2 <pid do master>  sobe um novo master com o código novo; depois envie TERM ao antigo
+    kill -TERM <pid do master>  encerra, aguardando até GUNICORN_GRACEFUL_TIMEOUT as requisições em curso
+"""
+
+import multiprocessing
+import os
+
+# Endereço de escuta
+bind = os.getenv('GUNICORN_BIND', '0.0.0.0:5000')
+
+# Workers e threads (padrão: 2 x núcleos + 1 workers, 4 threads cada)
+workers = int(os.getenv('WEB_CONCURRENCY', multiprocessing.cpu_count() * 2 + 1))
+threads = int(os.getenv('GUNICORN_THREADS', '4'))
+worker_class = 'gthread'
+
+# Com mais de um worker, a geração do cache precisa ser compartilhada: com a
+# local, cada worker serviria totais e ETags antigos depois de escritas nos outros
+if workers > 1 and os.getenv('CACHE_BACKEND', 'sqlite') == 'local':
+    raise RuntimeError(f"CACHE_BACKEND=local não é suportado com {workers} workers; use CACHE_BACKEND=sqlite")
+
+# Carrega a aplicação no master antes do fork (memória compartilhada e boot único)
+preload_app = os.getenv('GUNICORN_PRELOAD', '1') == '1'
+
+# Tempos limite e reciclagem de workers
+timeout = int(os.getenv('GUNICORN_TIMEOUT', '30'))
+graceful_timeout = int(os.getenv('GUNICORN_GRACEFUL_TIMEOUT', '30'))
+keepalive = int(os.getenv('GUNICORN_KEEPALIVE', '5'))
+max_requests = int(os.getenv('GUNICORN_MAX_REQUESTS', '5000'))
+max_requests_jitter = int(os.getenv('GUNICORN_MAX_REQUESTS_JITTER', '500'))
+
+# Logs no stdout/stderr do container
+accesslog = os.getenv('GUNICORN_ACCESSLOG', '-')
+errorlog = '-'
+loglevel = os.getenv('GUNICORN_LOGLEVEL', 'info')
+
+def post_fork(server, worker):
+    """
+    Descarta no worker as conexões de banco herdadas do master
+    
+    Com preload_app, o master pode ter aberto conexões ao inicializar a
+    aplicação; sockets compartilhados entre processos corrompem o protocolo
+    do MySQL, então cada worker passa a abrir as suas.
+    """
+    if not preload_app:
+        return
+    
+    from wsgi import app
+    from app.models.database import db
+    
+    with app.app_context():
+        db.engine.dispose(close=False)
@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Script de importação de extratos bancários (CSV ou OFX) como despesas
+O arquivo é lido em streaming e gravado em lotes, com progresso no terminal
+"""
+
+import argparse
+import json
+import sys
+from flask import Flask
+from app.models.database import init_db
+from app.models.importacao import Importacao
+from dotenv import load_dotenv
+
+# Carrega as variáveis de ambiente
+load_dotenv()
+
+def carregar_regras(caminho):
+    """
+    Lê regras de categorização de um JSON no formato
+    [{"padrao": "uber|99", "categoria": "Transporte"}, ...]
+    """
+    with open(caminho, encoding='utf-8') as arquivo:
+        return [(regra['padrao'], regra['categoria']) for regra in json.load(arquivo)]
+
+def main():
+    """
+    Importa o extrato informado na linha de comando
+    """
+    parser = argparse.ArgumentParser(description="Importa um extrato bancário CSV ou OFX")
+    parser.add_argument('arquivo', help="caminho do extrato")
+    parser.add_argument('--formato', choices=['csv', 'ofx'],
+                        help="formato do arquivo (padrão: extensão)")
+    parser.add_argument('--encoding', default='utf-8-sig', help="codificação do arquivo")
+    parser.add_argument('--lote', type=int, default=1000, help="despesas por commit")
+    parser.add_argument('--regras', help="JSON com regras de categorização")
+    args = parser.parse_args()
+    
+    formato = args.formato or args.arquivo.rsplit('.', 1)[-1].lower()
+    regras = carregar_regras(args.regras) if args.regras else None
+    
+    def progresso(relatorio):
+        print(f"   lote {relatorio.lotes}: {relatorio.importadas} importadas, "
+              f"{relatorio.duplicadas} duplicadas, {relatorio.invalidas} inválidas")
+    
+    # Cria uma instância da aplicação Flask
+    app = Flask(__name__)
+    init_db(app)
+    
+    with app.app_context():
+        with open(args.arquivo, encoding=args.encoding, errors='replace', newline='') as arquivo:
+            relatorio = Importacao.executar(arquivo, formato, args.lote, regras, progresso)
+    
+    print(f"✅ Importação concluída: {relatorio['lidas']} lidas, {relatorio['importadas']} importadas, "
+          f"{relatorio['duplicadas']} duplicadas, {relatorio['ignoradas']} ignoradas, "
+          f"{relatorio['invalidas']} inválidas.")
+    for erro in relatorio['erros']:
+        print(f"   linha {erro['linha']}: {erro['error']}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -3,13 +3,14 @@
 
 """
 Script de inicialização do banco de dados
-Cria tabelas e insere dados iniciais automaticamente
+Aplica as migrações de schema pendentes e insere dados iniciais; deve rodar
+uma vez por deploy, antes de subir a aplicação
 """
 
 import os
-import mysql.connector
 from flask import Flask
-from app.models.database import db, init_db
+from app.models.database import init_db
+from app.models.migracoes import Migracoes
 from dotenv import load_dotenv
 
 # Carrega as variáveis de ambiente
@@ -19,6 +20,8 @@ def criar_banco_se_nao_existir():
     """
     Conecta ao MySQL e cria o banco se não existir
     """
+    import mysql.connector
+    
     host = os.getenv("DB_HOST")
     user = os.getenv("DB_USER")
     password = os.getenv("DB_PASSWORD")
@@ -39,7 +42,9 @@ def init_database():
     """
     Inicializa o banco de dados, criando tabelas e categorias padrão
     """
-    criar_banco_se_nao_existir()
+    # Com DATABASE_URL o banco já é informado por completo (ex.: SQLite local)
+    if not os.getenv("DATABASE_URL"):
+        criar_banco_se_nao_existir()
 
     # Cria uma instância da aplicação Flask
     app = Flask(__name__)
@@ -48,36 +53,17 @@ def init_database():
     init_db(app)
     
     with app.app_context():
-        # Cria todas as tabelas definidas nos modelos
-        db.create_all()
-        print("✅ Tabelas criadas com sucesso!")
-        
-        # Cria categorias padrão manualmente
-        from app.models.database import Categoria
+        # Aplica as migrações pendentes (tabelas, índices, backfills) e
+        # cria as categorias padrão que faltarem
+        resultado = Migracoes.aplicar()
         
-        categorias = [
-            {"nome": "Alimentação", "cor": "#FF5733"},
-            {"nome": "Transporte", "cor": "#33FF57"},
-            {"nome": "Moradia", "cor": "#3357FF"},
-            {"nome": "Saúde", "cor": "#FF33A8"},
-            {"nome": "Educação", "cor": "#33A8FF"},
-            {"nome": "Lazer", "cor": "#A833FF"},
-            {"nome": "Vestuário", "cor": "#FFD700"},
-            {"nome": "Outros", "cor": "#808080"}
-        ]
-        
-        categorias_adicionadas = 0
-        for cat in categorias:
-            # Verifica se cada categoria existe individualmente
-            categoria_existente = Categoria.query.filter_by(nome=cat["nome"]).first()
-            if not categoria_existente:
-                nova_categoria = Categoria(nome=cat["nome"], cor=cat["cor"])
-                db.session.add(nova_categoria)
-                categorias_adicionadas += 1
+        if resultado['versoes']:
+            print(f"✅ Migrações aplicadas: {', '.join(map(str, resultado['versoes']))}")
+        else:
+            print("ℹ️ Schema já está na versão mais recente.")
         
-        if categorias_adicionadas > 0:
-            db.session.commit()
-            print(f"✅ {categorias_adicionadas} categorias adicionadas com sucesso!")
+        if resultado['categorias'] > 0:
+            print(f"✅ {resultado['categorias']} categorias adicionadas com sucesso!")
         else:
             print("ℹ️ Todas as categorias já existem no banco de dados.")
         
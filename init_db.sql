@@ -17,10 +17,40 @@ CREATE TABLE IF NOT EXISTS categorias (
 CREATE TABLE IF NOT EXISTS despesas (
     id INT AUTO_INCREMENT PRIMARY KEY,
     descricao VARCHAR(255) NOT NULL,
-    valor DECIMAL(10, 2) NOT NULL,
+    valor_centavos BIGINT NOT NULL,  -- valor em centavos (negativo para despesas)
     data DATE NOT NULL,
     categoria_id INT,
-    FOREIGN KEY (categoria_id) REFERENCES categorias(id)
+    versao BIGINT NOT NULL DEFAULT 0,  -- versão da última escrita (sincronização incremental)
+    FOREIGN KEY (categoria_id) REFERENCES categorias(id),
+    INDEX idx_despesas_data (data),
+    INDEX idx_despesas_categoria_data (categoria_id, data),
+    INDEX idx_despesas_versao (versao),
+    FULLTEXT INDEX ft_despesas_descricao (descricao)
+);
+
+-- Cria o resumo diário de despesas por categoria (mantido pela aplicação)
+-- categoria_id = 0 representa despesas sem categoria
+CREATE TABLE IF NOT EXISTS despesas_resumo_diario (
+    data DATE NOT NULL,
+    categoria_id INT NOT NULL,
+    total_centavos BIGINT NOT NULL DEFAULT 0,
+    contagem INT NOT NULL DEFAULT 0,
+    PRIMARY KEY (data, categoria_id)
+);
+
+-- Contador global de versões das escritas em despesas (linha única)
+CREATE TABLE IF NOT EXISTS despesas_versao (
+    id INT PRIMARY KEY,
+    versao BIGINT NOT NULL DEFAULT 0
+);
+INSERT IGNORE INTO despesas_versao (id, versao) VALUES (1, 0);
+
+-- Despesas excluídas, com a versão da exclusão
+CREATE TABLE IF NOT EXISTS despesas_excluidas (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    despesa_id INT NOT NULL,
+    versao BIGINT NOT NULL,
+    INDEX idx_despesas_excluidas_versao (versao)
 );
 
 -- Insere categorias padrão se a tabela estiver vazia
@@ -40,14 +70,23 @@ WHERE NOT EXISTS (
 ) LIMIT 8;
 
 -- Insere algumas despesas de exemplo
-INSERT INTO despesas (descricao, valor, data, categoria_id)
+INSERT INTO despesas (descricao, valor_centavos, data, categoria_id)
 SELECT * FROM (
-    SELECT 'Aluguel', -1200.00, CURDATE() - INTERVAL 5 DAY, (SELECT id FROM categorias WHERE nome = 'Moradia') UNION ALL
-    SELECT 'Supermercado', -350.50, CURDATE() - INTERVAL 2 DAY, (SELECT id FROM categorias WHERE nome = 'Alimentação') UNION ALL
-    SELECT 'Combustível', -150.00, CURDATE() - INTERVAL 1 DAY, (SELECT id FROM categorias WHERE nome = 'Transporte') UNION ALL
-    SELECT 'Farmácia', -89.90, CURDATE(), (SELECT id FROM categorias WHERE nome = 'Saúde') UNION ALL
-    SELECT 'Cinema', -60.00, CURDATE() - INTERVAL 7 DAY, (SELECT id FROM categorias WHERE nome = 'Lazer')
+    SELECT 'Aluguel', -120000, CURDATE() - INTERVAL 5 DAY, (SELECT id FROM categorias WHERE nome = 'Moradia') UNION ALL
+    SELECT 'Supermercado', -35050, CURDATE() - INTERVAL 2 DAY, (SELECT id FROM categorias WHERE nome = 'Alimentação') UNION ALL
+    SELECT 'Combustível', -15000, CURDATE() - INTERVAL 1 DAY, (SELECT id FROM categorias WHERE nome = 'Transporte') UNION ALL
+    SELECT 'Farmácia', -8990, CURDATE(), (SELECT id FROM categorias WHERE nome = 'Saúde') UNION ALL
+    SELECT 'Cinema', -6000, CURDATE() - INTERVAL 7 DAY, (SELECT id FROM categorias WHERE nome = 'Lazer')
 ) AS tmp
 WHERE NOT EXISTS (
     SELECT id FROM despesas LIMIT 1
 );
+
+-- Preenche o resumo diário a partir das despesas, se ainda estiver vazio
+INSERT INTO despesas_resumo_diario (data, categoria_id, total_centavos, contagem)
+SELECT data, COALESCE(categoria_id, 0), SUM(valor_centavos), COUNT(*)
+FROM despesas
+WHERE NOT EXISTS (
+    SELECT data FROM despesas_resumo_diario LIMIT 1
+)
+GROUP BY data, COALESCE(categoria_id, 0);
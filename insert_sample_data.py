@@ -50,27 +50,27 @@ def insert_sample_data():
         hoje = datetime.now().date()
         datas = [(hoje - timedelta(days=i)).strftime('%Y-%m-%d') for i in range(30)]
         
-        # Insere despesas de exemplo
+        # Insere despesas de exemplo (valores em centavos)
         despesas = [
-            ('Supermercado', -150.75, datas[0], 1),
-            ('Restaurante', -45.90, datas[1], 1),
-            ('Uber', -22.50, datas[2], 2),
-            ('Combustível', -200.00, datas[3], 2),
-            ('Aluguel', -1200.00, datas[4], 3),
-            ('Conta de luz', -120.50, datas[5], 3),
-            ('Cinema', -35.00, datas[6], 4),
-            ('Consulta médica', -150.00, datas[7], 5),
-            ('Curso online', -89.90, datas[8], 6),
-            ('Padaria', -15.75, datas[9], 1),
-            ('Farmácia', -65.30, datas[10], 5),
-            ('Internet', -99.90, datas[11], 3),
-            ('Estacionamento', -12.00, datas[12], 2),
-            ('Livros', -78.50, datas[13], 6),
-            ('Lanche', -18.90, datas[14], 1)
+            ('Supermercado', -15075, datas[0], 1),
+            ('Restaurante', -4590, datas[1], 1),
+            ('Uber', -2250, datas[2], 2),
+            ('Combustível', -20000, datas[3], 2),
+            ('Aluguel', -120000, datas[4], 3),
+            ('Conta de luz', -12050, datas[5], 3),
+            ('Cinema', -3500, datas[6], 4),
+            ('Consulta médica', -15000, datas[7], 5),
+            ('Curso online', -8990, datas[8], 6),
+            ('Padaria', -1575, datas[9], 1),
+            ('Farmácia', -6530, datas[10], 5),
+            ('Internet', -9990, datas[11], 3),
+            ('Estacionamento', -1200, datas[12], 2),
+            ('Livros', -7850, datas[13], 6),
+            ('Lanche', -1890, datas[14], 1)
         ]
         
         cursor.executemany(
-            "INSERT INTO despesas (descricao, valor, data, categoria_id) VALUES (?, ?, ?, ?)",
+            "INSERT INTO despesas (descricao, valor_centavos, data, categoria_id) VALUES (?, ?, ?, ?)",
             despesas
         )
         
@@ -78,12 +78,12 @@ def insert_sample_data():
         conn.commit()
         print(f"Dados de exemplo inseridos com sucesso!")
         return True
-        
+    
     except Exception as e:
         print(f"Erro ao inserir dados de exemplo: {e}")
         conn.rollback()
         return False
-        
+    
     finally:
         cursor.close()
         conn.close()
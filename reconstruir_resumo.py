@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Script de manutenção do resumo diário de despesas
+Reconstrói a tabela despesas_resumo_diario a partir de despesas (backfill)
+ou apenas verifica se as duas estão consistentes
+"""
+
+import argparse
+import sys
+from flask import Flask
+from app.models.database import init_db
+from app.models.resumo import Resumo
+from dotenv import load_dotenv
+
+# Carrega as variáveis de ambiente
+load_dotenv()
+
+def main():
+    """
+    Executa a reconstrução ou a verificação do resumo diário
+    """
+    parser = argparse.ArgumentParser(description="Reconstrói ou verifica o resumo diário de despesas")
+    parser.add_argument('--verificar', action='store_true',
+                        help="apenas compara o resumo com a tabela de despesas, sem alterar nada")
+    args = parser.parse_args()
+    
+    # Cria uma instância da aplicação Flask
+    app = Flask(__name__)
+    init_db(app)
+    
+    with app.app_context():
+        if not args.verificar:
+            linhas = Resumo.reconstruir()
+            print(f"✅ Resumo diário reconstruído: {linhas} linhas.")
+        
+        divergencias = Resumo.verificar()
+        if divergencias:
+            print(f"❌ {len(divergencias)} divergências entre resumo e despesas:")
+            for divergencia in divergencias[:20]:
+                print(f"   {divergencia}")
+            return 1
+        
+        print("✅ Resumo diário consistente com a tabela de despesas.")
+        return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -8,6 +8,39 @@ const API_CONFIG = {
     // Usa API_BASE_URL definido em api-url-config.js para funcionar em qualquer ambiente
     BASE_URL: API_BASE_URL,
     
+    // Respostas já recebidas por URL, com o ETag enviado pelo servidor
+    respostasValidadas: new Map(),
+    
+    /**
+     * Faz um GET condicional: reenvia o ETag da última resposta da URL
+     * (If-None-Match) e, se o servidor responder 304, reutiliza os dados
+     * já recebidos em vez de baixar o conteúdo de novo
+     * @param {string} url - URL do recurso
+     * @param {string} descricao - Descrição usada na mensagem de erro
+     * @returns {Promise} Promise com os dados JSON
+     */
+    obterJSON: function(url, descricao) {
+        const anterior = this.respostasValidadas.get(url);
+        const headers = anterior ? { 'If-None-Match': anterior.etag } : {};
+        
+        return fetch(url, { headers })
+            .then(response => {
+                if (response.status === 304 && anterior) {
+                    return anterior.dados;
+                }
+                if (!response.ok) {
+                    throw new Error(`Erro ao ${descricao}: ${response.status}`);
+                }
+                return response.json().then(dados => {
+                    const etag = response.headers.get('ETag');
+                    if (etag) {
+                        this.respostasValidadas.set(url, { etag, dados });
+                    }
+                    return dados;
+                });
+            });
+    },
+    
     // Função auxiliar para formatar valores monetários
     formatarMoeda: function(valor) {
         // Sempre usa o valor absoluto para remover o sinal negativo
@@ -53,25 +86,39 @@ const API_CONFIG = {
  */
 const DespesasAPI = {
     /**
-     * Obtém todas as despesas do backend
+     * Obtém uma página de despesas, paginada por cursor
      * @param {string} periodo - Filtro de período (diario, semanal, mensal, anual, todos)
-     * @returns {Promise} Promise com os dados das despesas
+     * @param {string} cursor - Cursor retornado pela página anterior (next_cursor)
+     * @param {number} limite - Quantidade de despesas por página
+     * @returns {Promise} Promise com {despesas, limite, next_cursor}
      */
-    obterTodas: function(periodo = null) {
-        let url = `${API_CONFIG.BASE_URL}/despesas/`;
+    obterPagina: function(periodo = null, cursor = null, limite = 50) {
+        const params = new URLSearchParams({ limite });
         
-        // Adiciona o filtro de período se fornecido e não for "todos"
         if (periodo && periodo !== 'todos') {
-            url += `?periodo=${periodo}`;
+            params.set('periodo', periodo);
+        }
+        if (cursor) {
+            params.set('cursor', cursor);
         }
         
-        return fetch(url)
-            .then(response => {
-                if (!response.ok) {
-                    throw new Error(`Erro ao obter despesas: ${response.status}`);
-                }
-                return response.json();
-            });
+        return API_CONFIG.obterJSON(`${API_CONFIG.BASE_URL}/despesas/?${params}`, 'obter despesas');
+    },
+    
+    /**
+     * Obtém só as despesas criadas, alteradas ou excluídas desde uma versão
+     * @param {string} periodo - Filtro de período (diario, semanal, mensal, anual, todos)
+     * @param {number} desde - Última versão já recebida (campo versao do painel)
+     * @returns {Promise} Promise com {versao, despesas, removidas, total, recarregar}
+     */
+    obterMudancas: function(periodo = null, desde = 0) {
+        const params = new URLSearchParams({ desde });
+        
+        if (periodo && periodo !== 'todos') {
+            params.set('periodo', periodo);
+        }
+        
+        return API_CONFIG.obterJSON(`${API_CONFIG.BASE_URL}/despesas/mudancas?${params}`, 'obter mudanças');
     },
     
     /**
@@ -80,13 +127,7 @@ const DespesasAPI = {
      * @returns {Promise} Promise com os dados da despesa
      */
     obterPorId: function(id) {
-        return fetch(`${API_CONFIG.BASE_URL}/despesas/${id}`)
-            .then(response => {
-                if (!response.ok) {
-                    throw new Error(`Erro ao obter despesa: ${response.status}`);
-                }
-                return response.json();
-            });
+        return API_CONFIG.obterJSON(`${API_CONFIG.BASE_URL}/despesas/${id}`, 'obter despesa');
     },
     
     /**
@@ -159,13 +200,7 @@ const CategoriasAPI = {
      * @returns {Promise} Promise com os dados das categorias
      */
     obterTodas: function() {
-        return fetch(`${API_CONFIG.BASE_URL}/categorias/`)
-            .then(response => {
-                if (!response.ok) {
-                    throw new Error(`Erro ao obter categorias: ${response.status}`);
-                }
-                return response.json();
-            });
+        return API_CONFIG.obterJSON(`${API_CONFIG.BASE_URL}/categorias/`, 'obter categorias');
     },
     
     /**
@@ -174,13 +209,7 @@ const CategoriasAPI = {
      * @returns {Promise} Promise com os dados da categoria
      */
     obterPorId: function(id) {
-        return fetch(`${API_CONFIG.BASE_URL}/categorias/${id}`)
-            .then(response => {
-                if (!response.ok) {
-                    throw new Error(`Erro ao obter categoria: ${response.status}`);
-                }
-                return response.json();
-            });
+        return API_CONFIG.obterJSON(`${API_CONFIG.BASE_URL}/categorias/${id}`, 'obter categoria');
     }
 };
 
@@ -201,13 +230,7 @@ const EstatisticasAPI = {
             url += `?periodo=${periodo}`;
         }
         
-        return fetch(url)
-            .then(response => {
-                if (!response.ok) {
-                    throw new Error(`Erro ao obter total de despesas: ${response.status}`);
-                }
-                return response.json();
-            });
+        return API_CONFIG.obterJSON(url, 'obter total de despesas');
     },
     
     /**
@@ -223,12 +246,28 @@ const EstatisticasAPI = {
             url += `?periodo=${periodo}`;
         }
         
-        return fetch(url)
-            .then(response => {
-                if (!response.ok) {
-                    throw new Error(`Erro ao obter despesas por categoria: ${response.status}`);
-                }
-                return response.json();
-            });
+        return API_CONFIG.obterJSON(url, 'obter despesas por categoria');
+    }
+};
+
+/**
+ * Módulo para o painel (carga inicial da página)
+ */
+const DashboardAPI = {
+    /**
+     * Obtém, em uma única requisição, o total, as despesas por categoria,
+     * a primeira página de despesas e as categorias
+     * @param {string} periodo - Filtro de período (diario, semanal, mensal, anual, todos)
+     * @param {number} limite - Quantidade de despesas da primeira página
+     * @returns {Promise} Promise com {total, por_categoria, despesas, limite, next_cursor, categorias, versao}
+     */
+    obter: function(periodo = null, limite = 50) {
+        const params = new URLSearchParams({ limite });
+        
+        if (periodo && periodo !== 'todos') {
+            params.set('periodo', periodo);
+        }
+        
+        return API_CONFIG.obterJSON(`${API_CONFIG.BASE_URL}/dashboard/?${params}`, 'obter painel');
     }
 };
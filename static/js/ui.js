@@ -9,9 +9,28 @@ const UI = {
     state: {
         despesas: [],
         categorias: [],
+        totalDespesas: 0,
+        proximoCursor: null,
+        // Versão dos dados carregados, usada para pedir só as mudanças
+        versao: null,
+        painel: null,
         periodoAtual: 'todos',
         periodoAtualEstatisticas: 'todos',
-        paginaAtual: 'despesas'
+        paginaAtual: 'despesas',
+        carregandoPagina: false
+    },
+    
+    // Renderização virtual da tabela de despesas: só as linhas visíveis
+    // (mais uma margem) existem no DOM; espaçadores ocupam a altura das demais
+    virtual: {
+        alturaLinha: 57,    // px; medida de novo a cada renderização
+        margem: 10,         // linhas extras acima e abaixo da área visível
+        tamanhoPagina: 100, // despesas por página carregada na rolagem
+        maxLinhasCache: 300,
+        linhas: new Map(),  // <tr> já montados, por id da despesa
+        inicio: -1,
+        fim: -1,
+        quadroAgendado: false
     },
     
     /**
@@ -20,16 +39,11 @@ const UI = {
     init: function() {
         console.log('Inicializando UI...');
         
-        // Carrega as categorias
-        this.carregarCategorias();
-        
         // Configura os eventos da interface
         this.configurarEventos();
         
-        // Carrega as despesas iniciais
-        this.carregarDespesas();
-        
-        // Define a página inicial como ativa
+        // Define a página inicial como ativa; o painel traz categorias,
+        // total e a primeira página de despesas em uma única requisição
         this.navegarPara('despesas');
     },
     
@@ -84,6 +98,25 @@ const UI = {
             });
         });
         
+        // Rolagem da tabela: redesenha só a janela de linhas visíveis
+        document.getElementById('rolagem-despesas').addEventListener('scroll', () => {
+            this.agendarJanela();
+        }, { passive: true });
+        window.addEventListener('resize', () => this.agendarJanela());
+        
+        // Botões de editar/excluir: um único listener na tabela, em vez de um por linha
+        document.getElementById('tabela-despesas').addEventListener('click', (e) => {
+            const botao = e.target.closest('.btn-acao');
+            if (!botao) return;
+            
+            const id = parseInt(botao.dataset.id);
+            if (botao.classList.contains('btn-editar')) {
+                this.editarDespesa(id);
+            } else {
+                this.confirmarExclusaoDespesa(id);
+            }
+        });
+        
         // Evento do botão Nova Despesa
         document.getElementById('btn-nova-despesa').addEventListener('click', () => {
             this.abrirModalDespesa();
@@ -140,21 +173,6 @@ const UI = {
         }
     },
     
-    /**
-     * Carrega as categorias do backend
-     */
-    carregarCategorias: function() {
-        CategoriasAPI.obterTodas()
-            .then(categorias => {
-                this.state.categorias = categorias;
-                this.preencherSelectCategorias();
-            })
-            .catch(error => {
-                console.error('Erro ao carregar categorias:', error);
-                alert('Erro ao carregar categorias. Verifique o console para mais detalhes.');
-            });
-    },
-    
     /**
      * Preenche o select de categorias no formulário
      */
@@ -196,12 +214,26 @@ const UI = {
     },
     
     /**
-     * Carrega as despesas do backend
+     * Carrega o painel do backend: categorias, total, despesas por categoria
+     * e a primeira página de despesas
      */
     carregarDespesas: function() {
-        DespesasAPI.obterTodas(this.state.periodoAtual)
-            .then(despesas => {
-                this.state.despesas = despesas;
+        const periodo = this.state.periodoAtual;
+        
+        // Descarta o painel anterior (pode estar desatualizado após uma escrita)
+        this.state.painel = null;
+        
+        DashboardAPI.obter(periodo)
+            .then(painel => {
+                this.state.categorias = painel.categorias;
+                this.preencherSelectCategorias();
+                
+                this.state.despesas = painel.despesas;
+                this.state.proximoCursor = painel.next_cursor;
+                this.state.versao = painel.versao;
+                this.state.totalDespesas = painel.total;
+                this.state.painel = { periodo, total: painel.total, porCategoria: painel.por_categoria };
+                
                 this.renderizarDespesas();
                 this.atualizarTotalDespesas();
             })
@@ -212,67 +244,250 @@ const UI = {
     },
     
     /**
-     * Renderiza as despesas na tabela
+     * Atualiza a lista carregada só com as despesas que mudaram desde a
+     * última versão, em vez de recarregar o painel inteiro
+     */
+    sincronizarDespesas: function() {
+        if (this.state.versao === null) {
+            this.carregarDespesas();
+            return;
+        }
+        
+        const periodo = this.state.periodoAtual;
+        
+        // As estatísticas por categoria do painel ficaram desatualizadas
+        this.state.painel = null;
+        
+        DespesasAPI.obterMudancas(periodo, this.state.versao)
+            .then(mudancas => {
+                // O usuário trocou de período enquanto a requisição estava em andamento
+                if (periodo !== this.state.periodoAtual) return;
+                
+                if (mudancas.recarregar) {
+                    this.carregarDespesas();
+                    return;
+                }
+                
+                this.aplicarMudancas(mudancas.despesas, mudancas.removidas);
+                this.state.versao = mudancas.versao;
+                this.state.totalDespesas = mudancas.total;
+                
+                // Refaz só as linhas que mudaram
+                this.atualizarLinhas(mudancas.despesas.map(despesa => despesa.id).concat(mudancas.removidas));
+                this.atualizarTotalDespesas();
+            })
+            .catch(error => {
+                console.error('Erro ao sincronizar despesas:', error);
+                this.carregarDespesas();
+            });
+    },
+    
+    /**
+     * Aplica à lista carregada as despesas alteradas e as removidas,
+     * mantendo a ordem da listagem (data mais recente primeiro, depois id)
+     * @param {Array} alteradas - Despesas criadas ou alteradas (formato da listagem)
+     * @param {Array} removidas - IDs das despesas excluídas ou fora do filtro
+     */
+    aplicarMudancas: function(alteradas, removidas) {
+        // Chave de ordenação: data dd/mm/aaaa como aaaammdd, e o id
+        const chave = despesa => [despesa.data.split('/').reverse().join(''), despesa.id];
+        const antes = (a, b) => {
+            const [dataA, idA] = chave(a);
+            const [dataB, idB] = chave(b);
+            return dataA !== dataB ? dataA > dataB : idA > idB;
+        };
+        
+        // Com mais páginas no servidor, só entram as despesas que ficam até a
+        // última carregada (a posição do cursor); as demais virão com ele
+        const ultima = this.state.despesas[this.state.despesas.length - 1];
+        const cabe = despesa => !this.state.proximoCursor || !ultima || !antes(ultima, despesa);
+        
+        const descartar = new Set(removidas.concat(alteradas.map(despesa => despesa.id)));
+        let despesas = this.state.despesas.filter(despesa => !descartar.has(despesa.id));
+        
+        despesas = despesas.concat(alteradas.filter(cabe));
+        despesas.sort((a, b) => (antes(a, b) ? -1 : antes(b, a) ? 1 : 0));
+        this.state.despesas = despesas;
+    },
+    
+    /**
+     * Carrega a próxima página de despesas e a acrescenta à tabela; chamada
+     * pela rolagem ao se aproximar do fim das linhas carregadas
+     */
+    carregarMaisDespesas: function() {
+        if (!this.state.proximoCursor || this.state.carregandoPagina) return;
+        
+        const periodo = this.state.periodoAtual;
+        const cursor = this.state.proximoCursor;
+        this.state.carregandoPagina = true;
+        
+        DespesasAPI.obterPagina(periodo, cursor, this.virtual.tamanhoPagina)
+            .then(pagina => {
+                // A lista foi recarregada (outro período ou outra escrita) nesse meio-tempo
+                if (periodo !== this.state.periodoAtual || cursor !== this.state.proximoCursor) return;
+                
+                this.state.despesas = this.state.despesas.concat(pagina.despesas);
+                this.state.proximoCursor = pagina.next_cursor;
+                this.renderizarJanela(true);
+            })
+            .catch(error => {
+                console.error('Erro ao carregar mais despesas:', error);
+                alert('Erro ao carregar despesas. Verifique o console para mais detalhes.');
+            })
+            .finally(() => {
+                this.state.carregandoPagina = false;
+            });
+    },
+    
+    /**
+     * Renderiza a tabela a partir do início, descartando as linhas montadas
+     * (nova carga da lista ou troca de período)
      */
     renderizarDespesas: function() {
-        const tbody = document.getElementById('tabela-despesas');
+        this.virtual.linhas.clear();
+        document.getElementById('rolagem-despesas').scrollTop = 0;
+        this.renderizarJanela(true);
+    },
+    
+    /**
+     * Refaz as linhas das despesas informadas, sem remontar as demais
+     * @param {Array} ids - IDs das despesas alteradas ou removidas
+     */
+    atualizarLinhas: function(ids) {
+        ids.forEach(id => this.virtual.linhas.delete(id));
+        this.renderizarJanela(true);
+    },
+    
+    /**
+     * Agenda o redesenho da janela para o próximo quadro (no máximo um por quadro)
+     */
+    agendarJanela: function() {
+        if (this.virtual.quadroAgendado) return;
+        this.virtual.quadroAgendado = true;
         
-        // Limpa o conteúdo atual
-        tbody.innerHTML = '';
+        requestAnimationFrame(() => {
+            this.virtual.quadroAgendado = false;
+            this.renderizarJanela(false);
+        });
+    },
+    
+    /**
+     * Desenha só as linhas na área visível da tabela, com espaçadores no
+     * lugar das demais, e pede a próxima página perto do fim da lista
+     * @param {boolean} forcar - Redesenha mesmo se a janela não mudou
+     * @param {boolean} medida - A altura das linhas já foi medida neste redesenho
+     */
+    renderizarJanela: function(forcar, medida = false) {
+        const tbody = document.getElementById('tabela-despesas');
+        const rolagem = document.getElementById('rolagem-despesas');
+        const despesas = this.state.despesas;
+        const virtual = this.virtual;
         
         // Se não houver despesas, exibe uma mensagem
-        if (this.state.despesas.length === 0) {
-            const tr = document.createElement('tr');
-            tr.innerHTML = '<td colspan="5" class="text-center">Nenhuma despesa encontrada</td>';
-            tbody.appendChild(tr);
+        if (despesas.length === 0) {
+            virtual.inicio = virtual.fim = -1;
+            tbody.innerHTML = '<tr><td colspan="5" class="text-center">Nenhuma despesa encontrada</td></tr>';
             return;
         }
         
-        // Renderiza cada despesa
-        this.state.despesas.forEach(despesa => {
+        const visiveis = Math.ceil((rolagem.clientHeight || window.innerHeight) / virtual.alturaLinha);
+        let inicio = Math.max(0, Math.floor(rolagem.scrollTop / virtual.alturaLinha) - virtual.margem);
+        // Início sempre par: as listras da tabela (linhas ímpares) não trocam de lugar na rolagem
+        inicio -= inicio % 2;
+        const fim = Math.min(despesas.length, inicio + visiveis + 2 * virtual.margem);
+        
+        if (!forcar && inicio === virtual.inicio && fim === virtual.fim) return;
+        virtual.inicio = inicio;
+        virtual.fim = fim;
+        
+        // Linhas montadas fora da janela por muito tempo são descartadas
+        if (virtual.linhas.size > virtual.maxLinhasCache) {
+            virtual.linhas.clear();
+        }
+        
+        const fragmento = document.createDocumentFragment();
+        fragmento.appendChild(this.espacador(inicio * virtual.alturaLinha));
+        for (let i = inicio; i < fim; i++) {
+            fragmento.appendChild(this.linhaDespesa(despesas[i]));
+        }
+        fragmento.appendChild(this.espacador((despesas.length - fim) * virtual.alturaLinha));
+        
+        // Mais páginas no servidor: indica o carregamento no fim da tabela
+        if (this.state.proximoCursor) {
             const tr = document.createElement('tr');
-            
-            // Formata o valor como moeda
-            const valorFormatado = API_CONFIG.formatarMoeda(despesa.valor);
-            
-            // Cria o badge para a categoria
-            const categoriaBadge = `<span class="badge-categoria" style="background-color: ${despesa.categoria_cor}">${despesa.categoria_nome}</span>`;
-            
-            // Cria os botões de ação
-            const btnEditar = `<button class="btn-acao btn-editar" data-id="${despesa.id}"><i class="fas fa-edit"></i></button>`;
-            const btnExcluir = `<button class="btn-acao btn-excluir" data-id="${despesa.id}"><i class="fas fa-trash-alt"></i></button>`;
-            
-            // Define o conteúdo da linha
-            tr.innerHTML = `
-                <td>${despesa.descricao}</td>
-                <td>${valorFormatado}</td>
-                <td>${categoriaBadge}</td>
-                <td>${despesa.data}</td>
-                <td>${btnEditar} ${btnExcluir}</td>
-            `;
-            
-            // Adiciona eventos aos botões
-            tr.querySelector('.btn-editar').addEventListener('click', () => {
-                this.editarDespesa(despesa.id);
-            });
-            
-            tr.querySelector('.btn-excluir').addEventListener('click', () => {
-                this.confirmarExclusaoDespesa(despesa.id);
-            });
-            
-            tbody.appendChild(tr);
-        });
+            tr.innerHTML = '<td colspan="5" class="text-center text-muted">Carregando mais despesas...</td>';
+            fragmento.appendChild(tr);
+        }
+        
+        tbody.replaceChildren(fragmento);
+        
+        // Ajusta a altura estimada à real (fonte, tela) e redesenha uma vez se mudou
+        const primeira = tbody.querySelector('tr[data-id]');
+        if (!medida && primeira && primeira.offsetHeight && Math.abs(primeira.offsetHeight - virtual.alturaLinha) > 1) {
+            virtual.alturaLinha = primeira.offsetHeight;
+            this.renderizarJanela(true, true);
+            return;
+        }
+        
+        // Perto do fim das linhas carregadas: busca a próxima página
+        if (fim >= despesas.length - virtual.margem) {
+            this.carregarMaisDespesas();
+        }
+    },
+    
+    /**
+     * Cria a linha vazia que ocupa a altura das linhas fora da janela
+     * @param {number} altura - Altura em px
+     * @returns {HTMLElement} Linha espaçadora
+     */
+    espacador: function(altura) {
+        const tr = document.createElement('tr');
+        tr.className = 'espaco-virtual';
+        tr.innerHTML = `<td colspan="5" style="height: ${altura}px"></td>`;
+        return tr;
+    },
+    
+    /**
+     * Retorna a linha da tabela de uma despesa, montando-a só na primeira vez
+     * @param {Object} despesa - Despesa no formato da listagem
+     * @returns {HTMLElement} Linha da despesa
+     */
+    linhaDespesa: function(despesa) {
+        let tr = this.virtual.linhas.get(despesa.id);
+        if (tr) return tr;
+        
+        tr = document.createElement('tr');
+        tr.dataset.id = despesa.id;
+        
+        // Formata o valor como moeda
+        const valorFormatado = API_CONFIG.formatarMoeda(despesa.valor);
+        
+        // Cria o badge para a categoria
+        const categoriaBadge = `<span class="badge-categoria" style="background-color: ${despesa.categoria_cor}">${despesa.categoria_nome}</span>`;
+        
+        // Cria os botões de ação (os cliques são tratados na tabela, ver configurarEventos)
+        const btnEditar = `<button class="btn-acao btn-editar" data-id="${despesa.id}"><i class="fas fa-edit"></i></button>`;
+        const btnExcluir = `<button class="btn-acao btn-excluir" data-id="${despesa.id}"><i class="fas fa-trash-alt"></i></button>`;
+        
+        // Define o conteúdo da linha
+        tr.innerHTML = `
+            <td>${despesa.descricao}</td>
+            <td>${valorFormatado}</td>
+            <td>${categoriaBadge}</td>
+            <td>${despesa.data}</td>
+            <td>${btnEditar} ${btnExcluir}</td>
+        `;
+        
+        this.virtual.linhas.set(despesa.id, tr);
+        return tr;
     },
     
     /**
      * Atualiza o total de despesas exibido
      */
     atualizarTotalDespesas: function() {
-        // Calcula o total das despesas atuais
-        const total = this.state.despesas.reduce((acc, despesa) => acc + despesa.valor, 0);
-        
-        // Atualiza o elemento na interface
-        document.getElementById('total-despesas').textContent = API_CONFIG.formatarMoeda(total);
+        // O total vem calculado pelo servidor, já que a tabela traz só as primeiras páginas
+        document.getElementById('total-despesas').textContent = API_CONFIG.formatarMoeda(this.state.totalDespesas);
     },
     
     /**
@@ -368,8 +583,8 @@ const UI = {
                     document.body.style.paddingRight = '';
                 }, 300);
                 
-                // Recarrega as despesas
-                this.carregarDespesas();
+                // Busca só o que mudou desde a última versão carregada
+                this.sincronizarDespesas();
                 
                 // Se estiver na página de estatísticas, recarrega também
                 if (this.state.paginaAtual === 'estatisticas') {
@@ -399,8 +614,8 @@ const UI = {
         if (confirm('Tem certeza que deseja excluir esta despesa?')) {
             DespesasAPI.excluir(id)
                 .then(() => {
-                    // Recarrega as despesas
-                    this.carregarDespesas();
+                    // Busca só o que mudou desde a última versão carregada
+                    this.sincronizarDespesas();
                     
                     // Se estiver na página de estatísticas, recarrega também
                     if (this.state.paginaAtual === 'estatisticas') {
@@ -418,6 +633,15 @@ const UI = {
      * Carrega as estatísticas do backend
      */
     carregarEstatisticas: function() {
+        // Reaproveita o painel já carregado para o mesmo período
+        const painel = this.state.painel;
+        if (painel && painel.periodo === this.state.periodoAtualEstatisticas) {
+            document.getElementById('total-despesas-estatisticas').textContent = API_CONFIG.formatarMoeda(painel.total);
+            this.renderizarGraficoCategorias(painel.porCategoria);
+            this.renderizarListaCategorias(painel.porCategoria);
+            return;
+        }
+        
         // Carrega o total de despesas
         EstatisticasAPI.obterTotal(this.state.periodoAtualEstatisticas)
             .then(data => {
@@ -663,8 +887,3 @@ const UI = {
         });
     }
 };
-
-// Inicializa a UI quando o documento estiver pronto
-document.addEventListener('DOMContentLoaded', function() {
-    UI.init();
-});
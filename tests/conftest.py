@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Fixtures dos testes: aplicação em modo de teste sobre um banco SQLite migrado
+
+Em modo de teste (TESTING) os orçamentos de consultas das rotas
+(app/diagnostico.py) estão ativos e OrcamentoExcedido chega ao teste.
+"""
+
+from datetime import date
+import pytest
+from app import create_app
+from app.cache import cache
+from app.models.migracoes import Migracoes
+
+def despesa(descricao='Almoço', valor=25.9, data=None, categoria_id=1):
+    """
+    Corpo JSON de uma despesa para POST/PUT
+    """
+    return {
+        'descricao': descricao,
+        'valor': valor,
+        'data': (data or date.today()).isoformat(),
+        'categoria_id': categoria_id
+    }
+
+@pytest.fixture
+def criar_app(monkeypatch):
+    """
+    Fábrica de aplicações migradas sobre o banco indicado (padrão: SQLite em memória)
+    
+    Duas aplicações criadas com o mesmo arquivo SQLite fazem o papel de dois
+    workers (ou servidores) sobre o mesmo banco.
+    """
+    monkeypatch.delenv('DB_REPLICA_URL', raising=False)
+    # O cache é do processo: entradas de outro teste não podem ser reaproveitadas
+    cache.invalidar()
+    
+    def criar(banco='sqlite://'):
+        monkeypatch.setenv('DATABASE_URL', banco)
+        app = create_app()
+        app.config['TESTING'] = True
+        with app.app_context():
+            Migracoes.aplicar()
+        return app
+    return criar
+
+@pytest.fixture
+def app(criar_app):
+    """
+    Aplicação sobre um banco SQLite em memória, só com as categorias padrão
+    """
+    return criar_app()
+
+@pytest.fixture
+def cliente(app):
+    """
+    Cliente de teste da aplicação
+    """
+    return app.test_client()
@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Testes da busca textual indexada (GET /api/despesas/busca, app/models/busca.py)
+"""
+
+import pytest
+from tests.conftest import despesa
+
+def buscar(cliente, texto):
+    """
+    Descrições encontradas pela busca, em ordem alfabética
+    """
+    resposta = cliente.get('/api/despesas/busca', query_string={'q': texto})
+    assert resposta.status_code == 200
+    return sorted(d['descricao'] for d in resposta.get_json()['despesas'])
+
+@pytest.fixture
+def ids(cliente):
+    """
+    Cria despesas com descrições conhecidas e retorna os IDs por descrição
+    """
+    descricoes = ['Uber viagem', 'Farmácia São João', 'Posto Ipiranga', 'Mercado Extra']
+    resposta = cliente.post('/api/despesas/lote', json=[despesa(descricao) for descricao in descricoes])
+    assert resposta.status_code == 201
+    return dict(zip(descricoes, resposta.get_json()['ids']))
+
+def test_cada_palavra_vale_como_prefixo(cliente, ids):
+    assert buscar(cliente, 'ub') == ['Uber viagem']
+    assert buscar(cliente, 'posto ipir') == ['Posto Ipiranga']
+    assert buscar(cliente, 'posto uber') == []
+
+def test_acentos_e_maiusculas_ignorados(cliente, ids):
+    assert buscar(cliente, 'farmacia') == ['Farmácia São João']
+    assert buscar(cliente, 'SAO JOAO') == ['Farmácia São João']
+    assert buscar(cliente, 'jóã') == ['Farmácia São João']
+
+def test_indice_acompanha_atualizacao(cliente, ids):
+    corpo = despesa('Padaria Central')
+    assert cliente.put(f"/api/despesas/{ids['Mercado Extra']}", json=corpo).status_code == 200
+    
+    assert buscar(cliente, 'mercado') == []
+    assert buscar(cliente, 'padar') == ['Padaria Central']
+
+def test_exclusao_remove_do_indice(cliente, ids):
+    assert cliente.delete(f"/api/despesas/{ids['Uber viagem']}").status_code == 200
+    assert buscar(cliente, 'uber') == []
+
+@pytest.mark.parametrize('texto', ['', '   ', '*"-', 'u', 'a e'])
+def test_busca_vazia_ou_curta_rejeitada(cliente, ids, texto):
+    resposta = cliente.get('/api/despesas/busca', query_string={'q': texto})
+    assert resposta.status_code == 400
+    assert 'error' in resposta.get_json()
+
+def test_busca_sem_q_rejeitada(cliente):
+    assert cliente.get('/api/despesas/busca').status_code == 400
@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Testes da quantidade de comandos SQL por requisição na listagem de despesas
+
+A contagem vem do contador por requisição de app/metricas.py, publicado no
+cabeçalho Server-Timing (`sql;...;desc="N comandos"`).
+"""
+
+import re
+import pytest
+from tests.conftest import despesa
+
+def comandos(resposta):
+    """
+    Número de comandos SQL executados pela requisição
+    """
+    return int(re.search(r'desc="(\d+) comandos"', resposta.headers['Server-Timing']).group(1))
+
+def popular(cliente, quantidade):
+    """
+    Cria despesas espalhadas pelas categorias padrão e retorna os IDs
+    """
+    categorias = [categoria['id'] for categoria in cliente.get('/api/categorias/').get_json()]
+    corpo = [despesa(f"Despesa {i}", 10 + i, categoria_id=categorias[i % len(categorias)])
+             for i in range(quantidade)]
+    resposta = cliente.post('/api/despesas/lote', json=corpo)
+    assert resposta.status_code == 201
+    return resposta.get_json()['ids']
+
+@pytest.mark.parametrize('url', ['/api/despesas/?limite=100', '/api/despesas/?periodo=anual&limite=100'])
+def test_listagem_com_comandos_fixos(cliente, url):
+    vazia = cliente.get(url)
+    assert vazia.status_code == 200
+    
+    popular(cliente, 40)
+    cheia = cliente.get(url)
+    assert cheia.status_code == 200
+    
+    assert len(cheia.get_json()['despesas']) == 40
+    assert comandos(cheia) == comandos(vazia)
+
+def test_obter_por_id_com_comandos_fixos(cliente):
+    primeira, ultima = popular(cliente, 1)[0], popular(cliente, 20)[-1]
+    assert comandos(cliente.get(f'/api/despesas/{primeira}')) == comandos(cliente.get(f'/api/despesas/{ultima}'))
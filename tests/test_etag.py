@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Testes do GET condicional (app/etag.py) com várias instâncias sobre um banco
+"""
+
+from app.cache import cache
+from app.models.resumo import Resumo
+from tests.conftest import despesa
+
+def test_escrita_em_outra_instancia_invalida_etag(criar_app, tmp_path, monkeypatch):
+    banco = f"sqlite:///{tmp_path / 'compartilhado.db'}"
+    leitor = criar_app(banco).test_client()
+    escritor = criar_app(banco).test_client()
+    
+    primeira = leitor.get('/api/despesas/')
+    etag = primeira.headers['ETag']
+    assert leitor.get('/api/despesas/', headers={'If-None-Match': etag}).status_code == 304
+    total = leitor.get('/api/estatisticas/total').get_json()['total']
+    
+    # Instância que não compartilha a geração do cache: a escrita do outro
+    # processo não chega até ela
+    monkeypatch.setattr(cache, 'invalidar', lambda: None)
+    assert escritor.post('/api/despesas/', json=despesa()).status_code == 201
+    
+    segunda = leitor.get('/api/despesas/', headers={'If-None-Match': etag})
+    assert segunda.status_code == 200
+    assert segunda.headers['ETag'] != etag
+    assert [d['descricao'] for d in segunda.get_json()['despesas']] == ['Almoço']
+    # Os valores em cache da instância também deixam de valer
+    assert leitor.get('/api/estatisticas/total').get_json()['total'] != total
+
+def test_etag_valido_responde_304(cliente):
+    assert cliente.post('/api/despesas/', json=despesa()).status_code == 201
+    
+    resposta = cliente.get('/api/despesas/')
+    etag = resposta.headers['ETag']
+    assert cliente.get('/api/despesas/', headers={'If-None-Match': etag}).status_code == 304
+    
+    assert cliente.post('/api/despesas/', json=despesa('Jantar')).status_code == 201
+    assert cliente.get('/api/despesas/', headers={'If-None-Match': etag}).status_code == 200
+
+def test_reconstrucao_do_resumo_invalida_etag(criar_app, tmp_path, monkeypatch):
+    banco = f"sqlite:///{tmp_path / 'compartilhado.db'}"
+    app = criar_app(banco)
+    cliente = app.test_client()
+    assert cliente.post('/api/despesas/', json=despesa()).status_code == 201
+    etag = cliente.get('/api/estatisticas/total').headers['ETag']
+    
+    # reconstruir_resumo.py em outro servidor, sem a geração do cache deste
+    monkeypatch.setattr(cache, 'invalidar', lambda: None)
+    with criar_app(banco).app_context():
+        Resumo.reconstruir()
+    
+    assert cliente.get('/api/estatisticas/total', headers={'If-None-Match': etag}).status_code == 200
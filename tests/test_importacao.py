@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Testes da importação de extratos (app/models/importacao.py)
+"""
+
+import io
+import pytest
+from app.models.importacao import Importacao
+
+@pytest.mark.parametrize('texto, centavos', [
+    ('-12.50', -1250),
+    ('1234.56', 123456),
+    ('1234,56', 123456),
+    ('1.234,56', 123456),
+    ('R$ -12,50', -1250),
+    ('1.234', 123400),
+    ('-1.234', -123400),
+    ('1.234.567', 123456700),
+    ('12.5', 1250),
+    ('0.999', 100),
+])
+def test_converter_valor(texto, centavos):
+    assert Importacao._converter_valor(texto) == centavos
+
+def test_csv_valor_positivo_vira_despesa(app):
+    # Extrato de cartão: compras com valor positivo
+    extrato = io.StringIO(
+        "data;descricao;valor\n"
+        "10/10/2026;Uber viagem;-1.234\n"
+        "11/10/2026;Restaurante;45,90\n"
+        "12/10/2026;Farmácia;-32,10\n"
+    )
+    with app.app_context():
+        relatorio = Importacao.executar(extrato, 'csv')
+    
+    assert relatorio['lidas'] == 3
+    assert relatorio['importadas'] == 3
+    assert relatorio['ignoradas'] == 0
+    
+    despesas = app.test_client().get('/api/despesas/?limite=10').get_json()['despesas']
+    assert sorted((d['descricao'], d['valor']) for d in despesas) == [
+        ('Farmácia', -32.1), ('Restaurante', -45.9), ('Uber viagem', -1234.0)
+    ]
+
+def test_ofx_ignora_creditos(app):
+    extrato = io.StringIO(
+        "<OFX><BANKTRANLIST>"
+        "<STMTTRN><TRNTYPE>DEBIT<DTPOSTED>20261010<TRNAMT>-50.00<MEMO>Posto Shell</STMTTRN>"
+        "<STMTTRN><TRNTYPE>CREDIT<DTPOSTED>20261011<TRNAMT>1000.00<MEMO>Salário</STMTTRN>"
+        "</BANKTRANLIST></OFX>"
+    )
+    with app.app_context():
+        relatorio = Importacao.executar(extrato, 'ofx')
+    
+    assert (relatorio['importadas'], relatorio['ignoradas']) == (1, 1)
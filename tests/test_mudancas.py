@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Testes da sincronização incremental (GET /api/despesas/mudancas, app/models/mudancas.py)
+"""
+
+from app.models.database import db, DespesaExcluida
+from app.models.mudancas import Mudancas
+from tests.conftest import despesa
+
+def mudancas(cliente, desde, **filtros):
+    """
+    Corpo da resposta de /api/despesas/mudancas a partir da versão `desde`
+    """
+    resposta = cliente.get('/api/despesas/mudancas', query_string={'desde': desde, **filtros})
+    assert resposta.status_code == 200
+    return resposta.get_json()
+
+def criar(cliente, **campos):
+    resposta = cliente.post('/api/despesas/', json=despesa(**campos))
+    assert resposta.status_code == 201
+    return resposta.get_json()['id']
+
+def test_despesa_que_sai_do_filtro_vem_como_removida(cliente):
+    despesa_id = criar(cliente, categoria_id=1)
+    versao = mudancas(cliente, 0)['versao']
+    
+    assert cliente.put(f'/api/despesas/{despesa_id}', json=despesa(categoria_id=2)).status_code == 200
+    
+    filtrada = mudancas(cliente, versao, categoria_id=1)
+    assert filtrada['despesas'] == []
+    assert filtrada['removidas'] == [despesa_id]
+    
+    # Sem o filtro, a mesma alteração vem como despesa alterada
+    completa = mudancas(cliente, versao)
+    assert [d['id'] for d in completa['despesas']] == [despesa_id]
+    assert completa['removidas'] == []
+
+def test_exclusao_registra_tombstone(app, cliente):
+    mantida, excluida = criar(cliente, descricao='Mantida'), criar(cliente, descricao='Excluída')
+    versao = mudancas(cliente, 0)['versao']
+    
+    assert cliente.delete(f'/api/despesas/{excluida}').status_code == 200
+    
+    corpo = mudancas(cliente, versao)
+    assert corpo['removidas'] == [excluida]
+    assert corpo['despesas'] == []
+    with app.app_context():
+        tombstones = db.session.query(DespesaExcluida.despesa_id, DespesaExcluida.versao).all()
+    assert tombstones == [(excluida, corpo['versao'])]
+    assert mantida not in corpo['removidas']
+
+def test_versao_anterior_a_minima_recarrega(app, cliente):
+    criar(cliente)
+    antiga = mudancas(cliente, 0)['versao']
+    
+    with app.app_context():
+        minima = Mudancas.descartar_historico()
+        db.session.commit()
+    
+    assert mudancas(cliente, antiga)['recarregar'] is True
+    assert mudancas(cliente, minima)['recarregar'] is False
+
+def test_mudancas_demais_recarregam(app, cliente):
+    for _ in range(3):
+        criar(cliente)
+    
+    with app.app_context():
+        assert Mudancas.desde(0, limite=2)['recarregar'] is True
+        assert Mudancas.desde(0, limite=3)['recarregar'] is False
+
+def test_versao_cliente_a_frente_recarrega(cliente):
+    atual = mudancas(cliente, 0)['versao']
+    assert mudancas(cliente, atual + 1)['recarregar'] is True
+
+def test_versao_cresce_a_cada_escrita(cliente):
+    versoes = [mudancas(cliente, 0)['versao']]
+    despesa_id = criar(cliente)
+    versoes.append(mudancas(cliente, versoes[-1])['versao'])
+    cliente.put(f'/api/despesas/{despesa_id}', json=despesa('Editada'))
+    versoes.append(mudancas(cliente, versoes[-1])['versao'])
+    cliente.post('/api/despesas/lote', json=[despesa('A'), despesa('B')])
+    versoes.append(mudancas(cliente, versoes[-1])['versao'])
+    cliente.delete(f'/api/despesas/{despesa_id}')
+    versoes.append(mudancas(cliente, versoes[-1])['versao'])
+    
+    assert versoes == sorted(set(versoes))
+    # Sem escritas, a versão não muda e não há mudanças a aplicar
+    ultima = mudancas(cliente, versoes[-1])
+    assert (ultima['versao'], ultima['despesas'], ultima['removidas']) == (versoes[-1], [], [])
+
+def test_limpeza_do_banco_descarta_historico(app, cliente):
+    from gerar_dados import limpar
+    
+    excluida = criar(cliente)
+    criar(cliente)
+    assert cliente.delete(f'/api/despesas/{excluida}').status_code == 200
+    antiga = mudancas(cliente, 0)['versao']
+    
+    with app.app_context():
+        limpar()
+        assert db.session.query(DespesaExcluida).count() == 0
+    
+    corpo = mudancas(cliente, antiga)
+    assert corpo['recarregar'] is True
+    assert corpo['versao'] > antiga
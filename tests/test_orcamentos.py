@@ -0,0 +1,45 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Testes dos orçamentos de consultas das rotas (app/diagnostico.py)
+
+Cada requisição de benchmarks/orcamentos.py é feita com o cache frio sobre um
+banco com algumas despesas; em modo de teste, uma rota que passe do número
+de comandos declarado, ou faça varredura completa não permitida, levanta
+OrcamentoExcedido e o teste falha.
+"""
+
+from datetime import date, timedelta
+import pytest
+from app.cache import cache
+from benchmarks.orcamentos import requisicoes
+from tests.conftest import despesa
+
+# Requisições com valores quaisquer, só para nomear os casos
+CASOS = [f"{metodo} {url}" for metodo, url, _ in requisicoes([1, 2, 3], 1, 0)]
+
+@pytest.fixture
+def banco_populado(cliente):
+    """
+    Cria despesas no último ano, em todas as categorias, e retorna os
+    argumentos de `requisicoes`
+    """
+    categorias = [categoria['id'] for categoria in cliente.get('/api/categorias/').get_json()]
+    hoje = date.today()
+    corpo = [despesa(f"Uber {i}" if i % 3 else f"Farmácia {i}", 5 + i,
+                     hoje - timedelta(days=i * 7), categorias[i % len(categorias)])
+             for i in range(60)]
+    assert cliente.post('/api/despesas/lote', json=corpo).status_code == 201
+    
+    ids = [d['id'] for d in cliente.get('/api/despesas/?limite=3').get_json()['despesas']]
+    versao = cliente.get('/api/dashboard/').get_json()['versao']
+    return ids, categorias[0], versao
+
+@pytest.mark.parametrize('indice', range(len(CASOS)), ids=CASOS)
+def test_rota_dentro_do_orcamento(cliente, banco_populado, indice):
+    metodo, url, corpo = requisicoes(*banco_populado)[indice]
+    cache.invalidar()
+    
+    resposta = cliente.open(url, method=metodo, json=corpo)
+    assert resposta.status_code < 400
@@ -0,0 +1,16 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Ponto de entrada WSGI da aplicação Primo'sFinCntrl para servidores de produção
+
+Uso: gunicorn -c gunicorn.conf.py wsgi:app
+"""
+
+from app import create_app
+from dotenv import load_dotenv
+
+# Carrega as variáveis de ambiente do arquivo .env se existir
+load_dotenv()
+
+app = create_app()